@@ -0,0 +1,99 @@
+"""Measures ComdirectClient against the local mock server.
+
+Scenarios: the auth flow, paginated account transactions, the position fan-out over all depots and a bulk document
+download. Besides the wall time each scenario reports the overhead per request, i.e. the time not explained by the
+configured server latency, spent in the client and the generation of the mock responses.
+
+Usage: python -m benchmarks.bench_client [latency in ms] [error rate]
+"""
+
+from contextlib import redirect_stdout
+import io
+import sys
+import tempfile
+import time
+
+from benchmarks.mock_server import MockComdirectServer
+from comdirect_api.comdirect_client import ComdirectClient
+
+
+def bench_auth(client, server):
+    # the auth flow prints the TAN type and activation
+    with redirect_stdout(io.StringIO()):
+        client.fetch_tan("user", "pin")
+        client.activate_session()
+
+
+def bench_transactions(client, server):
+    for account_uuid in server.accounts:
+        for _ in client.iter_account_transactions(account_uuid, paging_count=500):
+            pass
+
+
+def bench_positions(client, server):
+    positions, errors = client.get_all_depot_positions(max_workers=8)
+    assert not errors, errors
+
+
+def bench_documents(client, server):
+    with tempfile.TemporaryDirectory() as directory:
+        report = client.download_documents(directory, max_workers=8)
+    assert not report.errors, report.errors
+
+
+SCENARIOS = [
+    ("auth flow", bench_auth),
+    ("transactions", bench_transactions),
+    ("position fan-out", bench_positions),
+    ("documents", bench_documents),
+]
+
+
+def run(scenario, client, server):
+    requests = server.request_count
+    started = time.perf_counter()
+    scenario(client, server)
+    elapsed = time.perf_counter() - started
+    requests = server.request_count - requests
+    overhead = (elapsed - requests * server.latency) / requests if requests else 0.0
+    return elapsed, requests, overhead
+
+
+def main(latency_ms=2.0, error_rate=0.0, repeat=3):
+    latency = latency_ms / 1000
+    with MockComdirectServer(
+        latency=latency,
+        error_rate=error_rate,
+        transactions=5000,
+        depots=20,
+        positions=50,
+        documents=100,
+    ) as server:
+        client = ComdirectClient(
+            "client_id",
+            "client_secret",
+            api_url=server.api_url,
+            oauth_url=server.oauth_url,
+        )
+        client.enable_retries(backoff_factor=0)
+        bench_auth(client, server)
+
+        print(
+            "{0:18} {1:>10} {2:>9} {3:>16}".format(
+                "scenario", "time", "requests", "overhead/request"
+            )
+        )
+        for name, scenario in SCENARIOS:
+            elapsed, requests, overhead = min(
+                run(scenario, client, server) for _ in range(repeat)
+            )
+            print(
+                "{0:18} {1:8.1f}ms {2:9d} {3:14.2f}ms".format(
+                    name, elapsed * 1000, requests, overhead * 1000
+                )
+            )
+        print("server errors injected: {0}".format(server.error_count))
+
+
+if __name__ == "__main__":
+    main(*map(float, sys.argv[1:]))
@@ -0,0 +1,45 @@
+"""Compares the time to decode a large account transactions page with Response.json and the available decoders.
+
+Usage: python -m benchmarks.bench_decoding [count] [repeat]
+"""
+
+import json
+import sys
+import timeit
+
+from requests.models import Response
+
+from benchmarks.bench_models_memory import transaction
+from comdirect_api import decoding
+
+
+def main(count=10000, repeat=20):
+    content = json.dumps(
+        {
+            "paging": {"index": 0, "matches": count},
+            "values": [transaction(i) for i in range(count)],
+        }
+    ).encode()
+
+    print(
+        "{0} transactions, {1:.1f} MiB, best of {2}".format(
+            count, len(content) / 2**20, repeat
+        )
+    )
+    response = Response()
+    response._content = content
+    response.encoding = "utf-8"
+    baseline = min(timeit.repeat(response.json, number=1, repeat=repeat))
+    print("{0:8} {1:8.2f} ms".format("requests", baseline * 1000))
+    for name in (decoding.JSON, decoding.ORJSON, decoding.MSGSPEC):
+        try:
+            decoder = decoding.get_decoder(name)
+        except ImportError:
+            print("{0:8} not installed".format(name))
+            continue
+        best = min(timeit.repeat(lambda: decoder(content), number=1, repeat=repeat))
+        print("{0:8} {1:8.2f} ms ({2:.1f}x)".format(name, best * 1000, baseline / best))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,67 @@
+"""Compares the memory held by account transactions as decoded JSON and as models.
+
+Usage: python -m benchmarks.bench_models_memory [count]
+"""
+
+import json
+import sys
+import tracemalloc
+
+from comdirect_api import models
+
+
+def transaction(i):
+    return {
+        "reference": "{0:016d}".format(i),
+        "bookingStatus": "BOOKED",
+        "bookingDate": "2021-03-01",
+        "amount": {"value": "-{0}.{1:02d}".format(i % 1000, i % 100), "unit": "EUR"},
+        "remitter": {"holderName": "Remitter {0}".format(i % 50)},
+        "deptor": None,
+        "creditor": {
+            "holderName": "Creditor",
+            "iban": "DE00000000000000000000",
+            "bic": "BIC",
+        },
+        "valutaDate": "2021-03-01",
+        "directDebitCreditorId": None,
+        "directDebitMandateId": None,
+        "endToEndReference": None,
+        "newTransaction": False,
+        "remittanceInfo": "01Remittance info {0}".format(i),
+        "transactionType": {"key": "DIRECT_DEBIT", "text": "Lastschrift"},
+    }
+
+
+def measure(build, payload):
+    tracemalloc.start()
+    result = build(json.loads(payload))
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main(count=100000):
+    payload = json.dumps(
+        {
+            "paging": {"index": 0, "matches": count},
+            "values": [transaction(i) for i in range(count)],
+        }
+    )
+
+    _, dict_size = measure(lambda response: response, payload)
+    _, model_size = measure(
+        lambda response: models.page(models.AccountTransaction, response), payload
+    )
+
+    print("{0} transactions".format(count))
+    print("dict:  {0:8.1f} MiB".format(dict_size / 2**20))
+    print(
+        "model: {0:8.1f} MiB ({1:.0%} of dict)".format(
+            model_size / 2**20, model_size / dict_size
+        )
+    )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,459 @@
+"""Local stand-in for the comdirect REST API, used by the benchmarks.
+
+Implements the OAuth, session TAN, banking, brokerage, messages and reports endpoints called by ComdirectClient with
+generated data. Latency, data and page sizes and an error rate are configurable.
+
+Usage: python -m benchmarks.mock_server [port]
+
+Example:
+    with MockComdirectServer(latency=0.005) as server:
+        client = ComdirectClient("id", "secret", api_url=server.api_url, oauth_url=server.oauth_url)
+"""
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qsl, urlsplit
+import datetime
+import json
+import random
+import re
+import socketserver
+import sys
+import threading
+import time
+
+SESSION_IDENTIFIER = "mock-session"
+
+
+class MockComdirectServer:
+    """Serves generated comdirect API responses on a local port in a background thread.
+
+    Args:
+        host (str, optional): Interface to listen on. Defaults to "127.0.0.1".
+        port (int, optional): Port, 0 picks a free one. Defaults to 0.
+        latency (float, optional): Delay of every response in seconds. Defaults to 0.
+        error_rate (float, optional): Share of API GET requests answered with 503 and Retry-After 0. Defaults to 0.
+        accounts (int, optional): Number of accounts. Defaults to 2.
+        transactions (int, optional): Booked transactions per account. Defaults to 1000.
+        depots (int, optional): Number of depots. Defaults to 4.
+        positions (int, optional): Positions per depot. Defaults to 20.
+        documents (int, optional): Number of documents. Defaults to 50.
+        document_size (int, optional): Size of each document in bytes. Defaults to 64 KiB.
+        max_page_size (int, optional): Upper bound of paging-count. Defaults to 500.
+        seed (int, optional): Seed of the error injection. Defaults to 0.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        accounts: int = 2,
+        transactions: int = 1000,
+        depots: int = 4,
+        positions: int = 20,
+        documents: int = 50,
+        document_size: int = 64 * 1024,
+        max_page_size: int = 500,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.max_page_size = max_page_size
+        self.accounts = ["account-{0}".format(i) for i in range(accounts)]
+        self.transactions = [_transaction(i) for i in range(transactions)]
+        self.depots = ["depot-{0}".format(i) for i in range(depots)]
+        self.positions = [_position(i) for i in range(positions)]
+        self.documents = [_document(i) for i in range(documents)]
+        self.document = b"%PDF" + b"0" * max(document_size - 4, 0)
+        self.request_count = 0
+        self.error_count = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = 0
+
+        self.server = ThreadingHTTPServer((host, port), _handler(self))
+        self._thread = None
+
+    @property
+    def oauth_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return "http://{0}:{1}".format(host, port)
+
+    @property
+    def api_url(self) -> str:
+        return self.oauth_url + "/api"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def handle(self, method, path, params, headers):
+        """Returns (status, body, headers) for a request, body is bytes or a JSON serializable object."""
+        with self._lock:
+            self.request_count += 1
+            fail = (
+                method == "GET"
+                and path.startswith("/api/")
+                and self._random.random() < self.error_rate
+            )
+            self.error_count += fail
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            return 503, {}, _response_info("Service unavailable", {"Retry-After": "0"})
+        for route_method, pattern, route in _ROUTES:
+            match = pattern.fullmatch(path)
+            if route_method == method and match is not None:
+                return route(self, params, headers, *match.groups())
+        return 404, {}, _response_info("Not found")
+
+    def _token(self, params, headers):
+        with self._lock:
+            self._tokens += 1
+            number = self._tokens
+        return (
+            200,
+            {
+                "access_token": "access-{0}".format(number),
+                "refresh_token": "refresh-{0}".format(number),
+                "expires_in": 599,
+            },
+            {},
+        )
+
+    def _revoke(self, params, headers):
+        return 204, b"", {}
+
+    def _session_status(self, params, headers):
+        return 200, [{"identifier": SESSION_IDENTIFIER, "sessionTanActive": False}], {}
+
+    def _validate_session(self, params, headers, identifier):
+        info = {"id": "challenge-1", "typ": "P_TAN_PUSH"}
+        return 201, {}, {"x-once-authentication-info": json.dumps(info)}
+
+    def _activate_session(self, params, headers, identifier):
+        return 200, {"identifier": identifier, "sessionTanActive": True}, {}
+
+    def _balances(self, params, headers):
+        values = [_balance(account_uuid) for account_uuid in self.accounts]
+        return 200, _page(values, 0, len(values)), {}
+
+    def _balance(self, params, headers, account_uuid):
+        return 200, _balance(account_uuid), {}
+
+    def _account_transactions(self, params, headers, account_uuid):
+        if params.get("transactionState") == "NOTBOOKED":
+            return 200, _page([], 0, 0), {}
+        values = [
+            transaction
+            for transaction in self.transactions
+            if params.get("min-bookingDate", "") <= transaction["bookingDate"]
+            and transaction["bookingDate"] <= params.get("max-bookingDate", "9999")
+        ]
+        return 200, self._paged(values, params), {}
+
+    def _depots(self, params, headers):
+        values = [{"depotId": depot_id} for depot_id in self.depots]
+        return 200, _page(values, 0, len(values)), {}
+
+    def _positions(self, params, headers, depot_id):
+        values = [dict(position, depotId=depot_id) for position in self.positions]
+        return 200, _page(values, 0, len(values)), {}
+
+    def _position(self, params, headers, depot_id, position_id):
+        for position in self.positions:
+            if position["positionId"] == position_id:
+                return 200, dict(position, depotId=depot_id), {}
+        return 404, {}, _response_info("Position not found")
+
+    def _depot_transactions(self, params, headers, depot_id):
+        values = [
+            _depot_transaction(i, position) for i, position in enumerate(self.positions)
+        ]
+        return 200, _page(values, 0, len(values)), {}
+
+    def _instrument(self, params, headers, instrument_id):
+        return 200, _page([_instrument(instrument_id)], 0, 1), {}
+
+    def _dimensions(self, params, headers):
+        return 200, _page([], 0, 0), {}
+
+    def _orders(self, params, headers, depot_id):
+        return 200, _page([], 0, 0), {}
+
+    def _documents(self, params, headers):
+        return 200, self._paged(self.documents, params), {}
+
+    def _document_content(self, params, headers, document_id):
+        return 200, self.document, {"Content-Type": "application/pdf"}
+
+    def _report(self, params, headers):
+        values = [_balance(account_uuid) for account_uuid in self.accounts]
+        return 200, _page(values, 0, len(values)), {}
+
+    def _paged(self, values, params):
+        first = int(params.get("paging-first", 0))
+        count = min(int(params.get("paging-count", 20)), self.max_page_size)
+        return _page(values[first : first + count], first, len(values))
+
+
+_ROUTES = [
+    (method, re.compile(pattern), route)
+    for method, pattern, route in [
+        ("POST", r"/oauth/token", MockComdirectServer._token),
+        ("DELETE", r"/oauth/revoke", MockComdirectServer._revoke),
+        (
+            "GET",
+            r"/api/session/clients/user/v1/sessions",
+            MockComdirectServer._session_status,
+        ),
+        (
+            "POST",
+            r"/api/session/clients/user/v1/sessions/([^/]+)/validate",
+            MockComdirectServer._validate_session,
+        ),
+        (
+            "PATCH",
+            r"/api/session/clients/user/v1/sessions/([^/]+)",
+            MockComdirectServer._activate_session,
+        ),
+        (
+            "GET",
+            r"/api/banking/clients/user/v2/accounts/balances",
+            MockComdirectServer._balances,
+        ),
+        (
+            "GET",
+            r"/api/banking/v2/accounts/([^/]+)/balances",
+            MockComdirectServer._balance,
+        ),
+        (
+            "GET",
+            r"/api/banking/v1/accounts/([^/]+)/transactions",
+            MockComdirectServer._account_transactions,
+        ),
+        ("GET", r"/api/brokerage/clients/user/v3/depots", MockComdirectServer._depots),
+        (
+            "GET",
+            r"/api/brokerage/v3/depots/([^/]+)/positions",
+            MockComdirectServer._positions,
+        ),
+        (
+            "GET",
+            r"/api/brokerage/v3/depots/([^/]+)/positions/([^/]+)",
+            MockComdirectServer._position,
+        ),
+        (
+            "GET",
+            r"/api/brokerage/v3/depots/([^/]+)/transactions",
+            MockComdirectServer._depot_transactions,
+        ),
+        (
+            "GET",
+            r"/api/brokerage/v1/instruments/([^/]+)",
+            MockComdirectServer._instrument,
+        ),
+        (
+            "GET",
+            r"/api/brokerage/v3/orders/dimensions",
+            MockComdirectServer._dimensions,
+        ),
+        (
+            "GET",
+            r"/api/brokerage/depots/([^/]+)/v3/orders",
+            MockComdirectServer._orders,
+        ),
+        (
+            "GET",
+            r"/api/messages/clients/user/v2/documents",
+            MockComdirectServer._documents,
+        ),
+        (
+            "GET",
+            r"/api/messages/v2/documents/([^/]+)",
+            MockComdirectServer._document_content,
+        ),
+        (
+            "GET",
+            r"/api/reports/participants/user/v1/allbalances",
+            MockComdirectServer._report,
+        ),
+    ]
+]
+
+
+# http.server.ThreadingHTTPServer requires Python 3.7
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def _handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            self.__respond()
+
+        def do_HEAD(self):
+            self.__respond()
+
+        def do_POST(self):
+            self.__respond()
+
+        def do_PATCH(self):
+            self.__respond()
+
+        def do_DELETE(self):
+            self.__respond()
+
+        def log_message(self, format, *args):
+            pass
+
+        def __respond(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            split = urlsplit(self.path)
+            # HEAD is answered like GET, without the body
+            method = "GET" if self.command == "HEAD" else self.command
+            status, body, headers = server.handle(
+                method, split.path, dict(parse_qsl(split.query)), self.headers
+            )
+            if not isinstance(body, bytes):
+                body = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+    return Handler
+
+
+def _response_info(message, headers=None):
+    info = {"messages": [{"severity": "ERROR", "key": "mock", "message": message}]}
+    return dict(headers or {}, **{"x-http-response-info": json.dumps(info)})
+
+
+def _page(values, index, matches):
+    return {"paging": {"index": index, "matches": matches}, "values": values}
+
+
+def _booking_date(i):
+    return (datetime.date(2021, 3, 1) - datetime.timedelta(days=i // 5)).isoformat()
+
+
+def _amount(value, unit="EUR"):
+    return {"value": value, "unit": unit}
+
+
+def _transaction(i):
+    return {
+        "reference": "{0:016d}".format(i),
+        "bookingStatus": "BOOKED",
+        "bookingDate": _booking_date(i),
+        "amount": _amount("-{0}.{1:02d}".format(i % 1000, i % 100)),
+        "remitter": {"holderName": "Remitter {0}".format(i % 50)},
+        "deptor": None,
+        "creditor": {"holderName": "Creditor", "iban": "DE00000000000000000000"},
+        "valutaDate": _booking_date(i),
+        "remittanceInfo": "01Remittance info {0}".format(i),
+        "transactionType": {"key": "DIRECT_DEBIT", "text": "Lastschrift"},
+    }
+
+
+def _balance(account_uuid):
+    return {
+        "accountId": account_uuid,
+        "account": {"accountId": account_uuid, "currency": "EUR"},
+        "balance": _amount("1000.00"),
+        "balanceEUR": _amount("1000.00"),
+        "availableCashAmount": _amount("1000.00"),
+        "availableCashAmountEUR": _amount("1000.00"),
+    }
+
+
+def _position(i):
+    return {
+        "positionId": "position-{0}".format(i),
+        "wkn": "W{0:05d}".format(i),
+        "instrumentId": "instrument-{0}".format(i),
+        "quantity": _amount(str(10 + i), "XXX"),
+        "currentPrice": {
+            "price": _amount("{0}.50".format(100 + i)),
+            "priceDateTime": "2021-03-01T17:30:00+01:00",
+        },
+        "purchaseValue": _amount("{0}.00".format(1000 + i)),
+        "currentValue": _amount("{0}.00".format(1100 + i)),
+        "profitLossPurchaseAbs": _amount("100.00"),
+        "profitLossPrevDayAbs": _amount("-1.00"),
+    }
+
+
+def _depot_transaction(i, position):
+    return {
+        "transactionId": "transaction-{0}".format(i),
+        "bookingStatus": "BOOKED",
+        "bookingDate": _booking_date(i),
+        "businessDate": _booking_date(i),
+        "instrumentId": position["instrumentId"],
+        "quantity": position["quantity"],
+        "executionPrice": position["currentPrice"]["price"],
+        "transactionValue": position["purchaseValue"],
+        "transactionDirection": "IN",
+        "transactionType": "BUY",
+    }
+
+
+def _instrument(instrument_id):
+    number = instrument_id.rsplit("-", 1)[-1]
+    return {
+        "instrumentId": instrument_id,
+        "wkn": "W{0:0>5}".format(number),
+        "isin": "DE{0:0>10}".format(number),
+        "mnemonic": "M{0}".format(number),
+        "name": "Instrument {0}".format(number),
+        "shortName": "Instrument {0}".format(number),
+    }
+
+
+def _document(i):
+    return {
+        "documentId": "document-{0}".format(i),
+        "name": "Document {0}".format(i),
+        "dateCreation": _booking_date(i),
+        "mimeType": "application/pdf",
+        "deletable": False,
+        "advertisement": False,
+        "documentMetaData": {"archived": False, "alreadyRead": False},
+    }
+
+
+def main(port=8080):
+    with MockComdirectServer(port=port) as server:
+        print("Serving the mock comdirect API on {0}".format(server.api_url))
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
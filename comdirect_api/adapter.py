@@ -0,0 +1,279 @@
+from urllib.parse import urlsplit
+import datetime
+import functools
+import os
+import socket
+import ssl
+import time
+
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import DEFAULT_CA_BUNDLE_PATH, select_proxy
+from urllib3.connection import HTTPConnection
+
+from comdirect_api.metrics import RequestEvent
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+
+class ComdirectAdapter(HTTPAdapter):
+    """Transport adapter mounted by ComdirectClient for all https requests of its session.
+
+    Runs every request through the optional client side features of the client before it is transmitted. Pooled
+    connections are kept alive between requests, with TCP keep-alive probes detecting connections dropped by the
+    server. With http2 the requests are sent by an httpx client instead, which multiplexes concurrent requests over
+    a single connection. Its responses are read completely, also for streamed requests. The verify, cert and
+    proxies settings of the session apply to it as well, the client is recreated when they change.
+
+    Args:
+        pool_connections (int, optional): Number of connection pools (one per host). Defaults to 10.
+        pool_maxsize (int, optional): Maximum number of connections per host. Defaults to 10.
+        timeout (Union[float, Tuple[float, float]], optional): Connect and read timeout in seconds, used if a
+            request sets none. Defaults to (10, 60).
+        keep_alive (bool, optional): Reuse connections and enable TCP keep-alive. Defaults to True.
+        http2 (bool, optional): Use HTTP/2, requires ``pip install httpx[http2]``. Defaults to False.
+
+    Attributes:
+        scheduler (RequestScheduler): Rate limiter and priority scheduler, None if disabled.
+        retry (RetryPolicy): Retry policy for transient errors and expired tokens, None if disabled.
+        auth_service (AuthService): Used to refresh the token on 401 responses.
+        metrics (RequestMetrics): Records every transmitted request, None if disabled.
+        cache (ResponseCache): Cache for GET responses, None if disabled.
+        coalescer (RequestCoalescer): Combines concurrent identical GET requests, None if disabled.
+    """
+
+    __attrs__ = HTTPAdapter.__attrs__ + ["timeout", "keep_alive", "http2"]
+
+    scheduler = None
+    retry = None
+    auth_service = None
+    metrics = None
+    cache = None
+    coalescer = None
+    timeout = None
+    keep_alive = True
+    http2 = False
+    _http2_client = None
+    _http2_settings = None
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        timeout=(10.0, 60.0),
+        keep_alive: bool = True,
+        http2: bool = False,
+    ):
+        if http2 and httpx is None:
+            raise ImportError(
+                "HTTP/2 requires httpx, install it with 'pip install httpx[http2]'"
+            )
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.http2 = http2
+        super().__init__(pool_connections, pool_maxsize)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        if self.keep_alive:
+            pool_kwargs.setdefault(
+                "socket_options",
+                HTTPConnection.default_socket_options
+                + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)],
+            )
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+
+    def close(self):
+        super().close()
+        if self._http2_client is not None:
+            self._http2_client.close()
+            self._http2_client = None
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        if not self.keep_alive:
+            request.headers["Connection"] = "close"
+
+        if request.method != "GET" or kwargs.get("stream"):
+            if self.cache is not None and request.method not in ("GET", "HEAD"):
+                # writes like order changes may change any cached response
+                self.cache.invalidate_after(request)
+            return self.__send_retrying(request, **kwargs)
+
+        send = functools.partial(self.__send_retrying, **kwargs)
+        if self.coalescer is not None:
+            send = functools.partial(self.coalescer.send, send=send)
+        if self.cache is not None:
+            return self.cache.send(request, send)
+        return send(request)
+
+    def __send_retrying(self, request, **kwargs):
+        retry = self.retry
+        if retry is None or not retry.is_retryable(request.method):
+            return self.__send_scheduled(request, **kwargs)
+
+        attempt = 0
+        refreshed = False
+        while True:
+            try:
+                response = self.__send_scheduled(request, **kwargs)
+            except (ConnectionError, Timeout):
+                delay = retry.backoff(attempt)
+                if delay is None:
+                    raise
+            else:
+                if (
+                    response.status_code == 401
+                    and not refreshed
+                    and self.__refresh_token(request)
+                ):
+                    response.close()
+                    request = self.__sign(request)
+                    refreshed = True
+                    retry.token_refreshed()
+                    continue
+                if response.status_code not in retry.retry_statuses:
+                    return response
+                delay = retry.backoff(attempt, response)
+                if delay is None:
+                    return response
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def transmit(self, request, **kwargs):
+        """Sends the request over the network."""
+        if self.http2:
+            return self.__send_http2(request, **kwargs)
+        return super().send(request, **kwargs)
+
+    def __send_http2(
+        self, request, timeout=None, verify=True, cert=None, proxies=None, **kwargs
+    ):
+        # the proxies of the session are already merged with the environment by requests
+        settings = (verify, cert, select_proxy(request.url, proxies or {}))
+        if self._http2_client is None or settings != self._http2_settings:
+            if self._http2_client is not None:
+                self._http2_client.close()
+            self._http2_client = httpx.Client(
+                http2=True,
+                verify=_ssl_context(verify, cert),
+                proxy=settings[2],
+                trust_env=False,
+                limits=httpx.Limits(
+                    max_connections=self._pool_maxsize,
+                    max_keepalive_connections=(
+                        self._pool_maxsize if self.keep_alive else 0
+                    ),
+                ),
+            )
+            self._http2_settings = settings
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        started = time.perf_counter()
+        try:
+            response = self._http2_client.request(
+                request.method,
+                request.url,
+                headers=request.headers,
+                content=request.body,
+                timeout=timeout,
+            )
+        except httpx.TimeoutException as e:
+            raise Timeout(e, request=request)
+        except httpx.TransportError as e:
+            raise ConnectionError(e, request=request)
+
+        result = Response()
+        result.status_code = response.status_code
+        result.headers = CaseInsensitiveDict(response.headers)
+        result._content = response.content
+        result._content_consumed = True
+        result.encoding = response.encoding
+        result.reason = response.reason_phrase
+        result.url = request.url
+        result.request = request
+        result.elapsed = datetime.timedelta(seconds=time.perf_counter() - started)
+        result.connection = self
+        return result
+
+    def __send_scheduled(self, request, **kwargs):
+        wait = 0.0
+        if self.scheduler is not None:
+            path = urlsplit(request.url).path
+            wait = self.scheduler.acquire(self.scheduler.classify(request.method, path))
+        if self.metrics is None:
+            return self.transmit(request, **kwargs)
+        return self.__send_measured(request, wait, **kwargs)
+
+    def __send_measured(self, request, wait, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.transmit(request, **kwargs)
+            size = response.headers.get("Content-Length")
+            if kwargs.get("stream"):
+                size = int(size) if size is not None else None
+            else:
+                # read here so the duration includes the body, the session would read it anyway
+                size = len(response.content)
+        except (ConnectionError, Timeout) as e:
+            self.metrics.record(
+                RequestEvent(
+                    request, None, time.perf_counter() - started, wait, error=e
+                )
+            )
+            raise
+        self.metrics.record(
+            RequestEvent(
+                request,
+                response.status_code,
+                time.perf_counter() - started,
+                wait,
+                size,
+            )
+        )
+        return response
+
+    def __refresh_token(self, request):
+        auth_service = self.auth_service
+        if (
+            not self.retry.refresh_on_unauthorized
+            or auth_service is None
+            or auth_service.auth is None
+        ):
+            return False
+        # another thread may have refreshed the token since this request was signed
+        if request.headers.get("Authorization") == "Bearer {0}".format(
+            auth_service.auth.access_token
+        ):
+            auth_service.refresh_token()
+        return True
+
+    def __sign(self, request):
+        request = request.copy()
+        return self.auth_service.auth(request)
+
+
+def _ssl_context(verify, cert):
+    """Returns an SSLContext for httpx with the verify and cert settings of requests."""
+    if verify is False:
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    elif isinstance(verify, str) and os.path.isdir(verify):
+        context = ssl.create_default_context(capath=verify)
+    else:
+        context = ssl.create_default_context(
+            cafile=verify if isinstance(verify, str) else DEFAULT_CA_BUNDLE_PATH
+        )
+    if cert:
+        if isinstance(cert, str):
+            context.load_cert_chain(cert)
+        else:
+            context.load_cert_chain(*cert)
+    return context
@@ -0,0 +1,126 @@
+from typing import Any, Tuple, Union
+
+from comdirect_api.auth.auth_service import AsyncAuthService
+from comdirect_api.decoding import Decoder, get_decoder
+from comdirect_api.service.account_service import AsyncAccountService
+from comdirect_api.service.depot_service import AsyncDepotService
+from comdirect_api.service.document_service import AsyncDocumentService
+from comdirect_api.service.report_service import AsyncReportService
+from comdirect_api.service.order_service import AsyncOrderService
+from comdirect_api.service.instrument_service import AsyncInstrumentService
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+
+class _AsyncAuth(httpx.Auth if httpx is not None else object):
+    """Signs the requests of an AsyncComdirectClient, after refreshing an access token that is about to expire."""
+
+    def __init__(self, auth_service):
+        self.auth_service = auth_service
+
+    async def async_auth_flow(self, request):
+        if self.auth_service.auth is not None:
+            if not request.url.path.endswith(("/oauth/token", "/oauth/revoke")):
+                await self.auth_service.ensure_token()
+            request.headers.update(self.auth_service.auth.request_headers())
+        yield request
+
+
+class AsyncComdirectClient(
+    AsyncAccountService,
+    AsyncDepotService,
+    AsyncDocumentService,
+    AsyncInstrumentService,
+    AsyncOrderService,
+    AsyncReportService,
+):
+    """asyncio variant of ComdirectClient.
+
+    Offers the same methods as ComdirectClient as coroutines, so many requests can be awaited concurrently on one
+    event loop, e.g. with ``asyncio.gather``. Requires the optional ``httpx`` dependency
+    (``pip install comdirect-api-simple[async]``), HTTP/2 additionally ``pip install httpx[http2]``.
+
+    Example:
+        async with AsyncComdirectClient(client_id, client_secret) as client:
+            await client.fetch_tan(user, password)
+            await client.activate_session()
+            balances, depots = await asyncio.gather(client.get_all_balances(), client.get_all_depots())
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        max_connections: int = 100,
+        decoder: Union[str, Decoder] = "auto",
+        max_keepalive_connections: int = 20,
+        timeout: Union[float, Tuple[float, float]] = (10.0, 60.0),
+        http2: bool = False,
+        api_url: str = "https://api.comdirect.de/api",
+        oauth_url: str = "https://api.comdirect.de",
+    ):
+        if httpx is None:
+            raise ImportError(
+                "AsyncComdirectClient requires httpx, install it with 'pip install comdirect-api-simple[async]'"
+            )
+        self.api_url = api_url
+        self.oauth_url = oauth_url
+        self.decoder = get_decoder(decoder)
+
+        self.session = httpx.AsyncClient(
+            headers={
+                "Accept": "application/json",
+                "Content-Type": "application/json",
+            },
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=(
+                httpx.Timeout(timeout[1], connect=timeout[0])
+                if isinstance(timeout, tuple)
+                else timeout
+            ),
+            http2=http2,
+        )
+        self.auth_service = AsyncAuthService(
+            client_id, client_secret, self.session, self.api_url, self.oauth_url
+        )
+        self.session.auth = _AsyncAuth(self.auth_service)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Closes all pooled connections of the underlying session."""
+        await self.session.aclose()
+
+    async def fetch_tan(self, zugangsnummer, pin, tan_type=None):
+        return await self.auth_service.fetch_tan(zugangsnummer, pin, tan_type)
+
+    async def activate_session(self, tan=None):
+        await self.auth_service.activate_session(tan)
+
+    async def refresh_token(self):
+        """Refreshes the access token, concurrent calls share one refresh.
+
+        This is also awaited before a request if the access token is about to expire.
+        """
+        await self.auth_service.refresh_token()
+
+    async def revoke_token(self):
+        await self.auth_service.revoke()
+
+    async def get(
+        self, endpoint: str, base_url: str = None, raw: bool = False, **kwargs
+    ) -> Any:
+        """Awaitable version of ComdirectClient.get."""
+        url = "{0}/{1}".format(base_url or self.api_url, endpoint)
+        response = await self.session.get(url, params=kwargs)
+        return response.content if raw else self.decoder(response.content)
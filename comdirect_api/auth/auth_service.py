@@ -1,8 +1,96 @@
+import asyncio
 import json
+import threading
+import time
 
 from comdirect_api.auth.comdirect_auth import ComdirectAuth
 
 
+def _token_request(oauth_url, client_id, client_secret, grant_type, **kwargs):
+    url = '{0}/oauth/token'.format(oauth_url)
+    payload = {
+        "client_id": client_id,
+        "client_secret": client_secret,
+        "grant_type": grant_type,
+    }
+    payload.update(kwargs)
+    headers = {
+        'Content-Type': 'application/x-www-form-urlencoded'
+    }
+    return url, headers, payload
+
+
+def _revoke_request(oauth_url):
+    url = "{0}/oauth/revoke".format(oauth_url)
+    headers = {
+        'Content-Type': 'application/x-www-form-urlencoded',
+    }
+    return url, headers
+
+
+def _session_status_request(api_url):
+    return '{0}/session/clients/user/v1/sessions'.format(api_url)
+
+
+def _session_tan_request(api_url, session_identifier, tan_type=None):
+    headers = None
+    if tan_type is not None:
+        headers = {'x-once-authentication-info': json.dumps({"typ": tan_type})}
+
+    url = "{0}/session/clients/user/v1/sessions/{1}/validate".format(api_url, session_identifier)
+    payload = '{\"identifier\" : \"' + session_identifier + '\",\"sessionTanActive\": true,\"activated2FA\": true}'
+    return url, headers, payload
+
+
+def _activate_session_tan_request(api_url, session_identifier, challenge_id, tan=None):
+    url = "{0}/session/clients/user/v1/sessions/{1}".format(api_url, session_identifier)
+    payload = '{\"identifier\" : \"' + session_identifier + '\",\"sessionTanActive\": true,\"activated2FA\": true}'
+    headers = {
+        'x-once-authentication-info': json.dumps({
+            "id": challenge_id
+        })
+    }
+    if tan is not None:
+        headers['x-once-authentication'] = str(tan)
+    return url, headers, payload
+
+
+def _parse_token_response(response):
+    if response.status_code == 200:
+        response_json = response.json()
+        return response_json['access_token'], response_json['refresh_token'], response_json.get('expires_in')
+    else:
+        raise AuthenticationException(response.headers['x-http-response-info'])
+
+
+def _parse_session_status(response):
+    if response.status_code == 200:
+        response_json = response.json()[0]
+        return response_json['identifier']
+    else:
+        raise AuthenticationException(response.headers['x-http-response-info'])
+
+
+def _parse_session_tan(response):
+    if response.status_code == 201:
+        response_json = json.loads(response.headers['x-once-authentication-info'])
+        typ = response_json['typ']
+        print("TAN-TYP: {}".format(typ))
+        if typ == 'P_TAN' or typ == 'M_TAN':
+            return response_json['id'], response_json['challenge']
+        else:
+            return response_json['id'], None
+    else:
+        raise AuthenticationException(response.headers['x-http-response-info'])
+
+
+def _check_status(response, status_code, message):
+    if response.status_code == status_code:
+        print(message)
+    else:
+        raise AuthenticationException(response.headers['x-http-response-info'])
+
+
 class AuthService:
 
     def __init__(self, client_id, client_secret, session, api_url, oauth_url):
@@ -14,10 +102,28 @@ class AuthService:
         self.auth = None
         self.session_identifier = None
         self.challenge_id = None
+        self.auto_refresh = True
+        self.token_store = None
+        self._refresh_timer = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_refresh_timer'] = None
+        return state
+
+    def __setstate__(self, state):
+        state.setdefault('auto_refresh', True)
+        state.setdefault('token_store', None)
+        state.setdefault('_refresh_timer', None)
+        self.__dict__.update(state)
 
     def fetch_tan(self, zugangsnummer, pin, tan_type=None):
-        access_token, refresh_token = self.__oauth_resource_owner_password_credentials_flow(zugangsnummer, pin)
-        self.auth = ComdirectAuth(access_token, refresh_token)
+        access_token, refresh_token, expires_in = self.__oauth_resource_owner_password_credentials_flow(
+            zugangsnummer, pin
+        )
+        self.auth = ComdirectAuth(access_token, refresh_token, expires_in)
+        if self.auto_refresh:
+            self.auth.refresher = self.refresh_token
         self.session.auth = self.auth
 
         self.session_identifier = self.__get_session_status()
@@ -26,124 +132,237 @@ class AuthService:
 
     def activate_session(self, tan=None):
         self.__activate_session_tan(self.session_identifier, self.challenge_id, tan)
-        access_token, refresh_token = self.__oauth_cd_secondary_flow()
-        self.auth.session_tan_created(access_token, refresh_token)
+        access_token, refresh_token, expires_in = self.__oauth_cd_secondary_flow()
+        self.auth.session_tan_created(access_token, refresh_token, expires_in)
 
-    def refresh_token(self):
-        url = '{0}/oauth/token'.format(self.oauth_url)
-        payload = {
-            "client_id": self.client_id,
-            "client_secret": self.client_secret,
-            "grant_type": 'refresh_token',
-            "refresh_token": self.auth.refresh_token,
-        }
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded'
+    def export_state(self):
+        """Returns the tokens, their expiry and the session identifiers as JSON serializable dict.
+
+        The client credentials are not included.
+
+        Raises:
+            AuthenticationException: If there is no session to export
+        """
+        if self.auth is None:
+            raise AuthenticationException('No session to export, call fetch_tan and activate_session first')
+        return {
+            'version': 1,
+            'access_token': self.auth.access_token,
+            'refresh_token': self.auth.refresh_token,
+            'expires_at': self.auth.expires_at,
+            'session_id': self.auth.session_id,
+            'session_identifier': self.session_identifier,
         }
-        response = self.session.post(url, headers=headers, data=payload)
-        if response.status_code == 200:
-            response_json = response.json()
-            self.auth.access_token = response_json['access_token']
-            self.auth.refresh_token = response_json['refresh_token']
+
+    def import_state(self, state):
+        """Restores a session from export_state, refreshing the access token if it is expired or about to expire.
+
+        Raises:
+            AuthenticationException: If state is empty, or the token could not be refreshed, a new session TAN is
+                needed then
+        """
+        if not state:
+            raise AuthenticationException('No session to import')
+        self.auth = ComdirectAuth(state['access_token'], state['refresh_token'])
+        self.auth.expires_at = state.get('expires_at')
+        self.auth.session_id = state['session_id']
+        self.session_identifier = state.get('session_identifier')
+        if self.auto_refresh:
+            self.auth.refresher = self.refresh_token
+        self.session.auth = self.auth
+        if self.auth.expires_at is None or self.auth.expires_soon():
+            self.refresh_token()
+
+    def set_token_store(self, token_store):
+        """Shares the tokens with all clients using the same token store, e.g. a FileTokenStore.
+
+        With an active session the tokens are written to the store, otherwise the session is taken from the store.
+        Afterwards refreshes are coordinated through the store: only one client refreshes, the others load the new
+        tokens from the store.
+
+        Raises:
+            AuthenticationException: If there is neither an active session nor one in the store
+        """
+        self.token_store = token_store
+        if self.auth is not None:
+            with token_store.lock():
+                token_store.save(self.export_state())
+            return
+        state = token_store.load()
+        if state is None:
+            raise AuthenticationException('No active session and none in the token store')
+        self.import_state(state)
+
+    def refresh_token(self):
+        """Refreshes the access token.
+
+        Calls from several threads at the same time result in a single refresh. This is also called automatically
+        before a request if the access token is about to expire, unless auto_refresh was disabled before fetch_tan.
+        With a token store the tokens are taken from the store if another process already refreshed them.
+        """
+        if self.token_store is None:
+            self.auth.refresh(self.__oauth_refresh_token_flow)
         else:
-            raise AuthenticationException(response.headers['x-http-response-info'])
+            self.auth.refresh(self.__shared_refresh)
+
+    def start_refresh_timer(self):
+        """Refreshes the access token in a background thread shortly before it expires, until stopped."""
+        self.stop_refresh_timer()
+        if self.auth is None or self.auth.expires_at is None:
+            return
+        delay = max(self.auth.expires_at - self.auth.refresh_margin - time.time(), 0)
+        self._refresh_timer = threading.Timer(delay, self.__refresh_timer_elapsed)
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def stop_refresh_timer(self):
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+
+    def __refresh_timer_elapsed(self):
+        if self.auth.expires_soon():
+            self.refresh_token()
+        self.start_refresh_timer()
+
+    def __shared_refresh(self):
+        with self.token_store.lock():
+            state = self.token_store.load()
+            if (
+                state is not None
+                and state['access_token'] != self.auth.access_token
+                and state.get('expires_at') is not None
+                and time.time() + self.auth.refresh_margin < state['expires_at']
+            ):
+                self.auth.update_tokens(state['access_token'], state['refresh_token'])
+                self.auth.expires_at = state['expires_at']
+                return
+            self.__oauth_refresh_token_flow()
+            self.token_store.save(self.export_state())
+
+    def __oauth_refresh_token_flow(self):
+        url, headers, payload = _token_request(
+            self.oauth_url, self.client_id, self.client_secret, 'refresh_token',
+            refresh_token=self.auth.refresh_token,
+        )
+        response = self.session.post(url, headers=headers, data=payload)
+        self.auth.update_tokens(*_parse_token_response(response))
 
     def revoke(self):
-        url = "{0}/oauth/revoke".format(self.oauth_url)
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded',
-        }
+        url, headers = _revoke_request(self.oauth_url)
         response = self.session.delete(url, headers=headers)
-        if response.status_code == 204:
-            print('Token revoked')
-        else:
-            raise AuthenticationException(response.headers['x-http-response-info'])
+        _check_status(response, 204, 'Token revoked')
 
     def __oauth_resource_owner_password_credentials_flow(self, zugangsnummer, pin):
-        url = '{0}/oauth/token'.format(self.oauth_url)
-        payload = {
-            "client_id": self.client_id,
-            "client_secret": self.client_secret,
-            "grant_type": 'password',
-            "username": str(zugangsnummer),
-            "password": str(pin),
-        }
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded'
-        }
+        url, headers, payload = _token_request(
+            self.oauth_url, self.client_id, self.client_secret, 'password',
+            username=str(zugangsnummer), password=str(pin),
+        )
         response = self.session.post(url, headers=headers, data=payload)
-        if response.status_code == 200:
-            response_json = response.json()
-            return response_json['access_token'], response_json['refresh_token']
-        else:
-            raise AuthenticationException(response.headers['x-http-response-info'])
+        return _parse_token_response(response)
 
     def __get_session_status(self):
-        url = '{0}/session/clients/user/v1/sessions'.format(self.api_url)
+        url = _session_status_request(self.api_url)
 
         response = self.session.get(url)
-        if response.status_code == 200:
-            response_json = response.json()[0]
-            return response_json['identifier']
-        else:
-            raise AuthenticationException(response.headers['x-http-response-info'])
+        return _parse_session_status(response)
 
     def __post_session_tan(self, session_identifier, tan_type=None):
-
-        headers = None
-        if tan_type is not None:
-            headers = {'x-once-authentication-info': json.dumps({"typ": tan_type})}
-
-        url = "{0}/session/clients/user/v1/sessions/{1}/validate".format(self.api_url, session_identifier)
-        payload = '{\"identifier\" : \"' + session_identifier + '\",\"sessionTanActive\": true,\"activated2FA\": true}'
+        url, headers, payload = _session_tan_request(self.api_url, session_identifier, tan_type)
         response = self.session.post(url, data=payload, headers=headers)
-        if response.status_code == 201:
-            response_json = json.loads(response.headers['x-once-authentication-info'])
-            typ = response_json['typ']
-            print("TAN-TYP: {}".format(typ))
-            if typ == 'P_TAN' or typ == 'M_TAN':
-                return response_json['id'], response_json['challenge']
-            else:
-                return response_json['id'], None
-        else:
-            raise AuthenticationException(response.headers['x-http-response-info'])
+        return _parse_session_tan(response)
 
     def __activate_session_tan(self, session_identifier, challenge_id, tan=None):
-        url = "{0}/session/clients/user/v1/sessions/{1}".format(self.api_url, session_identifier)
-        payload = '{\"identifier\" : \"' + session_identifier + '\",\"sessionTanActive\": true,\"activated2FA\": true}'
-        headers = {
-            'x-once-authentication-info': json.dumps({
-                "id": challenge_id
-            })
-        }
-        if tan is not None:
-            headers['x-once-authentication'] = str(tan)
-
+        url, headers, payload = _activate_session_tan_request(self.api_url, session_identifier, challenge_id, tan)
         response = self.session.patch(url, headers=headers, data=payload)
-        if response.status_code == 200:
-            print('Session TAN activated')
-        else:
-            raise AuthenticationException(response.headers['x-http-response-info'])
+        _check_status(response, 200, 'Session TAN activated')
 
     def __oauth_cd_secondary_flow(self):
-        url = "{0}/oauth/token".format(self.oauth_url)
+        url, headers, payload = _token_request(
+            self.oauth_url, self.client_id, self.client_secret, 'cd_secondary',
+            token=self.auth.access_token,
+        )
+        response = self.session.post(url, headers=headers, data=payload)
+        return _parse_token_response(response)
 
-        payload = {
-            "client_id": self.client_id,
-            "client_secret": self.client_secret,
-            "grant_type": 'cd_secondary',
-            "token": self.auth.access_token,
-        }
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded',
-        }
 
-        response = self.session.post(url, headers=headers, data=payload)
-        if response.status_code == 200:
-            response_json = response.json()
-            return response_json['access_token'], response_json['refresh_token']
-        else:
-            raise AuthenticationException(response.headers['x-http-response-info'])
+class AsyncAuthService:
+    """Awaitable counterpart of AuthService for an ``httpx.AsyncClient`` session.
+
+    The session is expected to sign its requests with auth and to await ensure_token before each of them, as the
+    auth of AsyncComdirectClient does.
+    """
+
+    def __init__(self, client_id, client_secret, session, api_url, oauth_url):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.api_url = api_url
+        self.oauth_url = oauth_url
+        self.session = session
+        self.auth = None
+        self.session_identifier = None
+        self.challenge_id = None
+        # created on first use, asyncio.Lock binds to the running event loop before Python 3.10
+        self._refresh_lock = None
+
+    async def fetch_tan(self, zugangsnummer, pin, tan_type=None):
+        url, headers, payload = _token_request(
+            self.oauth_url, self.client_id, self.client_secret, 'password',
+            username=str(zugangsnummer), password=str(pin),
+        )
+        response = await self.session.post(url, headers=headers, data=payload)
+        self.auth = ComdirectAuth(*_parse_token_response(response))
+
+        response = await self.session.get(_session_status_request(self.api_url))
+        self.session_identifier = _parse_session_status(response)
+
+        url, headers, payload = _session_tan_request(self.api_url, self.session_identifier, tan_type)
+        response = await self.session.post(url, content=payload, headers=headers)
+        self.challenge_id, challenge = _parse_session_tan(response)
+        return challenge
+
+    async def activate_session(self, tan=None):
+        url, headers, payload = _activate_session_tan_request(
+            self.api_url, self.session_identifier, self.challenge_id, tan
+        )
+        response = await self.session.patch(url, headers=headers, content=payload)
+        _check_status(response, 200, 'Session TAN activated')
+
+        url, headers, payload = _token_request(
+            self.oauth_url, self.client_id, self.client_secret, 'cd_secondary',
+            token=self.auth.access_token,
+        )
+        response = await self.session.post(url, headers=headers, data=payload)
+        self.auth.session_tan_created(*_parse_token_response(response))
+
+    async def refresh_token(self):
+        """Refreshes the access token.
+
+        Concurrent calls result in a single refresh, like AuthService.refresh_token, so the refresh token is only
+        used once.
+        """
+        access_token = self.auth.access_token
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            if self.auth.access_token != access_token:
+                return
+            url, headers, payload = _token_request(
+                self.oauth_url, self.client_id, self.client_secret, 'refresh_token',
+                refresh_token=self.auth.refresh_token,
+            )
+            response = await self.session.post(url, headers=headers, data=payload)
+            self.auth.update_tokens(*_parse_token_response(response))
+
+    async def ensure_token(self):
+        """Refreshes the access token if it is about to expire."""
+        if self.auth is not None and self.auth.expires_soon():
+            await self.refresh_token()
+
+    async def revoke(self):
+        url, headers = _revoke_request(self.oauth_url)
+        response = await self.session.delete(url, headers=headers)
+        _check_status(response, 204, 'Token revoked')
 
 
 class AuthenticationException(Exception):
@@ -1,34 +1,88 @@
 from requests.auth import AuthBase
+import threading
 import uuid
 import time
 
 
 class ComdirectAuth(AuthBase):
-    def __init__(self, access_token, refresh_token):
+    def __init__(self, access_token, refresh_token, expires_in=None):
         self.session_id = str(uuid.uuid4())
         self.access_token = access_token
         self.refresh_token = refresh_token
+        self.expires_at = _expires_at(expires_in)
+        self.refresh_margin = 60
+        self.refresher = None
+        self._refresh_lock = threading.Lock()
 
     def __call__(self, request):
-        request.headers.update(
-            {
-                "Authorization": "Bearer {0}".format(self.access_token),
-                "x-http-request-info": str(
-                    {
-                        "clientRequestId": {
-                            "sessionId": self.session_id,
-                            "requestId": generate_request_id(),
-                        }
-                    }
-                ),
-            }
-        )
+        if (
+            self.refresher is not None
+            and self.expires_soon()
+            and not _is_token_request(request)
+        ):
+            self.refresher()
+        request.headers.update(self.request_headers())
         return request
 
-    def session_tan_created(self, access_token, refresh_token):
+    def request_headers(self):
+        """Returns the headers signing one request, also used by the asyncio client."""
+        return {
+            "Authorization": "Bearer {0}".format(self.access_token),
+            "x-http-request-info": str(
+                {
+                    "clientRequestId": {
+                        "sessionId": self.session_id,
+                        "requestId": generate_request_id(),
+                    }
+                }
+            ),
+        }
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_refresh_lock"]
+        return state
+
+    def __setstate__(self, state):
+        state.setdefault("expires_at", None)
+        state.setdefault("refresh_margin", 60)
+        state.setdefault("refresher", None)
+        self.__dict__.update(state)
+        self._refresh_lock = threading.Lock()
+
+    def session_tan_created(self, access_token, refresh_token, expires_in=None):
+        self.update_tokens(access_token, refresh_token, expires_in)
+
+    def update_tokens(self, access_token, refresh_token, expires_in=None):
         self.access_token = access_token
         self.refresh_token = refresh_token
+        self.expires_at = _expires_at(expires_in)
+
+    def expires_soon(self, margin=None):
+        """Returns True if the access token expires within margin seconds (default: refresh_margin)."""
+        if self.expires_at is None:
+            return False
+        margin = self.refresh_margin if margin is None else margin
+        return time.time() + margin >= self.expires_at
+
+    def refresh(self, refresh):
+        """Runs refresh unless another thread refreshed the tokens while waiting for the refresh lock.
+
+        Concurrent callers share one refresh, so the refresh token is only used once.
+        """
+        access_token = self.access_token
+        with self._refresh_lock:
+            if self.access_token == access_token:
+                refresh()
 
 
 def generate_request_id():
     return str(round(time.time() * 1000))[-9:]
+
+
+def _expires_at(expires_in):
+    return time.time() + int(expires_in) if expires_in is not None else None
+
+
+def _is_token_request(request):
+    return request.url.split("?")[0].endswith(("/oauth/token", "/oauth/revoke"))
@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+class FileTokenStore:
+    """Shares the tokens of one session between the processes of a host through a JSON file.
+
+    The file holds the state of AuthService.export_state. Refreshes are serialized by an exclusive lock on a second
+    file, so the process that refreshes first stores the new tokens and all others pick them up instead of using
+    the already invalidated refresh token. The lock requires fcntl, i.e. a Unix system.
+
+    Other stores, e.g. backed by a database, only have to provide the methods lock, load and save.
+
+    Args:
+        filename (str, optional): Path of the token file. Defaults to "tokens.json".
+    """
+
+    def __init__(self, filename: str = "tokens.json"):
+        self.filename = filename
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def lock(self):
+        """Holds an exclusive lock across threads and processes."""
+        if fcntl is None:
+            raise OSError("FileTokenStore requires fcntl, which is not available")
+        with self._lock, open(self.filename + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self):
+        """Returns the stored state, or None if nothing was stored yet."""
+        try:
+            with open(self.filename) as input:
+                return json.load(input)
+        except FileNotFoundError:
+            return None
+
+    def save(self, state):
+        """Atomically replaces the stored state, the file is only readable by the current user."""
+        temp_filename = "{0}.{1}.part".format(self.filename, os.getpid())
+        fd = os.open(temp_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as output:
+            json.dump(state, output)
+        os.replace(temp_filename, self.filename)
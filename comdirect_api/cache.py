@@ -0,0 +1,105 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+import threading
+import time
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a time to live.
+
+    Args:
+        maxsize (int, optional): Maximum number of entries, the least recently used entry is evicted first.
+            Defaults to 1024.
+        ttl (float, optional): Default time to live of an entry in seconds. Defaults to 300.
+        clock (Callable[[], float], optional): Time source. Defaults to time.monotonic.
+        on_evict (Callable[[Hashable, Any], None], optional): Called with key and value of every entry that is
+            evicted or dropped after expiry, not for invalidated entries. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 300.0,
+        clock=time.monotonic,
+        on_evict: Callable[[Hashable, Any], None] = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                expired = [(key, value)]
+            else:
+                expired = []
+            self.misses += 1
+        self.__evicted(expired)
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: float = None):
+        expires_at = self.clock() + (self.ttl if ttl is None else ttl)
+        evicted = []
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                old_key, (old_value, _) = self._entries.popitem(last=False)
+                evicted.append((old_key, old_value))
+                self.evictions += 1
+        self.__evicted(evicted)
+
+    def invalidate(self, key: Hashable = _MISSING):
+        """Removes the entry for key, or all entries if no key is given."""
+        with self._lock:
+            if key is _MISSING:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries.keys())
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] > self.clock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    def __evicted(self, entries):
+        # called without the lock, the callback may use the cache
+        if self.on_evict is not None:
+            for key, value in entries:
+                self.on_evict(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hit_ratio,
+        }
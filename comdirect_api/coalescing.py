@@ -0,0 +1,75 @@
+from typing import Any, Callable, Dict
+import threading
+
+from requests.models import Response
+
+from comdirect_api.response_cache import CachedResponse
+
+
+class _Call:
+    __slots__ = ("done", "response", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+        self.waiters = 0
+
+
+class RequestCoalescer:
+    """Shares one in-flight request between concurrent identical GET requests of the ComdirectAdapter.
+
+    A GET request for the same URL (including the parameters), Accept header and body as a request that is still in
+    flight does not go out, it waits for and receives a copy of the response of the first one, or its exception.
+    Only concurrent requests are combined, see ResponseCache for reusing responses afterwards.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def send(self, request, send: Callable[[Any], Response]) -> Response:
+        # GET requests like get_dimensions send their filters in the body
+        key = (request.url, request.headers.get("Accept"), request.body)
+        with self._lock:
+            self.requests += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.response.response(request)
+
+        try:
+            response = send(request)
+            call.response = CachedResponse(response)
+            return response
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    @property
+    def saved_ratio(self) -> float:
+        return self.coalesced / self.requests if self.requests else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "max_waiters": self.max_waiters,
+            "saved_ratio": self.saved_ratio,
+        }
@@ -1,8 +1,16 @@
-from typing import Any, Union
+from typing import Any, Tuple, Union
 import requests
 import pickle
 
+from comdirect_api.adapter import ComdirectAdapter
 from comdirect_api.auth.auth_service import AuthService
+from comdirect_api.auth.token_store import FileTokenStore
+from comdirect_api.coalescing import RequestCoalescer
+from comdirect_api.decoding import Decoder, get_decoder
+from comdirect_api.metrics import RequestMetrics
+from comdirect_api.response_cache import ResponseCache
+from comdirect_api.retry import RetryPolicy
+from comdirect_api.scheduler import RequestScheduler
 from comdirect_api.service.account_service import AccountService
 from comdirect_api.service.depot_service import DepotService
 from comdirect_api.service.document_service import DocumentService
@@ -24,11 +32,24 @@ class ComdirectClient(
         client_id: str,
         client_secret: str,
         import_session: Union[str, bool] = False,
+        decoder: Union[str, Decoder] = "auto",
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        timeout: Union[float, Tuple[float, float]] = (10.0, 60.0),
+        keep_alive: bool = True,
+        http2: bool = False,
+        api_url: str = "https://api.comdirect.de/api",
+        oauth_url: str = "https://api.comdirect.de",
     ):
-        self.api_url = "https://api.comdirect.de/api"
-        self.oauth_url = "https://api.comdirect.de"
+        self.api_url = api_url
+        self.oauth_url = oauth_url
+        # decodes the JSON bodies of all responses, see get_decoder
+        self.decoder = get_decoder(decoder)
 
-        if not import_session:
+        json_session = isinstance(import_session, str) and import_session.endswith(
+            ".json"
+        )
+        if not import_session or json_session:
             self.session = requests.Session()
             self.session.headers.update(
                 {
@@ -45,12 +66,156 @@ class ComdirectClient(
             with open(import_session, "rb") as input:
                 self.session = pickle.load(input)
                 self.auth_service = pickle.load(input)
+            # both objects were pickled separately, reconnect them so token refreshes reach the session
+            self.auth_service.session = self.session
+            self.session.auth = self.auth_service.auth
+            if self.auth_service.auth is not None and self.auth_service.auto_refresh:
+                self.auth_service.auth.refresher = self.auth_service.refresh_token
+
+        # connection settings, see ComdirectAdapter
+        self.adapter = ComdirectAdapter(
+            pool_connections, pool_maxsize, timeout, keep_alive, http2
+        )
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self.adapter.auth_service = self.auth_service
+        self.enable_retries()
+
+        if json_session:
+            state = FileTokenStore(import_session).load()
+            if state is None:
+                raise FileNotFoundError(
+                    "Session file {0} does not exist".format(import_session)
+                )
+            self.auth_service.import_state(state)
+
+    def close(self):
+        """Closes all pooled connections."""
+        self.session.close()
 
     def session_export(self, filename: str = "session.pkl"):
+        """Saves the session to a file, it can be restored with import_session=filename.
+
+        Files ending in .json only hold the tokens, their expiry and the session identifiers, but not the client
+        secret. They do not depend on the library version and are restored without a new TAN as long as the
+        refresh token is valid. Other files hold a pickle of the whole session.
+
+        Args:
+            filename (str, optional): Path of the file. Defaults to "session.pkl".
+        """
+        if filename.endswith(".json"):
+            FileTokenStore(filename).save(self.auth_service.export_state())
+            return
         with open(filename, "wb") as output:
             pickle.dump(self.session, output, pickle.HIGHEST_PROTOCOL)
             pickle.dump(self.auth_service, output, pickle.HIGHEST_PROTOCOL)
 
+    def set_token_store(self, token_store):
+        """Shares the session with other processes, see AuthService.set_token_store.
+
+        Example:
+            store = FileTokenStore('/run/comdirect/tokens.json')
+            client.set_token_store(store)  # in the process that activated the session
+            worker = ComdirectClient(client_id, client_secret)
+            worker.set_token_store(store)  # in each worker process
+        """
+        self.auth_service.set_token_store(token_store)
+
+    def enable_rate_limit(
+        self, rate: float = 10.0, burst: int = 10, priority_rules=None
+    ) -> RequestScheduler:
+        """Limits the request rate of this client, see RequestScheduler.
+
+        Order operations are sent before waiting bulk reads like get_documents or get_account_transactions.
+
+        Args:
+            rate (float, optional): Sustained requests per second. Defaults to 10.
+            burst (int, optional): Maximum number of requests sent at once. Defaults to 10.
+            priority_rules (list, optional): Custom priority rules. Defaults to DEFAULT_PRIORITY_RULES.
+
+        Returns:
+            RequestScheduler: The scheduler, e.g. for queue depth and wait time statistics
+        """
+        self.adapter.scheduler = RequestScheduler(rate, burst, priority_rules)
+        return self.adapter.scheduler
+
+    def disable_rate_limit(self):
+        self.adapter.scheduler = None
+
+    def enable_retries(
+        self, max_retries: int = 3, backoff_factor: float = 0.5, **kwargs
+    ) -> RetryPolicy:
+        """Configures retries of idempotent requests, enabled with the defaults by default. See RetryPolicy.
+
+        GET requests failing with 429, 5xx or a connection error are retried with a jittered exponential backoff or
+        after the delay given by Retry-After. On a 401 response the token is refreshed once and the request is
+        replayed. Writes are never retried.
+
+        Args:
+            max_retries (int, optional): Maximum number of retries per request. Defaults to 3.
+            backoff_factor (float, optional): Upper bound of the first delay in seconds. Defaults to 0.5.
+
+        Kwargs: Further arguments of RetryPolicy
+
+        Returns:
+            RetryPolicy: The policy, e.g. for retry and back-off statistics
+        """
+        self.adapter.retry = RetryPolicy(max_retries, backoff_factor, **kwargs)
+        return self.adapter.retry
+
+    def disable_retries(self):
+        self.adapter.retry = None
+
+    def enable_metrics(self, callbacks=None, **kwargs) -> RequestMetrics:
+        """Records latency, response size and status of every request per endpoint, see RequestMetrics.
+
+        Args:
+            callbacks (List[Callable[[RequestEvent], None]], optional): Called with every request, e.g.
+                opentelemetry_callback(). Defaults to None.
+
+        Kwargs: Further arguments of RequestMetrics
+
+        Returns:
+            RequestMetrics: The metrics, e.g. for stats() or prometheus()
+        """
+        self.adapter.metrics = RequestMetrics(callbacks, **kwargs)
+        return self.adapter.metrics
+
+    def disable_metrics(self):
+        self.adapter.metrics = None
+
+    def enable_response_cache(
+        self, ttls=None, stale_while_revalidate: float = 30.0, maxsize: int = 256
+    ) -> ResponseCache:
+        """Caches the responses of slowly changing endpoints like balances, depots and positions, see ResponseCache.
+
+        Args:
+            ttls (Dict[str, float], optional): Time to live per endpoint template. Defaults to DEFAULT_TTLS.
+            stale_while_revalidate (float, optional): Seconds an expired response is served while it is refreshed
+                in the background. Defaults to 30.
+            maxsize (int, optional): Maximum number of cached responses. Defaults to 256.
+
+        Returns:
+            ResponseCache: The cache, e.g. for hit ratio statistics
+        """
+        self.adapter.cache = ResponseCache(ttls, stale_while_revalidate, maxsize)
+        return self.adapter.cache
+
+    def disable_response_cache(self):
+        self.adapter.cache = None
+
+    def enable_coalescing(self) -> RequestCoalescer:
+        """Lets concurrent identical GET requests share one request to the API, see RequestCoalescer.
+
+        Returns:
+            RequestCoalescer: The coalescer, e.g. for the number of saved requests
+        """
+        self.adapter.coalescer = RequestCoalescer()
+        return self.adapter.coalescer
+
+    def disable_coalescing(self):
+        self.adapter.coalescer = None
+
     def fetch_tan(self, zugangsnummer, pin, tan_type=None):
         return self.auth_service.fetch_tan(zugangsnummer, pin, tan_type)
 
@@ -60,22 +225,30 @@ class ComdirectClient(
     def refresh_token(self):
         self.auth_service.refresh_token()
 
+    def start_refresh_timer(self):
+        self.auth_service.start_refresh_timer()
+
+    def stop_refresh_timer(self):
+        self.auth_service.stop_refresh_timer()
+
     def revoke_token(self):
         self.auth_service.revoke()
 
     def get(
-        self, endpoint: str, base_url: str = "https://api.comdirect.de/api", **kwargs
+        self, endpoint: str, base_url: str = None, raw: bool = False, **kwargs
     ) -> Any:
         """Sends a generic GET-request to a given endpoint with given parameters
 
         Args:
             endpoint (str): endpoint without leading slash, e.g. 'banking/clients/clientId/v2/accounts/balances'
-            base_url (str, optional): Base URL. Defaults to 'https://api.comdirect.de/api'.
+            base_url (str, optional): Base URL. Defaults to api_url, i.e. 'https://api.comdirect.de/api'.
+            raw (bool, optional): Return the undecoded response body. Defaults to False.
 
         Kwargs: Request parameters
 
         Returns:
-            Any: Response object
+            Any: Response object, or bytes if raw
         """
-        url = "{0}/{1}".format(base_url, endpoint)
-        return self.session.get(url, params=kwargs).json()
+        url = "{0}/{1}".format(base_url or self.api_url, endpoint)
+        response = self.session.get(url, params=kwargs)
+        return response.content if raw else self.decoder(response.content)
@@ -0,0 +1,349 @@
+from typing import Any, FrozenSet
+import argparse
+import os
+import pickle
+import signal
+import socket
+import stat
+import socketserver
+import struct
+import sys
+import tempfile
+import threading
+import types
+
+# XDG_RUNTIME_DIR is private to the user, the fallback directory in the shared temp directory is created with mode
+# 0700 and checked before use
+DEFAULT_DIRECTORY = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(
+    tempfile.gettempdir(), "comdirect-{0}".format(os.getuid())
+)
+DEFAULT_SOCKET = os.path.join(DEFAULT_DIRECTORY, "comdirect.sock")
+
+_HEADER = struct.Struct("!I")
+
+
+def service_methods(client) -> FrozenSet[str]:
+    """Returns the names of the public service methods of client and get, the methods served by ComdirectDaemon."""
+    methods = {"get"}
+    for name in dir(type(client)):
+        attribute = getattr(type(client), name)
+        if (
+            not name.startswith("_")
+            and callable(attribute)
+            and attribute.__module__.startswith("comdirect_api.service.")
+        ):
+            methods.add(name)
+    return frozenset(methods)
+
+
+class ComdirectDaemon:
+    """Serves the service methods of one ComdirectClient to DaemonClients over a Unix socket.
+
+    The daemon keeps the session, its pooled connections and caches, refreshes the access token in the background
+    and applies one rate limit to the requests of all scripts. Calls and results, including exceptions, are
+    pickled. The socket is only accessible to its owner, who must be trusted like the session itself. Connections
+    of other users are refused, where the platform reports the peer (SO_PEERCRED).
+
+    Args:
+        client (ComdirectClient): Client with an active session.
+        path (str, optional): Path of the Unix socket. Defaults to DEFAULT_SOCKET.
+        refresh (bool, optional): Refresh the access token in the background while serving. Defaults to True.
+    """
+
+    def __init__(self, client, path: str = DEFAULT_SOCKET, refresh: bool = True):
+        self.client = client
+        self.path = path
+        self.refresh = refresh
+        self.methods = service_methods(client)
+        self.calls = 0
+        self.errors = 0
+        self._server = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def call(self, method: str, args=(), kwargs=None) -> Any:
+        """Calls a service method of the client. Generators, e.g. of iter_account_transactions, are read into lists."""
+        with self._lock:
+            self.calls += 1
+        try:
+            if method not in self.methods:
+                raise AttributeError(
+                    "ComdirectDaemon does not serve '{0}'".format(method)
+                )
+            result = getattr(self.client, method)(*args, **(kwargs or {}))
+            if isinstance(result, types.GeneratorType):
+                result = list(result)
+            return result
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+
+    def serve_forever(self):
+        """Serves until stop is called from another thread or the process is interrupted."""
+        self.__bind()
+        try:
+            self._server.serve_forever()
+        finally:
+            self.stop()
+
+    def start(self):
+        """Serves in a background thread."""
+        self.__bind()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server is None:
+            return
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        self._server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        if self.refresh:
+            self.client.stop_refresh_timer()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def __bind(self):
+        _check_directory(self.path, create=True)
+        if os.path.exists(self.path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+                raise OSError("A daemon is already listening on {0}".format(self.path))
+            except ConnectionRefusedError:
+                # left over by a daemon that did not stop cleanly
+                os.unlink(self.path)
+            finally:
+                probe.close()
+
+        umask = os.umask(0o177)
+        try:
+            self._server = _Server(self.path, _Handler)
+        finally:
+            os.umask(umask)
+        self._server.comdirect_daemon = self
+        if self.refresh:
+            self.client.start_refresh_timer()
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        daemon = self.server.comdirect_daemon
+        if _peer_uid(self.request) not in (None, os.getuid()):
+            return
+        while True:
+            try:
+                request = _receive(self.request)
+            except ConnectionError:
+                return
+            if request is None:
+                return
+            method, args, kwargs = request
+            try:
+                response = ("result", daemon.call(method, args, kwargs))
+            except Exception as e:
+                response = ("error", e)
+            try:
+                _send(self.request, response)
+            except (pickle.PicklingError, TypeError, AttributeError) as e:
+                _send(self.request, ("error", RuntimeError(repr(e))))
+
+
+class DaemonClient:
+    """Calls the service methods of the ComdirectClient of a ComdirectDaemon.
+
+    Has the service methods of ComdirectClient, e.g. get_all_balances or get_depot_positions, with the same
+    arguments and results. Exceptions raised in the daemon are raised again. Importing this module does not load
+    requests or the services, so scripts start quickly. The connection is opened on the first call and reused.
+
+    Before anything is sent, the socket and the process listening on it must belong to the current user, otherwise
+    PermissionError is raised. Sockets in DEFAULT_DIRECTORY also require the directory to be private.
+
+    Example:
+        with DaemonClient() as client:
+            balances = client.get_all_balances()
+
+    Args:
+        path (str, optional): Path of the Unix socket. Defaults to DEFAULT_SOCKET.
+        timeout (float, optional): Socket timeout in seconds. Defaults to None (no timeout).
+    """
+
+    def __init__(self, path: str = DEFAULT_SOCKET, timeout: float = None):
+        self.path = path
+        self.timeout = timeout
+        self._socket = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def method(*args, **kwargs):
+            return self.call(name, *args, **kwargs)
+
+        method.__name__ = name
+        return method
+
+    def call(self, method: str, *args, **kwargs) -> Any:
+        with self._lock:
+            try:
+                if self._socket is None:
+                    self._socket = _connect(self.path, self.timeout)
+                _send(self._socket, (method, args, kwargs))
+                response = _receive(self._socket)
+            except OSError:
+                self.__close()
+                raise
+            if response is None:
+                self.__close()
+                raise ConnectionError("The daemon closed the connection")
+        status, value = response
+        if status == "error":
+            raise value
+        return value
+
+    def close(self):
+        with self._lock:
+            self.__close()
+
+    def __close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _check_directory(path, create=False):
+    directory = os.path.dirname(os.path.abspath(path))
+    if directory != os.path.abspath(DEFAULT_DIRECTORY):
+        return
+    if create:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or info.st_mode & 0o077
+    ):
+        raise PermissionError(
+            "{0} must be a directory only accessible to the current user".format(
+                directory
+            )
+        )
+
+
+def _connect(path, timeout):
+    _check_directory(path)
+    if os.lstat(path).st_uid != os.getuid():
+        raise PermissionError("{0} belongs to another user".format(path))
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        if _peer_uid(sock) not in (None, os.getuid()):
+            raise PermissionError(
+                "The process listening on {0} belongs to another user".format(path)
+            )
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+def _peer_uid(sock):
+    """Returns the user id of the process at the other end of a Unix socket, None if the platform does not tell."""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    credentials = struct.Struct("3i")
+    pid, uid, gid = credentials.unpack(
+        sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, credentials.size)
+    )
+    return uid
+
+
+def _send(sock, message):
+    data = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _receive(sock):
+    header = _read(sock, _HEADER.size)
+    if header is None:
+        return None
+    (length,) = _HEADER.unpack(header)
+    data = _read(sock, length)
+    if data is None:
+        raise ConnectionError("Connection closed in the middle of a message")
+    return pickle.loads(data)
+
+
+def _read(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            if chunks:
+                raise ConnectionError("Connection closed in the middle of a message")
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serves a comdirect session to DaemonClients over a Unix socket. The client id and secret "
+        "are read from COMDIRECT_CLIENT_ID and COMDIRECT_CLIENT_SECRET."
+    )
+    parser.add_argument(
+        "session", help="session file written by ComdirectClient.session_export"
+    )
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="path of the socket")
+    parser.add_argument(
+        "--rate", type=float, help="requests per second of the shared rate limit"
+    )
+    args = parser.parse_args(argv)
+
+    from comdirect_api.comdirect_client import ComdirectClient
+
+    client = ComdirectClient(
+        os.environ.get("COMDIRECT_CLIENT_ID", ""),
+        os.environ.get("COMDIRECT_CLIENT_SECRET", ""),
+        import_session=args.session,
+    )
+    if args.rate:
+        client.enable_rate_limit(rate=args.rate)
+    # stop cleanly on SIGTERM, e.g. from systemd
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        ComdirectDaemon(client, args.socket).serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # the tokens were refreshed while serving, keep them for the next start
+        client.session_export(args.session)
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+from typing import Any, Callable, Union
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+AUTO = "auto"
+JSON = "json"
+ORJSON = "orjson"
+MSGSPEC = "msgspec"
+
+Decoder = Callable[[bytes], Any]
+
+
+def get_decoder(decoder: Union[str, Decoder] = AUTO) -> Decoder:
+    """Returns a function that decodes a JSON response body.
+
+    "auto" picks the fastest installed decoder: orjson, msgspec or the json module of the standard library. All of
+    them return the same dicts, lists and strings, amounts stay strings.
+
+    Args:
+        decoder (Union[str, Decoder], optional): "auto", "json", "orjson", "msgspec" or a function decoding bytes.
+            Defaults to "auto".
+
+    Raises:
+        ImportError: If the requested decoder is not installed
+        ValueError: If the decoder is unknown
+
+    Returns:
+        Decoder: Function decoding bytes
+    """
+    if callable(decoder):
+        return decoder
+    if decoder == AUTO:
+        decoder = ORJSON if orjson is not None else MSGSPEC if msgspec else JSON
+    if decoder == JSON:
+        return json.loads
+    if decoder == ORJSON:
+        if orjson is None:
+            raise ImportError("The orjson decoder requires 'pip install orjson'")
+        return orjson.loads
+    if decoder == MSGSPEC:
+        if msgspec is None:
+            raise ImportError("The msgspec decoder requires 'pip install msgspec'")
+        return msgspec.json.Decoder().decode
+    raise ValueError("Unknown decoder {0}".format(decoder))
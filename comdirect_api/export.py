@@ -0,0 +1,168 @@
+from typing import Any, Iterable, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+_TEXT = 0
+_NUMBER = 1
+_DATE = 2
+
+_EMPTY_DTYPES = {_TEXT: "U1", _NUMBER: "float64", _DATE: "datetime64[D]"}
+
+ACCOUNT_TRANSACTION_COLUMNS = (
+    ("reference", "reference", _TEXT),
+    ("booking_status", "bookingStatus", _TEXT),
+    ("booking_date", "bookingDate", _DATE),
+    ("valuta_date", "valutaDate", _DATE),
+    ("amount", "amount.value", _NUMBER),
+    ("currency", "amount.unit", _TEXT),
+    ("transaction_type", "transactionType.key", _TEXT),
+    ("remitter", "remitter.holderName", _TEXT),
+    ("deptor", "deptor.holderName", _TEXT),
+    ("creditor", "creditor.holderName", _TEXT),
+    ("remittance_info", "remittanceInfo", _TEXT),
+)
+
+DEPOT_TRANSACTION_COLUMNS = (
+    ("transaction_id", "transactionId", _TEXT),
+    ("booking_status", "bookingStatus", _TEXT),
+    ("booking_date", "bookingDate", _DATE),
+    ("business_date", "businessDate", _DATE),
+    ("instrument_id", "instrumentId", _TEXT),
+    ("quantity", "quantity.value", _NUMBER),
+    ("execution_price", "executionPrice.value", _NUMBER),
+    ("transaction_value", "transactionValue.value", _NUMBER),
+    ("currency", "transactionValue.unit", _TEXT),
+    ("transaction_direction", "transactionDirection", _TEXT),
+    ("transaction_type", "transactionType", _TEXT),
+)
+
+POSITION_COLUMNS = (
+    ("depot_id", "depotId", _TEXT),
+    ("position_id", "positionId", _TEXT),
+    ("wkn", "wkn", _TEXT),
+    ("instrument_id", "instrumentId", _TEXT),
+    ("quantity", "quantity.value", _NUMBER),
+    ("current_price", "currentPrice.price.value", _NUMBER),
+    ("currency", "currentPrice.price.unit", _TEXT),
+    ("price_date_time", "currentPrice.priceDateTime", _TEXT),
+    ("purchase_value", "purchaseValue.value", _NUMBER),
+    ("current_value", "currentValue.value", _NUMBER),
+    ("profit_loss_purchase_abs", "profitLossPurchaseAbs.value", _NUMBER),
+    ("profit_loss_prev_day_abs", "profitLossPrevDayAbs.value", _NUMBER),
+)
+
+
+def account_transactions_array(pages: Union[Any, Iterable[Any]]) -> "np.ndarray":
+    """Builds a NumPy structured array from responses of get_account_transactions.
+
+    Works on a stream of pages like iter_account_transaction_pages, only the columns of the pages read so far are
+    kept. Amounts are float64, dates datetime64[D] and missing values NaN, NaT or empty strings. See
+    ACCOUNT_TRANSACTION_COLUMNS for the columns.
+
+    Args:
+        pages (Union[Any, Iterable[Any]]): One response object or an iterable of response objects
+
+    Returns:
+        np.ndarray: Structured array with one row per transaction
+    """
+    return to_array(pages, ACCOUNT_TRANSACTION_COLUMNS)
+
+
+def depot_transactions_array(pages: Union[Any, Iterable[Any]]) -> "np.ndarray":
+    """Builds a NumPy structured array from responses of get_depot_transactions, see account_transactions_array."""
+    return to_array(pages, DEPOT_TRANSACTION_COLUMNS)
+
+
+def positions_array(pages: Union[Any, Iterable[Any]]) -> "np.ndarray":
+    """Builds a NumPy structured array from responses of get_depot_positions, see account_transactions_array.
+
+    The position responses of several depots, e.g. the values of get_all_depot_positions, end up in one array.
+    """
+    return to_array(pages, POSITION_COLUMNS)
+
+
+def to_array(pages: Union[Any, Iterable[Any]], columns) -> "np.ndarray":
+    """Builds a NumPy structured array with the given (name, JSON path, kind) columns from the values of pages."""
+    if np is None:
+        raise ImportError(
+            "The columnar export requires numpy, install it with 'pip install comdirect-api-simple[export]'"
+        )
+    if isinstance(pages, dict):
+        pages = [pages]
+    paths = [(name, path.split("."), kind) for name, path, kind in columns]
+
+    chunks = {name: [] for name, _, _ in paths}
+    for page in pages:
+        values = page.get("values") or []
+        if not values:
+            continue
+        for name, path, kind in paths:
+            chunks[name].append(_column(values, path, kind))
+
+    arrays = [
+        (
+            np.concatenate(chunks[name])
+            if chunks[name]
+            else np.empty(0, dtype=_EMPTY_DTYPES[kind])
+        )
+        for name, _, kind in paths
+    ]
+    result = np.empty(
+        len(arrays[0]),
+        dtype=[(name, array.dtype) for (name, _, _), array in zip(paths, arrays)],
+    )
+    for (name, _, _), array in zip(paths, arrays):
+        result[name] = array
+    return result
+
+
+def to_dataframe(array: "np.ndarray"):
+    """Converts an exported structured array to a pandas DataFrame (requires pandas)."""
+    import pandas as pd
+
+    return pd.DataFrame({name: array[name] for name in array.dtype.names})
+
+
+def to_arrow(array: "np.ndarray"):
+    """Converts an exported structured array to a pyarrow Table (requires pyarrow)."""
+    import pyarrow as pa
+
+    return pa.table(
+        {
+            name: (
+                array[name].astype(object)
+                if array[name].dtype.kind == "U"
+                else array[name]
+            )
+            for name in array.dtype.names
+        }
+    )
+
+
+def _column(values, path, kind):
+    if len(path) == 1:
+        key = path[0]
+        raw = [value.get(key) for value in values]
+    else:
+        raw = [_lookup(value, path) for value in values]
+
+    if kind == _NUMBER:
+        return np.array(
+            ["nan" if item is None else item for item in raw], dtype=str
+        ).astype(np.float64)
+    if kind == _DATE:
+        return np.array(
+            ["NaT" if item is None else item for item in raw], dtype="datetime64[D]"
+        )
+    return np.array(["" if item is None else str(item) for item in raw], dtype=str)
+
+
+def _lookup(value, path):
+    for key in path:
+        if value is None:
+            return None
+        value = value.get(key)
+    return value
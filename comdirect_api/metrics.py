@@ -0,0 +1,306 @@
+from typing import Any, Callable, Dict, List
+import bisect
+import re
+import threading
+
+try:
+    from opentelemetry import metrics as otel_metrics
+except ImportError:  # pragma: no cover - optional dependency
+    otel_metrics = None
+
+# upper bounds of the latency histogram in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# endpoints with identifiers in their path, more specific templates first
+ENDPOINT_TEMPLATES = [
+    "/banking/v2/accounts/{accountId}/balances",
+    "/banking/v1/accounts/{accountId}/transactions",
+    "/brokerage/v3/depots/{depotId}/positions/{positionId}",
+    "/brokerage/v3/depots/{depotId}/positions",
+    "/brokerage/v3/depots/{depotId}/transactions",
+    "/brokerage/v1/instruments/{instrumentId}",
+    "/brokerage/depots/{depotId}/v3/orders",
+    "/brokerage/v3/orders/dimensions",
+    "/brokerage/v3/orders/{orderId}/validation",
+    "/brokerage/v3/orders/{orderId}",
+    "/messages/v2/documents/{documentId}",
+    "/session/clients/user/v1/sessions/{sessionId}/validate",
+    "/session/clients/user/v1/sessions/{sessionId}",
+]
+
+_TEMPLATE_PATTERNS = [
+    (re.compile(re.sub(r"\\{\w+\\}", "[^/]+", re.escape(template)) + "$"), template)
+    for template in ENDPOINT_TEMPLATES
+]
+_REQUEST_ID = re.compile(r"'requestId': '([^']*)'")
+_SESSION_ID = re.compile(r"'sessionId': '([^']*)'")
+
+
+def endpoint_template(path: str) -> str:
+    """Returns the endpoint template of a request path, e.g. /banking/v1/accounts/{accountId}/transactions.
+
+    Paths of endpoints without identifiers are returned unchanged. A leading /api is removed.
+    """
+    if path.startswith("/api/"):
+        path = path[4:]
+    for pattern, template in _TEMPLATE_PATTERNS:
+        if pattern.search(path):
+            return template
+    return path
+
+
+class RequestEvent:
+    """A request sent by ComdirectAdapter, passed to the callbacks of RequestMetrics.
+
+    Attributes:
+        method (str): HTTP method
+        endpoint (str): Endpoint template, see endpoint_template
+        url (str): Full URL
+        status_code (int): Status code, None if no response was received
+        duration (float): Seconds from sending the request until the response was read
+        wait (float): Seconds the request waited for the rate limiter
+        response_size (int): Size of the response body in bytes, None if unknown (streamed without Content-Length)
+        request_id (str): requestId of the x-http-request-info header
+        session_id (str): sessionId of the x-http-request-info header
+        error (Exception): Connection error or timeout, None if a response was received
+    """
+
+    __slots__ = (
+        "method",
+        "endpoint",
+        "url",
+        "status_code",
+        "duration",
+        "wait",
+        "response_size",
+        "request_id",
+        "session_id",
+        "error",
+    )
+
+    def __init__(
+        self,
+        request,
+        status_code,
+        duration,
+        wait=0.0,
+        response_size=None,
+        error=None,
+    ):
+        request_info = request.headers.get("x-http-request-info", "")
+        request_id = _REQUEST_ID.search(request_info)
+        session_id = _SESSION_ID.search(request_info)
+        self.method = request.method
+        self.endpoint = endpoint_template(request.path_url.split("?")[0])
+        self.url = request.url
+        self.status_code = status_code
+        self.duration = duration
+        self.wait = wait
+        self.response_size = response_size
+        self.request_id = request_id.group(1) if request_id else None
+        self.session_id = session_id.group(1) if session_id else None
+        self.error = error
+
+    @property
+    def failed(self) -> bool:
+        return self.status_code is None or self.status_code >= 400
+
+    def __repr__(self):
+        return "RequestEvent({0} {1} {2} {3:.1f}ms requestId={4})".format(
+            self.method,
+            self.endpoint,
+            self.status_code,
+            self.duration * 1000,
+            self.request_id,
+        )
+
+
+class _EndpointStats:
+    __slots__ = (
+        "requests",
+        "errors",
+        "statuses",
+        "duration",
+        "wait",
+        "size",
+        "buckets",
+    )
+
+    def __init__(self, bucket_count):
+        self.requests = 0
+        self.errors = 0
+        self.statuses = {}
+        self.duration = 0.0
+        self.wait = 0.0
+        self.size = 0
+        self.buckets = [0] * (bucket_count + 1)
+
+
+class RequestMetrics:
+    """Collects counters, latency histograms, response sizes and status codes per endpoint template.
+
+    Every request sent by the ComdirectAdapter, including retries, is recorded as a RequestEvent and passed to the
+    callbacks, e.g. to log slow requests with their requestId. The collected metrics are available as dict from
+    stats or in the Prometheus text format from prometheus.
+
+    Args:
+        callbacks (List[Callable[[RequestEvent], None]], optional): Called with each RequestEvent. Defaults to None.
+        buckets (tuple, optional): Upper bounds of the latency histogram in seconds. Defaults to DEFAULT_BUCKETS.
+    """
+
+    def __init__(
+        self,
+        callbacks: List[Callable[[RequestEvent], None]] = None,
+        buckets=DEFAULT_BUCKETS,
+    ):
+        self.callbacks = list(callbacks or [])
+        self.buckets = tuple(buckets)
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def add_callback(self, callback: Callable[[RequestEvent], None]):
+        self.callbacks.append(callback)
+
+    def record(self, event: RequestEvent):
+        key = (event.method, event.endpoint)
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = _EndpointStats(len(self.buckets))
+            stats.requests += 1
+            stats.errors += event.failed
+            stats.statuses[event.status_code] = (
+                stats.statuses.get(event.status_code, 0) + 1
+            )
+            stats.duration += event.duration
+            stats.wait += event.wait
+            stats.size += event.response_size or 0
+            stats.buckets[bisect.bisect_left(self.buckets, event.duration)] += 1
+        for callback in self.callbacks:
+            callback(event)
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the metrics per "METHOD endpoint template"."""
+        with self._lock:
+            return {
+                "{0} {1}".format(method, endpoint): {
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "statuses": dict(stats.statuses),
+                    "duration": stats.duration,
+                    "mean_duration": stats.duration / stats.requests,
+                    "wait_time": stats.wait,
+                    "response_bytes": stats.size,
+                    "histogram": dict(
+                        zip(self.buckets + (float("inf"),), stats.buckets)
+                    ),
+                }
+                for (method, endpoint), stats in self._endpoints.items()
+            }
+
+    def prometheus(self, prefix: str = "comdirect") -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = [
+                "# HELP {0}_requests_total Requests sent to the comdirect API.".format(
+                    prefix
+                ),
+                "# TYPE {0}_requests_total counter".format(prefix),
+            ]
+            for (method, endpoint), stats in endpoints:
+                for status, count in sorted(
+                    stats.statuses.items(), key=lambda item: str(item[0])
+                ):
+                    lines.append(
+                        '{0}_requests_total{{{1},status="{2}"}} {3}'.format(
+                            prefix,
+                            _labels(method, endpoint),
+                            "error" if status is None else status,
+                            count,
+                        )
+                    )
+
+            lines += [
+                "# HELP {0}_request_duration_seconds Latency of requests.".format(
+                    prefix
+                ),
+                "# TYPE {0}_request_duration_seconds histogram".format(prefix),
+            ]
+            for (method, endpoint), stats in endpoints:
+                labels = _labels(method, endpoint)
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), stats.buckets):
+                    cumulative += count
+                    lines.append(
+                        '{0}_request_duration_seconds_bucket{{{1},le="{2}"}} {3}'.format(
+                            prefix,
+                            labels,
+                            "+Inf" if bound == float("inf") else repr(bound),
+                            cumulative,
+                        )
+                    )
+                lines.append(
+                    "{0}_request_duration_seconds_sum{{{1}}} {2!r}".format(
+                        prefix, labels, stats.duration
+                    )
+                )
+                lines.append(
+                    "{0}_request_duration_seconds_count{{{1}}} {2}".format(
+                        prefix, labels, stats.requests
+                    )
+                )
+
+            lines += [
+                "# HELP {0}_response_bytes_total Bytes received.".format(prefix),
+                "# TYPE {0}_response_bytes_total counter".format(prefix),
+            ]
+            for (method, endpoint), stats in endpoints:
+                lines.append(
+                    "{0}_response_bytes_total{{{1}}} {2}".format(
+                        prefix, _labels(method, endpoint), stats.size
+                    )
+                )
+        return "\n".join(lines) + "\n"
+
+
+def opentelemetry_callback(meter_provider=None) -> Callable[[RequestEvent], None]:
+    """Returns a RequestMetrics callback recording the requests as OpenTelemetry metrics.
+
+    Requires the opentelemetry-api package. Records the histogram comdirect.client.duration and the counter
+    comdirect.client.response.size with the attributes http.method, http.route and http.status_code.
+
+    Args:
+        meter_provider (MeterProvider, optional): Defaults to the global meter provider.
+    """
+    if otel_metrics is None:
+        raise ImportError(
+            "The OpenTelemetry exporter requires 'pip install opentelemetry-api'"
+        )
+    meter = otel_metrics.get_meter("comdirect_api", meter_provider=meter_provider)
+    duration = meter.create_histogram(
+        "comdirect.client.duration", unit="s", description="Latency of requests"
+    )
+    size = meter.create_counter(
+        "comdirect.client.response.size", unit="By", description="Bytes received"
+    )
+
+    def record(event):
+        attributes = {
+            "http.method": event.method,
+            "http.route": event.endpoint,
+            "http.status_code": event.status_code or 0,
+        }
+        duration.record(event.duration, attributes)
+        if event.response_size:
+            size.add(event.response_size, attributes)
+
+    return record
+
+
+def _labels(method, endpoint):
+    return 'method="{0}",endpoint="{1}"'.format(method, endpoint.replace('"', '\\"'))
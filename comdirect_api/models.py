@@ -0,0 +1,203 @@
+from decimal import Decimal
+from typing import Any
+
+_VALUE = 0
+_AMOUNT = 1
+
+
+class Amount:
+    """Amount of a unit, e.g. EUR or XXX for pieces. The value is parsed to a Decimal on first access."""
+
+    __slots__ = ("_value", "unit")
+
+    def __init__(self, value, unit=None):
+        self._value = value
+        self.unit = unit
+
+    @property
+    def value(self) -> Decimal:
+        value = self._value
+        if value is not None and value.__class__ is not Decimal:
+            value = self._value = Decimal(value)
+        return value
+
+    def __eq__(self, other):
+        if not isinstance(other, Amount):
+            return NotImplemented
+        return self.value == other.value and self.unit == other.unit
+
+    def __hash__(self):
+        return hash((self.value, self.unit))
+
+    def __repr__(self):
+        return "Amount({0!r}, {1!r})".format(str(self._value), self.unit)
+
+
+class Page(list):
+    """List of models of one response, with the total number of matches reported by the paging object."""
+
+    __slots__ = ("matches",)
+
+    def __init__(self, values=(), matches=None):
+        super().__init__(values)
+        self.matches = len(self) if matches is None else matches
+
+
+class Model:
+    """Compact, read-only alternative to a decoded JSON object, returned by service methods with as_model=True.
+
+    Models use __slots__ and keep only the commonly used fields. Nested amounts become Amount objects whose Decimal
+    value is parsed on first access. Subclasses declare their fields as (attribute, JSON path, kind) tuples.
+    """
+
+    __slots__ = ()
+    _fields = ()
+
+    @classmethod
+    def from_dict(cls, data: Any):
+        model = cls.__new__(cls)
+        for attribute, path, kind in cls._fields:
+            value = data
+            for key in path:
+                value = value.get(key) if value is not None else None
+            if kind == _AMOUNT and value is not None:
+                value = Amount(value.get("value"), value.get("unit"))
+            setattr(model, attribute, value)
+        return model
+
+    def __repr__(self):
+        return "{0}({1})".format(
+            type(self).__name__,
+            ", ".join(
+                "{0}={1!r}".format(field[0], getattr(self, field[0]))
+                for field in self._fields[:3]
+            ),
+        )
+
+
+def _declare(*fields):
+    return tuple(
+        (attribute, tuple(path.split(".")), kind) for attribute, path, kind in fields
+    )
+
+
+class Balance(Model):
+    """Balance of an account, see AccountService.get_all_balances and get_balance."""
+
+    _fields = _declare(
+        ("account_id", "accountId", _VALUE),
+        ("account_type", "account.accountType.key", _VALUE),
+        ("iban", "account.iban", _VALUE),
+        ("balance", "balance", _AMOUNT),
+        ("balance_eur", "balanceEUR", _AMOUNT),
+        ("available_cash_amount", "availableCashAmount", _AMOUNT),
+        ("available_cash_amount_eur", "availableCashAmountEUR", _AMOUNT),
+    )
+    __slots__ = tuple(field[0] for field in _fields)
+
+
+class AccountTransaction(Model):
+    """Transaction of an account, see AccountService.get_account_transactions."""
+
+    _fields = _declare(
+        ("reference", "reference", _VALUE),
+        ("booking_status", "bookingStatus", _VALUE),
+        ("booking_date", "bookingDate", _VALUE),
+        ("valuta_date", "valutaDate", _VALUE),
+        ("amount", "amount", _AMOUNT),
+        ("transaction_type", "transactionType.key", _VALUE),
+        ("remitter", "remitter.holderName", _VALUE),
+        ("deptor", "deptor.holderName", _VALUE),
+        ("creditor", "creditor.holderName", _VALUE),
+        ("remittance_info", "remittanceInfo", _VALUE),
+        ("end_to_end_reference", "endToEndReference", _VALUE),
+    )
+    __slots__ = tuple(field[0] for field in _fields)
+
+
+class DepotTransaction(Model):
+    """Transaction of a depot, see DepotService.get_depot_transactions."""
+
+    _fields = _declare(
+        ("transaction_id", "transactionId", _VALUE),
+        ("booking_status", "bookingStatus", _VALUE),
+        ("booking_date", "bookingDate", _VALUE),
+        ("business_date", "businessDate", _VALUE),
+        ("instrument_id", "instrumentId", _VALUE),
+        ("wkn", "instrument.wkn", _VALUE),
+        ("quantity", "quantity", _AMOUNT),
+        ("execution_price", "executionPrice", _AMOUNT),
+        ("transaction_value", "transactionValue", _AMOUNT),
+        ("transaction_direction", "transactionDirection", _VALUE),
+        ("transaction_type", "transactionType", _VALUE),
+    )
+    __slots__ = tuple(field[0] for field in _fields)
+
+
+class Position(Model):
+    """Securities position, see DepotService.get_depot_positions and get_position."""
+
+    _fields = _declare(
+        ("depot_id", "depotId", _VALUE),
+        ("position_id", "positionId", _VALUE),
+        ("wkn", "wkn", _VALUE),
+        ("instrument_id", "instrumentId", _VALUE),
+        ("quantity", "quantity", _AMOUNT),
+        ("available_quantity", "availableQuantity", _AMOUNT),
+        ("current_price", "currentPrice.price", _AMOUNT),
+        ("price_date_time", "currentPrice.priceDateTime", _VALUE),
+        ("purchase_price", "purchasePrice", _AMOUNT),
+        ("current_value", "currentValue", _AMOUNT),
+        ("purchase_value", "purchaseValue", _AMOUNT),
+        ("profit_loss_purchase_abs", "profitLossPurchaseAbs", _AMOUNT),
+        ("profit_loss_prev_day_abs", "profitLossPrevDayAbs", _AMOUNT),
+    )
+    __slots__ = tuple(field[0] for field in _fields)
+
+
+class Order(Model):
+    """Order, see OrderService.get_all_orders and get_order. Use the response objects to change an order."""
+
+    _fields = _declare(
+        ("order_id", "orderId", _VALUE),
+        ("depot_id", "depotId", _VALUE),
+        ("order_status", "orderStatus", _VALUE),
+        ("order_type", "orderType", _VALUE),
+        ("side", "side", _VALUE),
+        ("instrument_id", "instrumentId", _VALUE),
+        ("venue_id", "venueId", _VALUE),
+        ("creation_timestamp", "creationTimestamp", _VALUE),
+        ("validity", "validity", _VALUE),
+        ("quantity", "quantity", _AMOUNT),
+        ("open_quantity", "openQuantity", _AMOUNT),
+        ("executed_quantity", "executedQuantity", _AMOUNT),
+        ("cancelled_quantity", "cancelledQuantity", _AMOUNT),
+        ("limit", "limit", _AMOUNT),
+        ("trigger_limit", "triggerLimit", _AMOUNT),
+    )
+    __slots__ = tuple(field[0] for field in _fields)
+
+
+class Document(Model):
+    """Postbox document, see DocumentService.get_documents."""
+
+    _fields = _declare(
+        ("document_id", "documentId", _VALUE),
+        ("name", "name", _VALUE),
+        ("date_creation", "dateCreation", _VALUE),
+        ("mime_type", "mimeType", _VALUE),
+        ("deletable", "deletable", _VALUE),
+        ("advertisement", "advertisement", _VALUE),
+        ("already_read", "documentMetaData.alreadyRead", _VALUE),
+        ("archived", "documentMetaData.archived", _VALUE),
+    )
+    __slots__ = tuple(field[0] for field in _fields)
+
+
+def page(model, response: Any) -> Page:
+    """Converts the values of a paged response to a Page of models."""
+    paging = response.get("paging") or {}
+    return Page(
+        [model.from_dict(value) for value in response.get("values") or []],
+        paging.get("matches"),
+    )
@@ -0,0 +1,227 @@
+from typing import Any, Callable, Dict, List
+import threading
+
+ACTIVE_STATUSES = ("OPEN", "PENDING")
+
+NEW = "new"
+STATUS = "status"
+EXECUTION = "execution"
+CANCELLED = "cancelled"
+MODIFIED = "modified"
+
+
+class OrderEvent:
+    """A change of an order detected by the OrderWatcher.
+
+    Attributes:
+        kind (str): NEW, STATUS, EXECUTION, CANCELLED or MODIFIED
+        order_id (str): orderId of the order
+        order (Any): Current order object
+        previous_status (str): orderStatus before the change, None for NEW
+        status (str): Current orderStatus
+    """
+
+    __slots__ = ("kind", "order_id", "order", "previous_status", "status")
+
+    def __init__(self, kind, order, previous_status=None):
+        self.kind = kind
+        self.order_id = order.get("orderId")
+        self.order = order
+        self.previous_status = previous_status
+        self.status = order.get("orderStatus")
+
+    def __repr__(self):
+        return "OrderEvent({0} {1} {2} -> {3})".format(
+            self.kind, self.order_id, self.previous_status, self.status
+        )
+
+
+class OrderWatcher:
+    """Polls the orders of a depot and reports their changes as OrderEvents.
+
+    The first poll loads all orders of the depot. Later polls only request the OPEN and PENDING orders, filtered by
+    the API, and fetch single orders that left these states to learn their final status. Every full_poll_every
+    polls, and on every poll at slow_interval, all orders are loaded again, so that orders placed and executed or
+    cancelled between two polls, e.g. market orders, are reported as well: as NEW followed by EXECUTION or
+    CANCELLED. Orders are compared by a small fingerprint (status, number of executions, quantity and limits), not
+    by their complete object. Polling runs every fast_interval seconds while there are open or pending orders and
+    after changes, without active orders the interval doubles up to slow_interval.
+
+    A failing poll in run, e.g. after a connection error or a failed token refresh, is passed to error_callback and
+    retried with a doubled interval, up to slow_interval, until a poll succeeds.
+
+    Args:
+        client (ComdirectClient): Client with an active session.
+        depot_id (str): Depot whose orders are watched
+        callback (Callable[[OrderEvent], None], optional): Called with every event. Defaults to None.
+        fast_interval (float, optional): Seconds between polls while orders are active. Defaults to 2.
+        slow_interval (float, optional): Longest time between polls in seconds. Defaults to 60.
+        error_callback (Callable[[Exception], None], optional): Called with the exception of a failed poll.
+            Defaults to None.
+        full_poll_every (int, optional): Number of polls after which all orders are loaded again. Defaults to 10.
+    """
+
+    def __init__(
+        self,
+        client,
+        depot_id: str,
+        callback: Callable[[OrderEvent], None] = None,
+        fast_interval: float = 2.0,
+        slow_interval: float = 60.0,
+        error_callback: Callable[[Exception], None] = None,
+        full_poll_every: int = 10,
+    ):
+        self.client = client
+        self.depot_id = depot_id
+        self.callback = callback
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.interval = fast_interval
+        self.polls = 0
+        self.requests = 0
+        self.events = 0
+        self.errors = 0
+        self.error_callback = error_callback
+        self.full_poll_every = full_poll_every
+        self._orders = None
+        self._since_full = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def orders(self) -> Dict[str, Any]:
+        """Last known order objects by orderId."""
+        return {
+            order_id: order for order_id, (order, _) in (self._orders or {}).items()
+        }
+
+    def poll(self) -> List[OrderEvent]:
+        """Polls once and returns the events, which are also passed to the callback."""
+        self.polls += 1
+        if self._orders is None:
+            self._orders = {
+                order["orderId"]: (order, _fingerprint(order))
+                for order in self.__get_orders()
+            }
+            self.__adapt_interval(False)
+            return []
+
+        current = {}
+        self._since_full += 1
+        if (
+            self._since_full >= self.full_poll_every
+            or self.interval >= self.slow_interval
+        ):
+            self._since_full = 0
+            for order in self.__get_orders():
+                current[order["orderId"]] = order
+        else:
+            for status in ACTIVE_STATUSES:
+                for order in self.__get_orders(order_status=status):
+                    current[order["orderId"]] = order
+        for order_id, (order, _) in self._orders.items():
+            if order.get("orderStatus") in ACTIVE_STATUSES and order_id not in current:
+                self.requests += 1
+                current[order_id] = self.client.get_order(order_id)
+
+        events = []
+        for order_id, order in current.items():
+            fingerprint = _fingerprint(order)
+            previous = self._orders.get(order_id)
+            self._orders[order_id] = (order, fingerprint)
+            if previous is None:
+                events.extend(_new_events(fingerprint, order))
+            elif previous[1] != fingerprint:
+                events.append(_event(previous[1], fingerprint, order))
+
+        self.events += len(events)
+        if self.callback is not None:
+            for event in events:
+                self.callback(event)
+        self.__adapt_interval(bool(events))
+        return events
+
+    def run(self):
+        """Polls until stop is called, sleeping the adaptive interval between polls."""
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                self.errors += 1
+                self.interval = min(
+                    max(self.interval, self.fast_interval) * 2, self.slow_interval
+                )
+                if self.error_callback is not None:
+                    self.error_callback(e)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Runs the watcher in a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "polls": self.polls,
+            "requests": self.requests,
+            "events": self.events,
+            "errors": self.errors,
+            "interval": self.interval,
+        }
+
+    def __get_orders(self, **kwargs):
+        self.requests += 1
+        response = self.client.get_all_orders(self.depot_id, **kwargs)
+        return response.get("values") or []
+
+    def __adapt_interval(self, changed):
+        active = any(
+            order.get("orderStatus") in ACTIVE_STATUSES
+            for order, _ in self._orders.values()
+        )
+        if changed or active:
+            self.interval = self.fast_interval
+        else:
+            self.interval = min(self.interval * 2, self.slow_interval)
+
+
+def _fingerprint(order):
+    return (
+        order.get("orderStatus"),
+        len(order.get("executions") or ()),
+        _value(order.get("quantity")),
+        _value(order.get("limit")),
+        _value(order.get("triggerLimit")),
+    )
+
+
+def _value(amount):
+    return amount.get("value") if amount else None
+
+
+def _new_events(current, order):
+    events = [OrderEvent(NEW, order)]
+    if (current[0] or "").startswith("CANCELLED"):
+        events.append(OrderEvent(CANCELLED, order))
+    elif current[1]:
+        events.append(OrderEvent(EXECUTION, order))
+    return events
+
+
+def _event(previous, current, order):
+    if previous[0] != current[0]:
+        if (current[0] or "").startswith("CANCELLED"):
+            return OrderEvent(CANCELLED, order, previous[0])
+        if current[1] > previous[1]:
+            return OrderEvent(EXECUTION, order, previous[0])
+        return OrderEvent(STATUS, order, previous[0])
+    if current[1] > previous[1]:
+        return OrderEvent(EXECUTION, order, previous[0])
+    return OrderEvent(MODIFIED, order, previous[0])
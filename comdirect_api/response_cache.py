@@ -0,0 +1,185 @@
+from typing import Any, Callable, Dict
+import datetime
+import threading
+import time
+
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from comdirect_api.cache import TTLCache
+from comdirect_api.metrics import endpoint_template
+
+# time to live in seconds per endpoint template, see comdirect_api.metrics.endpoint_template
+DEFAULT_TTLS = {
+    "/banking/clients/user/v2/accounts/balances": 30.0,
+    "/banking/v2/accounts/{accountId}/balances": 30.0,
+    "/brokerage/clients/user/v3/depots": 300.0,
+    "/brokerage/v3/depots/{depotId}/positions": 30.0,
+    "/brokerage/v3/depots/{depotId}/positions/{positionId}": 30.0,
+    "/reports/participants/user/v1/allbalances": 30.0,
+}
+
+# writes of the authentication, e.g. token refreshes, do not change cached responses
+_AUTH_PATHS = ("/oauth/", "/session/")
+
+
+class CachedResponse:
+    """Snapshot of a completely read response, from which independent copies can be created."""
+
+    __slots__ = ("status_code", "headers", "content", "reason", "fresh_until")
+
+    def __init__(self, response, fresh_until: float = None):
+        self.status_code = response.status_code
+        self.headers = CaseInsensitiveDict(response.headers)
+        self.content = response.content
+        self.reason = response.reason
+        self.fresh_until = fresh_until
+
+    def response(self, request) -> Response:
+        """Returns a new response to request with the stored status, headers and content."""
+        response = Response()
+        response.status_code = self.status_code
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.content
+        response._content_consumed = True
+        response.reason = self.reason
+        response.url = request.url
+        response.request = request
+        response.elapsed = datetime.timedelta(0)
+        return response
+
+
+class ResponseCache:
+    """Caches successful GET responses of slowly changing endpoints in the ComdirectAdapter.
+
+    A response is served from the cache for the time to live of its endpoint. After that it is still served for
+    stale_while_revalidate seconds while it is refreshed in the background, later requests wait for the refresh.
+    Refreshes are conditional if the API sent an ETag or Last-Modified header, a 304 response only extends the
+    cached one. Writes like order changes clear the cache, token and session requests do not. Entries are keyed by
+    URL and Accept header and the least recently used entry is evicted first.
+
+    Args:
+        ttls (Dict[str, float], optional): Time to live in seconds per endpoint template, endpoints without one
+            are not cached. Defaults to DEFAULT_TTLS.
+        stale_while_revalidate (float, optional): Seconds an expired response is served during a background
+            refresh. Defaults to 30.
+        maxsize (int, optional): Maximum number of cached responses. Defaults to 256.
+        clock (Callable[[], float], optional): Time source. Defaults to time.monotonic.
+    """
+
+    def __init__(
+        self,
+        ttls: Dict[str, float] = None,
+        stale_while_revalidate: float = 30.0,
+        maxsize: int = 256,
+        clock=time.monotonic,
+    ):
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.stale_while_revalidate = stale_while_revalidate
+        self.clock = clock
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._entries = TTLCache(maxsize, float("inf"), clock)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def ttl(self, request) -> float:
+        """Returns the time to live of the response to request, None if it is not cached."""
+        return self.ttls.get(endpoint_template(request.path_url.split("?")[0]))
+
+    def send(self, request, send: Callable[[Any], Response]) -> Response:
+        """Answers the GET request from the cache, or with send and caches the response."""
+        ttl = self.ttl(request)
+        if ttl is None:
+            return send(request)
+
+        key = (request.url, request.headers.get("Accept"))
+        entry = self._entries.get(key)
+        now = self.clock()
+        if entry is not None and now < entry.fresh_until:
+            self.__count("hits")
+            return entry.response(request)
+        if entry is not None and now < entry.fresh_until + self.stale_while_revalidate:
+            self.__count("stale_hits")
+            self.__refresh_in_background(key, entry, request, send, ttl)
+            return entry.response(request)
+
+        self.__count("misses")
+        return self.__refresh(key, entry, request, send, ttl)
+
+    def invalidate(self):
+        self._entries.invalidate()
+
+    def invalidate_after(self, request):
+        """Clears the cache after the write request, unless it belongs to the authentication."""
+        path = request.path_url.split("?")[0]
+        if path.startswith("/api/"):
+            path = path[4:]
+        if not path.startswith(_AUTH_PATHS):
+            self.invalidate()
+
+    @property
+    def hit_ratio(self) -> float:
+        requests = self.hits + self.stale_hits + self.misses
+        return (self.hits + self.stale_hits) / requests if requests else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "evictions": self._entries.evictions,
+            "hit_ratio": self.hit_ratio,
+        }
+
+    def __refresh(self, key, entry, request, send, ttl):
+        if entry is not None:
+            request = _conditional(request, entry)
+        response = send(request)
+        if response.status_code == 304 and entry is not None:
+            self.__count("revalidations")
+            response.close()
+            entry.fresh_until = self.clock() + ttl
+            return entry.response(request)
+        if response.status_code == 200:
+            self._entries.set(key, CachedResponse(response, self.clock() + ttl))
+        return response
+
+    def __refresh_in_background(self, key, entry, request, send, ttl):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self.__refresh(key, entry, request.copy(), send, ttl)
+            except Exception:
+                # the stale response stays cached, the next request tries again
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def __count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+def _conditional(request, entry):
+    etag = entry.headers.get("ETag")
+    last_modified = entry.headers.get("Last-Modified")
+    if etag is None and last_modified is None:
+        return request
+    request = request.copy()
+    if etag is not None:
+        request.headers["If-None-Match"] = etag
+    if last_modified is not None:
+        request.headers["If-Modified-Since"] = last_modified
+    return request
@@ -0,0 +1,110 @@
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict
+import datetime
+import random
+import threading
+
+
+class RetryPolicy:
+    """Decides when and after which delay a request is retried by the ComdirectAdapter.
+
+    Only idempotent methods are retried, writes like order changes are never sent twice. Retried are responses with
+    one of the retry_statuses and connection errors. The delay grows exponentially with full jitter, a Retry-After
+    header of the response takes precedence. A 401 response is answered by one token refresh and a replay of the
+    request.
+
+    Args:
+        max_retries (int, optional): Maximum number of retries per request. Defaults to 3.
+        backoff_factor (float, optional): Upper bound of the first delay in seconds, doubled per retry.
+            Defaults to 0.5.
+        max_backoff (float, optional): Upper bound of a single delay in seconds. Defaults to 30.
+        max_retry_after (float, optional): Longest Retry-After in seconds that is waited for, the response is
+            returned if the server asks for a longer delay. Defaults to 60.
+        retry_statuses (tuple, optional): Status codes to retry. Defaults to (429, 500, 502, 503, 504).
+        methods (tuple, optional): Methods that may be retried. Defaults to ("GET", "HEAD", "OPTIONS").
+        refresh_on_unauthorized (bool, optional): Refresh the token and replay on 401. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+        max_retry_after: float = 60.0,
+        retry_statuses=(429, 500, 502, 503, 504),
+        methods=("GET", "HEAD", "OPTIONS"),
+        refresh_on_unauthorized: bool = True,
+    ):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = frozenset(retry_statuses)
+        self.methods = frozenset(methods)
+        self.refresh_on_unauthorized = refresh_on_unauthorized
+        self.retries = 0
+        self.backoff_time = 0.0
+        self.token_refreshes = 0
+        self.exhausted = 0
+        self._lock = threading.Lock()
+
+    def is_retryable(self, method: str) -> bool:
+        return method in self.methods
+
+    def backoff(self, attempt: int, response=None) -> float:
+        """Returns the delay before retry number attempt (starting at 0), or None to give up."""
+        if attempt >= self.max_retries:
+            self.__count(exhausted=1)
+            return None
+        retry_after = (
+            _parse_retry_after(response.headers.get("Retry-After"))
+            if response is not None
+            else None
+        )
+        if retry_after is not None:
+            if retry_after > self.max_retry_after:
+                self.__count(exhausted=1)
+                return None
+            delay = retry_after
+        else:
+            delay = random.uniform(
+                0, min(self.max_backoff, self.backoff_factor * 2**attempt)
+            )
+        self.__count(retries=1, backoff_time=delay)
+        return delay
+
+    def token_refreshed(self):
+        self.__count(token_refreshes=1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retries": self.retries,
+            "backoff_time": self.backoff_time,
+            "token_refreshes": self.token_refreshes,
+            "exhausted": self.exhausted,
+        }
+
+    def __count(self, retries=0, backoff_time=0.0, token_refreshes=0, exhausted=0):
+        with self._lock:
+            self.retries += retries
+            self.backoff_time += backoff_time
+            self.token_refreshes += token_refreshes
+            self.exhausted += exhausted
+
+
+def _parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    return max(
+        (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds(), 0.0
+    )
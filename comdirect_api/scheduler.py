@@ -0,0 +1,116 @@
+from typing import Any, Dict
+import heapq
+import itertools
+import re
+import threading
+import time
+
+HIGH = 0
+NORMAL = 1
+LOW = 2
+
+PRIORITY_NAMES = {HIGH: "high", NORMAL: "normal", LOW: "low"}
+
+# (HTTP method or None for any, path pattern, priority), the first matching rule wins
+DEFAULT_PRIORITY_RULES = [
+    (None, re.compile(r"/oauth/"), HIGH),
+    (None, re.compile(r"/session/"), HIGH),
+    (None, re.compile(r"/brokerage/v3/orders"), HIGH),
+    ("POST", re.compile(r""), HIGH),
+    ("PATCH", re.compile(r""), HIGH),
+    ("DELETE", re.compile(r""), HIGH),
+    (None, re.compile(r"/messages/"), LOW),
+    (None, re.compile(r"/transactions"), LOW),
+]
+
+
+class RequestScheduler:
+    """Token bucket rate limiter that grants requests in order of their priority.
+
+    Up to burst requests may be sent at once, after that requests are released at rate requests per second. Waiting
+    requests of a higher priority (lower number) are always released before waiting requests of a lower priority,
+    requests of the same priority in order of arrival. The priority of a request is determined by the first
+    matching rule in priority_rules, see DEFAULT_PRIORITY_RULES: order operations are HIGH, documents and
+    transactions LOW and everything else NORMAL.
+
+    Args:
+        rate (float, optional): Sustained requests per second. Defaults to 10.
+        burst (int, optional): Size of the token bucket. Defaults to 10.
+        priority_rules (list, optional): List of (method, compiled path pattern, priority) tuples.
+            Defaults to DEFAULT_PRIORITY_RULES.
+    """
+
+    def __init__(self, rate: float = 10.0, burst: int = 10, priority_rules=None):
+        self.rate = rate
+        self.burst = burst
+        self.priority_rules = (
+            DEFAULT_PRIORITY_RULES if priority_rules is None else priority_rules
+        )
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiting = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self.max_queue_depth = 0
+        self._granted = dict.fromkeys(PRIORITY_NAMES, 0)
+        self._wait_time = dict.fromkeys(PRIORITY_NAMES, 0.0)
+        self._max_wait_time = dict.fromkeys(PRIORITY_NAMES, 0.0)
+
+    def classify(self, method: str, path: str) -> int:
+        for rule_method, pattern, priority in self.priority_rules:
+            if (rule_method is None or rule_method == method) and pattern.search(path):
+                return priority
+        return NORMAL
+
+    def acquire(self, priority: int = NORMAL) -> float:
+        """Blocks until the request may be sent.
+
+        Returns:
+            float: Time waited in seconds
+        """
+        started = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._counter))
+            heapq.heappush(self._waiting, ticket)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._waiting))
+            while True:
+                self.__refill()
+                if self._waiting[0] == ticket:
+                    if self._tokens >= 1:
+                        heapq.heappop(self._waiting)
+                        self._tokens -= 1
+                        self._cond.notify_all()
+                        break
+                    self._cond.wait((1 - self._tokens) / self.rate)
+                else:
+                    self._cond.wait()
+
+            waited = time.monotonic() - started
+            self._granted[priority] += 1
+            self._wait_time[priority] += waited
+            self._max_wait_time[priority] = max(self._max_wait_time[priority], waited)
+        return waited
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiting)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "queue_depth": len(self._waiting),
+                "max_queue_depth": self.max_queue_depth,
+                "priorities": {
+                    name: {
+                        "requests": self._granted[priority],
+                        "wait_time": self._wait_time[priority],
+                        "max_wait_time": self._max_wait_time[priority],
+                    }
+                    for priority, name in PRIORITY_NAMES.items()
+                },
+            }
+
+    def __refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
@@ -1,33 +1,77 @@
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator
+import datetime
+
+from comdirect_api import models
+from comdirect_api.service.date_range import Date, fetch_date_range
+
+
+def _all_balances_request(api_url, without_account):
+    url = "{0}/banking/clients/user/v2/accounts/balances".format(api_url)
+    params = {"without-attr": "account"} if without_account else None
+    return url, params
+
+
+def _balance_request(api_url, account_uuid):
+    url = "{0}/banking/v2/accounts/{1}/balances".format(api_url, account_uuid)
+    return url, None
+
+
+def _account_transactions_request(
+    api_url,
+    account_uuid,
+    with_account,
+    transaction_state,
+    paging_count,
+    paging_first,
+    min_booking_date,
+    max_booking_date,
+):
+    url = "{0}/banking/v1/accounts/{1}/transactions".format(api_url, account_uuid)
+    params = {
+        "transactionState": transaction_state,
+        "paging-count": paging_count,
+        "paging-first": paging_first,
+    }
+    if min_booking_date is not None:
+        params["min-bookingDate"] = min_booking_date
+    if max_booking_date is not None:
+        params["max-bookingDate"] = max_booking_date
+    if with_account:
+        params["with-attr"] = "account"
+    return url, params
 
 
 class AccountService:
-    def get_all_balances(self, without_account: bool = False) -> Any:
+    def get_all_balances(
+        self, without_account: bool = False, as_model: bool = False
+    ) -> Any:
         """4.1.1. Request for account information, including cash balance and buying power, for all accounts.
 
         Args:
             without_account (bool, optional): Suppresses the master data of the accounts. Defaults to False.
+            as_model (bool, optional): Return a Page of Balance models. Defaults to False.
 
         Returns:
-            Any: Response object
+            Any: Response object, or a Page of Balance models if as_model
         """
-        url = "{0}/banking/clients/user/v2/accounts/balances".format(self.api_url)
-        params = {"without-attr": "account"} if without_account else None
-        response = self.session.get(url, params=params).json()
-        return response
+        url, params = _all_balances_request(self.api_url, without_account)
+        response = self.decoder(self.session.get(url, params=params).content)
+        return models.page(models.Balance, response) if as_model else response
 
-    def get_balance(self, account_uuid: str) -> Any:
+    def get_balance(self, account_uuid: str, as_model: bool = False) -> Any:
         """4.1.2. Request for account information, including cash balance and buying power.
 
         Args:
             account_uuid (str): Account identifier
+            as_model (bool, optional): Return a Balance model. Defaults to False.
 
         Returns:
-            Any: Response object
+            Any: Response object, or a Balance model if as_model
         """
-        url = "{0}/banking/v2/accounts/{1}/balances".format(self.api_url, account_uuid)
-        response = self.session.get(url).json()
-        return response
+        url, params = _balance_request(self.api_url, account_uuid)
+        response = self.decoder(self.session.get(url, params=params).content)
+        return models.Balance.from_dict(response) if as_model else response
 
     def get_account_transactions(
         self,
@@ -38,6 +82,8 @@ class AccountService:
         paging_first: int = 0,
         min_booking_date: str = None,
         max_booking_date: str = None,
+        as_model: bool = False,
+        raw: bool = False,
     ) -> Any:
         """4.1.3 .Requests and returns a list of transactions for the given account.
 
@@ -53,22 +99,198 @@ class AccountService:
                 (transaction_state='BOOKED'). Defaults to 0.
             min_booking_date (str, optional): min booking date in format YYYY-MM-DD. Defaults to None.
             max_booking_date (str, optional): max booking date in format YYYY-MM-DD. Defaults to None.
+            as_model (bool, optional): Return a Page of AccountTransaction models. Defaults to False.
+            raw (bool, optional): Return the undecoded response body, takes precedence over as_model. Defaults to
+                False.
 
         Returns:
-            Any: Response object
+            Any: Response object, or a Page of AccountTransaction models if as_model, or bytes if raw
+        """
+        url, params = _account_transactions_request(
+            self.api_url,
+            account_uuid,
+            with_account,
+            transaction_state,
+            paging_count,
+            paging_first,
+            min_booking_date,
+            max_booking_date,
+        )
+        response = self.session.get(url, params=params)
+        if raw:
+            return response.content
+        response = self.decoder(response.content)
+        return (
+            models.page(models.AccountTransaction, response) if as_model else response
+        )
+
+    def iter_account_transaction_pages(
+        self,
+        account_uuid: str,
+        with_account: bool = False,
+        paging_count: int = 100,
+        min_booking_date: str = None,
+        max_booking_date: str = None,
+    ) -> Iterator[Any]:
+        """Iterates over all pages of booked transactions for the given account.
+
+        Follows paging.matches until every transaction has been returned. While a page is being consumed the next
+        one is already fetched in the background, so at most two pages are held in memory at any time.
+
+        Args:
+            account_uuid (str): Account identifier
+            with_account (bool, optional): Include account master data in the responses. Defaults to False.
+            paging_count (int, optional): Number of transactions per page. Defaults to 100.
+            min_booking_date (str, optional): min booking date in format YYYY-MM-DD. Defaults to None.
+            max_booking_date (str, optional): max booking date in format YYYY-MM-DD. Defaults to None.
+
+        Yields:
+            Any: Response object of each page
         """
-        url = "{0}/banking/v1/accounts/{1}/transactions".format(
-            self.api_url, account_uuid
+
+        def fetch(paging_first):
+            return self.get_account_transactions(
+                account_uuid,
+                with_account=with_account,
+                transaction_state="BOOKED",
+                paging_count=paging_count,
+                paging_first=paging_first,
+                min_booking_date=min_booking_date,
+                max_booking_date=max_booking_date,
+            )
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            paging_first = 0
+            future = executor.submit(fetch, paging_first)
+            while future is not None:
+                page = future.result()
+                values = page.get("values") or []
+                matches = (page.get("paging") or {}).get("matches", 0)
+                paging_first += len(values)
+                if values and paging_first < matches:
+                    future = executor.submit(fetch, paging_first)
+                else:
+                    future = None
+                yield page
+        finally:
+            executor.shutdown(wait=False)
+
+    def iter_account_transactions(
+        self,
+        account_uuid: str,
+        paging_count: int = 100,
+        min_booking_date: str = None,
+        max_booking_date: str = None,
+    ) -> Iterator[Any]:
+        """Iterates over all booked transactions for the given account, one transaction at a time.
+
+        See iter_account_transaction_pages for paging and prefetching.
+
+        Args:
+            account_uuid (str): Account identifier
+            paging_count (int, optional): Number of transactions fetched per request. Defaults to 100.
+            min_booking_date (str, optional): min booking date in format YYYY-MM-DD. Defaults to None.
+            max_booking_date (str, optional): max booking date in format YYYY-MM-DD. Defaults to None.
+
+        Yields:
+            Any: Transaction object
+        """
+        for page in self.iter_account_transaction_pages(
+            account_uuid,
+            paging_count=paging_count,
+            min_booking_date=min_booking_date,
+            max_booking_date=max_booking_date,
+        ):
+            for transaction in page.get("values") or []:
+                yield transaction
+
+    def get_account_transactions_range(
+        self,
+        account_uuid: str,
+        min_booking_date: Date,
+        max_booking_date: Date = None,
+        window_days: int = 90,
+        max_workers: int = 4,
+        paging_count: int = 500,
+        as_model: bool = False,
+    ) -> Any:
+        """Requests the booked transactions of a long booking date range in concurrent windows.
+
+        The range is split into windows of min-bookingDate and max-bookingDate, whose length adapts to the density
+        of the transactions, see fetch_date_range. Each window is paged like iter_account_transactions. The
+        transactions are merged, deduplicated by reference and sorted by booking date.
+
+        Args:
+            account_uuid (str): Account identifier
+            min_booking_date (Date): First booking date, datetime.date or YYYY-MM-DD
+            max_booking_date (Date, optional): Last booking date. Defaults to today.
+            window_days (int, optional): Length of the first windows in days. Defaults to 90.
+            max_workers (int, optional): Maximum number of concurrent windows. Defaults to 4.
+            paging_count (int, optional): Number of transactions fetched per request. Defaults to 500.
+            as_model (bool, optional): Return a Page of AccountTransaction models. Defaults to False.
+
+        Returns:
+            Any: Response object with all transactions, or a Page of AccountTransaction models if as_model
+        """
+
+        def fetch(first, until):
+            transactions = self.iter_account_transactions(
+                account_uuid,
+                paging_count=paging_count,
+                min_booking_date=first,
+                max_booking_date=until,
+            )
+            return list(transactions), True
+
+        response = fetch_date_range(
+            fetch,
+            min_booking_date,
+            max_booking_date or datetime.date.today(),
+            lambda transaction: transaction.get("reference")
+            or repr(sorted(transaction.items())),
+            window_days,
+            max_workers,
+            window_size=paging_count,
+        )
+        return (
+            models.page(models.AccountTransaction, response) if as_model else response
+        )
+
+
+class AsyncAccountService:
+    async def get_all_balances(self, without_account: bool = False) -> Any:
+        """Awaitable version of AccountService.get_all_balances."""
+        url, params = _all_balances_request(self.api_url, without_account)
+        response = await self.session.get(url, params=params)
+        return self.decoder(response.content)
+
+    async def get_balance(self, account_uuid: str) -> Any:
+        """Awaitable version of AccountService.get_balance."""
+        url, params = _balance_request(self.api_url, account_uuid)
+        response = await self.session.get(url, params=params)
+        return self.decoder(response.content)
+
+    async def get_account_transactions(
+        self,
+        account_uuid: str,
+        with_account: bool = False,
+        transaction_state: str = "BOTH",
+        paging_count: int = 20,
+        paging_first: int = 0,
+        min_booking_date: str = None,
+        max_booking_date: str = None,
+    ) -> Any:
+        """Awaitable version of AccountService.get_account_transactions."""
+        url, params = _account_transactions_request(
+            self.api_url,
+            account_uuid,
+            with_account,
+            transaction_state,
+            paging_count,
+            paging_first,
+            min_booking_date,
+            max_booking_date,
         )
-        params = {
-            "transactionState": transaction_state,
-            "paging-count": paging_count,
-            "paging-first": paging_first,
-            "min-bookingDate": min_booking_date,
-            "max-bookingDate": max_booking_date,
-        }
-        if with_account:
-            params["with-attr"] = "account"
-
-        response = self.session.get(url, params=params).json()
-        return response
+        response = await self.session.get(url, params=params)
+        return self.decoder(response.content)
@@ -0,0 +1,47 @@
+from typing import List
+import time
+
+
+class BatchReport:
+    """Progress and result of a batch of requests, e.g. run by DocumentService.download_documents.
+
+    Exceptions of failed items are collected in errors by item id. Subclasses count their successful items in
+    succeeded.
+    """
+
+    def __init__(self, total):
+        self.total = total
+        self.errors = {}
+        self.started = time.monotonic()
+        self.finished = None
+
+    @property
+    def succeeded(self) -> int:
+        return 0
+
+    @property
+    def failed(self) -> int:
+        return len(self.errors)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    @property
+    def done(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    def finish(self):
+        self.finished = time.monotonic()
+
+    def _summary(self) -> List[str]:
+        return ["{0} failed".format(self.failed), "{0:.1f}s".format(self.elapsed)]
+
+    def __repr__(self):
+        return "{0}({1}/{2} done, {3})".format(
+            type(self).__name__, self.done, self.total, ", ".join(self._summary())
+        )
@@ -0,0 +1,184 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Tuple, Union
+import datetime
+
+Date = Union[str, datetime.date]
+
+
+class DateRangeException(Exception):
+    """Raised when the transactions of a single day do not fit into one response."""
+
+    def __init__(self, day, returned):
+        super().__init__(
+            "Incomplete transactions on {0}: only {1} returned in one response".format(
+                day, returned
+            )
+        )
+        self.day = day
+        self.returned = returned
+
+    def __reduce__(self):
+        # Exception pickles its message as the only argument
+        return type(self), (self.day, self.returned)
+
+
+def fetch_date_range(
+    fetch: Callable[[str, str], Tuple[List[Any], bool]],
+    min_booking_date: Date,
+    max_booking_date: Date,
+    key: Callable[[Any], Any],
+    window_days: int = 90,
+    max_workers: int = 4,
+    window_size: int = 500,
+    max_window_days: int = 730,
+) -> Dict[str, Any]:
+    """Fetches a booking date range in windows on a thread pool and merges them.
+
+    fetch(min_booking_date, max_booking_date) returns the transactions of one window and whether they are complete.
+    An incomplete window, e.g. cut off by the page size of the API, is split in two halves and fetched again. After
+    each window the length of the following ones is adapted to the density of its results, so that a window holds
+    about window_size transactions. Transactions returned by several windows are kept once, the first one by key.
+    Booked transactions outside their window, returned if the API ignores a date filter, are dropped.
+
+    Args:
+        fetch (Callable[[str, str], Tuple[List[Any], bool]]): Fetches the window between the two dates (inclusive)
+        min_booking_date (Date): First booking date, datetime.date or YYYY-MM-DD
+        max_booking_date (Date): Last booking date, datetime.date or YYYY-MM-DD
+        key (Callable[[Any], Any]): Identity of a transaction
+        window_days (int, optional): Length of the first windows in days. Defaults to 90.
+        max_workers (int, optional): Maximum number of concurrent requests. Defaults to 4.
+        window_size (int, optional): Number of transactions per window to aim for. Defaults to 500.
+        max_window_days (int, optional): Maximum length of a window in days. Defaults to 730.
+
+    Raises:
+        DateRangeException: If a window of a single day is still incomplete.
+
+    Returns:
+        Dict[str, Any]: Response object with paging and the values in ascending booking order, transactions without
+            booking date last
+    """
+    start = _date(min_booking_date)
+    last = _date(max_booking_date)
+    days = max(1, window_days)
+    windows = []
+    pending = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+
+        def submit(first, until):
+            future = executor.submit(fetch, first.isoformat(), until.isoformat())
+            pending[future] = (first, until)
+
+        while pending or start <= last:
+            while start <= last and len(pending) < max_workers:
+                until = min(start + datetime.timedelta(days=days - 1), last)
+                submit(start, until)
+                start = until + datetime.timedelta(days=1)
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                first, until = pending.pop(future)
+                values, complete = future.result()
+                span = (until - first).days + 1
+                if not complete and span == 1:
+                    raise DateRangeException(first.isoformat(), len(values))
+                if not complete:
+                    middle = first + datetime.timedelta(days=span // 2 - 1)
+                    submit(first, middle)
+                    submit(middle + datetime.timedelta(days=1), until)
+                    days = min(days, max(1, span // 2))
+                    continue
+                values = [
+                    transaction
+                    for transaction in values
+                    if _in_window(transaction, first.isoformat(), until.isoformat())
+                ]
+                windows.append((first, values))
+                if values:
+                    days = int(span * window_size / len(values))
+                else:
+                    days = span * 2
+                days = min(max(days, 1), max_window_days)
+
+    seen = set()
+    merged = []
+    for _, values in sorted(windows, key=lambda window: window[0]):
+        for transaction in values:
+            identity = key(transaction)
+            if identity not in seen:
+                seen.add(identity)
+                merged.append(transaction)
+    merged.sort(key=_booking_order)
+    return {"paging": {"index": 0, "matches": len(merged)}, "values": merged}
+
+
+def fetch_backwards(
+    fetch: Callable[[str], Tuple[List[Any], bool]],
+    min_booking_date: Date,
+    max_booking_date: Date,
+    key: Callable[[Any], Any],
+) -> Dict[str, Any]:
+    """Fetches a booking date range backwards from its end, for endpoints that only filter by the last booking date.
+
+    fetch(max_booking_date) returns the newest transactions up to the date and whether they are complete. While a
+    response is cut off, the next request ends on the oldest booking date it returned, until a response reaches
+    before min_booking_date or adds no older transactions. A complete first response ends the range after one
+    request. Transactions are kept once by key, booked ones before min_booking_date are dropped.
+
+    Args:
+        fetch (Callable[[str], Tuple[List[Any], bool]]): Fetches the transactions up to the date (inclusive)
+        min_booking_date (Date): First booking date, datetime.date or YYYY-MM-DD
+        max_booking_date (Date): Last booking date, datetime.date or YYYY-MM-DD
+        key (Callable[[Any], Any]): Identity of a transaction
+
+    Raises:
+        DateRangeException: If the transactions of a single day do not fit into one response.
+
+    Returns:
+        Dict[str, Any]: Response object with paging and the values in ascending booking order, transactions without
+            booking date last
+    """
+    first = _date(min_booking_date).isoformat()
+    until = _date(max_booking_date).isoformat()
+    seen = set()
+    merged = []
+    while True:
+        values, complete = fetch(until)
+        added = 0
+        for transaction in values:
+            identity = key(transaction)
+            if identity not in seen and _in_window(transaction, first, until):
+                seen.add(identity)
+                merged.append(transaction)
+                added += 1
+        booking_dates = [
+            transaction["bookingDate"][:10]
+            for transaction in values
+            if transaction.get("bookingDate")
+        ]
+        if complete or not booking_dates or min(booking_dates) < first:
+            break
+        if min(booking_dates) >= until:
+            raise DateRangeException(until, len(values))
+        if not added:
+            break
+        until = min(booking_dates)
+
+    merged.sort(key=_booking_order)
+    return {"paging": {"index": 0, "matches": len(merged)}, "values": merged}
+
+
+def _date(value):
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _in_window(transaction, first, until):
+    booking_date = transaction.get("bookingDate")
+    return booking_date is None or first <= booking_date[:10] <= until
+
+
+def _booking_order(transaction):
+    booking_date = transaction.get("bookingDate")
+    return (booking_date is None, booking_date or "")
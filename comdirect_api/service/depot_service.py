@@ -1,4 +1,66 @@
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+import datetime
+
+from comdirect_api import models
+from comdirect_api.service.date_range import Date, fetch_backwards
+
+
+def _all_depots_request(api_url):
+    url = "{0}/brokerage/clients/user/v3/depots".format(api_url)
+    return url, None
+
+
+def _depot_positions_request(
+    api_url, depot_id, with_depot, with_positions, with_instrument, instrument_id
+):
+    url = "{0}/brokerage/v3/depots/{1}/positions".format(api_url, depot_id)
+    params = {}
+    if not with_depot and not with_positions:
+        params["without_attr"] = "depot,positions"
+    elif with_depot and not with_positions:
+        params["without_attr"] = "positions"
+    elif not with_depot and with_positions:
+        params["without_attr"] = "depot"
+
+    if with_instrument and with_positions:
+        params["with_attr"] = "instrument"
+    if instrument_id:
+        params["instrumentId"] = instrument_id
+    return url, params
+
+
+def _position_request(api_url, depot_id, position_id, with_instrument):
+    url = "{0}/brokerage/v3/depots/{1}/positions/{2}".format(
+        api_url, depot_id, position_id
+    )
+    params = {"with-attr": "instrument"} if with_instrument else None
+    return url, params
+
+
+def _depot_transactions_request(api_url, depot_id, with_instrument, kwargs):
+    kwargs_mapping = {
+        "wkn": "WKN",
+        "isin": "ISIN",
+        "instrument_id": "instrumentId",
+        "max_booking_date": "max-bookingDate",
+        "transaction_direction": "transactionDirection",
+        "transaction_type": "transactionType",
+        "booking_status": "bookingStatus",
+        "min_transaction_value": "min-transactionValue",
+        "max_transaction_value": "max-transactionValue",
+    }
+
+    url = "{0}/brokerage/v3/depots/{1}/transactions".format(api_url, depot_id)
+    params = {"without-attr": "instrument"} if not with_instrument else {}
+
+    for arg, val in kwargs.items():
+        api_arg = kwargs_mapping.get(arg)
+        if api_arg is None:
+            raise ValueError("Keyword argument {} is invalid".format(arg))
+        else:
+            params[api_arg] = val
+    return url, params
 
 
 class DepotService:
@@ -9,8 +71,8 @@ class DepotService:
             Any: Response object
         """
 
-        url = "{0}/brokerage/clients/user/v3/depots".format(self.api_url)
-        response = self.session.get(url).json()
+        url, params = _all_depots_request(self.api_url)
+        response = self.decoder(self.session.get(url, params=params).content)
         return response
 
     def get_depot_positions(
@@ -20,6 +82,7 @@ class DepotService:
         with_positions: bool = True,
         with_instrument: bool = False,
         instrument_id: bool = None,
+        as_model: bool = False,
     ) -> Any:
         """5.1.2. Request for securities positions.
 
@@ -33,30 +96,75 @@ class DepotService:
             with_instrument (bool, optional): Include instrument information for positions.
                 Ignored if with_positions is False. Defaults to False.
             instrument_id (bool, optional): [description]. Defaults to None.
+            as_model (bool, optional): Return a Page of Position models. Defaults to False.
 
         Returns:
-            Any: Response object
+            Any: Response object, or a Page of Position models if as_model
         """
-        url = "{0}/brokerage/v3/depots/{1}/positions".format(self.api_url, depot_id)
-        params = {}
-        if not with_depot and not with_positions:
-            params["without_attr"] = "depot,positions"
-        elif with_depot and not with_positions:
-            params["without_attr"] = "positions"
-        elif not with_depot and with_positions:
-            params["without_attr"] = "depot"
-
-        if with_instrument and with_positions:
-            params["with_attr"] = "instrument"
-
-        if instrument_id:
-            params["instrumentId"] = instrument_id
-
-        response = self.session.get(url, params=params).json()
-        return response
+        url, params = _depot_positions_request(
+            self.api_url,
+            depot_id,
+            with_depot,
+            with_positions,
+            with_instrument,
+            instrument_id,
+        )
+        response = self.decoder(self.session.get(url, params=params).content)
+        return models.page(models.Position, response) if as_model else response
+
+    def get_all_depot_positions(
+        self,
+        depot_ids: List[str] = None,
+        with_depot: bool = True,
+        with_positions: bool = True,
+        with_instrument: bool = False,
+        max_workers: int = 4,
+    ) -> Tuple[Dict[str, Any], Dict[str, Exception]]:
+        """Requests the securities positions of several depots in parallel.
+
+        The get_depot_positions calls are distributed over a pool of at most max_workers threads. A failing depot
+        does not abort the others, its exception is returned instead.
+
+        Args:
+            depot_ids (List[str], optional): Depots to request. Defaults to all depots from get_all_depots.
+            with_depot (bool, optional): Include depot information in response. Defaults to True.
+            with_positions (bool, optional): Include position information in response. Defaults to True.
+            with_instrument (bool, optional): Include instrument information for positions.
+                Ignored if with_positions is False. Defaults to False.
+            max_workers (int, optional): Maximum number of concurrent requests. Defaults to 4.
+
+        Returns:
+            Tuple[Dict[str, Any], Dict[str, Exception]]: Tuple of (Response objects, Exceptions), both keyed by depotId
+        """
+        if depot_ids is None:
+            depot_ids = [depot["depotId"] for depot in self.get_all_depots()["values"]]
+
+        positions = {}
+        errors = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                depot_id: executor.submit(
+                    self.get_depot_positions,
+                    depot_id,
+                    with_depot=with_depot,
+                    with_positions=with_positions,
+                    with_instrument=with_instrument,
+                )
+                for depot_id in depot_ids
+            }
+            for depot_id, future in futures.items():
+                try:
+                    positions[depot_id] = future.result()
+                except Exception as e:
+                    errors[depot_id] = e
+        return positions, errors
 
     def get_position(
-        self, depot_id: str, position_id: str, with_instrument: bool = False
+        self,
+        depot_id: str,
+        position_id: str,
+        with_instrument: bool = False,
+        as_model: bool = False,
     ) -> Any:
         """5.1.3. Request for retrieving a single position of specific depot.
 
@@ -64,25 +172,33 @@ class DepotService:
             depot_id (str): Reference to securities account number
             position_id (str): Position identification number in securities account
             with_instrument (bool, optional): Include instrument information for position. Defaults to False.
+            as_model (bool, optional): Return a Position model. Defaults to False.
 
         Returns:
-            Any: Response object
+            Any: Response object, or a Position model if as_model
         """
-        url = "{0}/brokerage/v3/depots/{1}/positions/{2}".format(
-            self.api_url, depot_id, position_id
+        url, params = _position_request(
+            self.api_url, depot_id, position_id, with_instrument
         )
-        params = {"with-attr": "instrument"} if with_instrument else None
-        response = self.session.get(url, params=params).json()
-        return response
+        response = self.decoder(self.session.get(url, params=params).content)
+        return models.Position.from_dict(response) if as_model else response
 
     def get_depot_transactions(
-        self, depot_id: str, with_instrument: bool = False, **kwargs
+        self,
+        depot_id: str,
+        with_instrument: bool = False,
+        as_model: bool = False,
+        raw: bool = False,
+        **kwargs
     ):
         """5.1.4. Depot transactions.
 
         Args:
             depot_id (str): Reference to securities account number
             with_instrument (bool, optional): Include instrument information for positions. Defaults to False.
+            as_model (bool, optional): Return a Page of DepotTransaction models. Defaults to False.
+            raw (bool, optional): Return the undecoded response body, takes precedence over as_model. Defaults to
+                False.
 
         Kwargs:
             wkn (str):
@@ -108,29 +224,109 @@ class DepotService:
             ValueError: If a keyword arg is invalid.
 
         Returns:
-            Any: Response object
+            Any: Response object, or a Page of DepotTransaction models if as_model, or bytes if raw
         """
-        kwargs_mapping = {
-            "wkn": "WKN",
-            "isin": "ISIN",
-            "instrument_id": "instrumentId",
-            "max_booking_date": "max-bookingDate",
-            "transaction_direction": "transactionDirection",
-            "transaction_type": "transactionType",
-            "booking_status": "bookingStatus",
-            "min_transaction_value": "min-transactionValue",
-            "max_transaction_value": "max-transactionValue",
-        }
-
-        url = "{0}/brokerage/v3/depots/{1}/transactions".format(self.api_url, depot_id)
-        params = {"without-attr": "instrument"} if not with_instrument else {}
-
-        for arg, val in kwargs.items():
-            api_arg = kwargs_mapping.get(arg)
-            if api_arg is None:
-                raise ValueError("Keyword argument {} is invalid".format(arg))
-            else:
-                params[api_arg] = val
-
-        response = self.session.get(url, params=params).json()
-        return response
+        url, params = _depot_transactions_request(
+            self.api_url, depot_id, with_instrument, kwargs
+        )
+
+        response = self.session.get(url, params=params)
+        if raw:
+            return response.content
+        response = self.decoder(response.content)
+        return models.page(models.DepotTransaction, response) if as_model else response
+
+    def get_depot_transactions_range(
+        self,
+        depot_id: str,
+        min_booking_date: Date,
+        max_booking_date: Date = None,
+        as_model: bool = False,
+        **kwargs
+    ) -> Any:
+        """Requests the depot transactions of a long booking date range.
+
+        The depot transactions only filter by max-bookingDate. The range is fetched backwards from its end, every
+        request ending on the oldest booking date of a response cut off by the API, and stops once the responses
+        reach before min_booking_date, see fetch_backwards. A range whose transactions fit into one response takes
+        one request. The transactions are deduplicated by transactionId and sorted by booking date.
+
+        Args:
+            depot_id (str): Reference to securities account number
+            min_booking_date (Date): First booking date, datetime.date or YYYY-MM-DD
+            max_booking_date (Date, optional): Last booking date. Defaults to today.
+            as_model (bool, optional): Return a Page of DepotTransaction models. Defaults to False.
+
+        Kwargs: Filters of get_depot_transactions except max_booking_date
+
+        Raises:
+            DateRangeException: If the transactions of a single day do not fit into one response.
+
+        Returns:
+            Any: Response object with all transactions, or a Page of DepotTransaction models if as_model
+        """
+
+        def fetch(until):
+            page = self.get_depot_transactions(
+                depot_id, max_booking_date=until, **kwargs
+            )
+            values = page.get("values") or []
+            matches = (page.get("paging") or {}).get("matches", len(values))
+            return values, matches <= len(values)
+
+        response = fetch_backwards(
+            fetch,
+            min_booking_date,
+            max_booking_date or datetime.date.today(),
+            lambda transaction: transaction.get("transactionId")
+            or repr(sorted(transaction.items())),
+        )
+        return models.page(models.DepotTransaction, response) if as_model else response
+
+
+class AsyncDepotService:
+    async def get_all_depots(self) -> Any:
+        """Awaitable version of DepotService.get_all_depots."""
+        url, params = _all_depots_request(self.api_url)
+        response = await self.session.get(url, params=params)
+        return self.decoder(response.content)
+
+    async def get_depot_positions(
+        self,
+        depot_id: str,
+        with_depot: bool = True,
+        with_positions: bool = True,
+        with_instrument: bool = False,
+        instrument_id: bool = None,
+    ) -> Any:
+        """Awaitable version of DepotService.get_depot_positions."""
+        url, params = _depot_positions_request(
+            self.api_url,
+            depot_id,
+            with_depot,
+            with_positions,
+            with_instrument,
+            instrument_id,
+        )
+        response = await self.session.get(url, params=params)
+        return self.decoder(response.content)
+
+    async def get_position(
+        self, depot_id: str, position_id: str, with_instrument: bool = False
+    ) -> Any:
+        """Awaitable version of DepotService.get_position."""
+        url, params = _position_request(
+            self.api_url, depot_id, position_id, with_instrument
+        )
+        response = await self.session.get(url, params=params)
+        return self.decoder(response.content)
+
+    async def get_depot_transactions(
+        self, depot_id: str, with_instrument: bool = False, **kwargs
+    ):
+        """Awaitable version of DepotService.get_depot_transactions."""
+        url, params = _depot_transactions_request(
+            self.api_url, depot_id, with_instrument, kwargs
+        )
+        response = await self.session.get(url, params=params)
+        return self.decoder(response.content)
@@ -1,24 +1,90 @@
-from typing import Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Tuple
+import os
+import threading
+
+from comdirect_api import models
+from comdirect_api.service.batch_report import BatchReport
+
+_EXTENSIONS = {
+    "application/pdf": ".pdf",
+    "text/html": ".html",
+}
+
+
+def _documents_request(api_url, first_index, count):
+    url = "{0}/messages/clients/user/v2/documents".format(api_url)
+    params = {
+        "paging-first": first_index,
+        "paging-count": count,
+    }
+    return url, params
+
+
+def _document_request(api_url, document_id, mime_type="application/pdf"):
+    url = "{0}/messages/v2/documents/{1}".format(api_url, document_id)
+    headers = {"Accept": mime_type}
+    return url, headers
+
+
+def _document_filename(document):
+    return document["documentId"] + _EXTENSIONS.get(document.get("mimeType"), "")
+
+
+class DownloadReport(BatchReport):
+    """Progress and result of DocumentService.download_documents."""
+
+    def __init__(self, total):
+        super().__init__(total)
+        self.downloaded = []
+        self.skipped = []
+        self.bytes_written = 0
+
+    @property
+    def succeeded(self) -> int:
+        return len(self.downloaded) + len(self.skipped)
+
+    @property
+    def throughput(self) -> float:
+        """Written bytes per second."""
+        elapsed = self.elapsed
+        return self.bytes_written / elapsed if elapsed > 0 else 0.0
+
+    def _summary(self):
+        return [
+            "{0} downloaded".format(len(self.downloaded)),
+            "{0} skipped".format(len(self.skipped)),
+            "{0} failed".format(self.failed),
+            "{0:.0f} B/s".format(self.throughput),
+        ]
 
 
 class DocumentService:
-    def get_documents(self, first_index: int = 0, count: int = 1000) -> Any:
+    def get_documents(
+        self,
+        first_index: int = 0,
+        count: int = 1000,
+        as_model: bool = False,
+        raw: bool = False,
+    ) -> Any:
         """9.1.1. Delivers a list of documents for the customer.
 
         Args:
             first_index (int, optional): Index of the first document. Defaults to 0.
             count (int, optional): The maximum number of documents that will be returned. Defaults to 1000.
+            as_model (bool, optional): Return a Page of Document models. Defaults to False.
+            raw (bool, optional): Return the undecoded response body, takes precedence over as_model. Defaults to
+                False.
 
         Returns:
-            Any: Response object
+            Any: Response object, or a Page of Document models if as_model, or bytes if raw
         """
-        url = "{0}/messages/clients/user/v2/documents".format(self.api_url)
-        params = {
-            "paging-first": first_index,
-            "paging-count": count,
-        }
-        response = self.session.get(url, params=params).json()
-        return response
+        url, params = _documents_request(self.api_url, first_index, count)
+        response = self.session.get(url, params=params)
+        if raw:
+            return response.content
+        response = self.decoder(response.content)
+        return models.page(models.Document, response) if as_model else response
 
     def get_document(self, document_id: str) -> Tuple[Any, str]:
         """9.1.2. Download a document for the given UUID.
@@ -29,7 +95,120 @@ class DocumentService:
         Returns:
             Tuple[Any, str]: Tuple of (Document, Content type)
         """
-        url = "{0}/messages/v2/documents/{1}".format(self.api_url, document_id)
-        response = self.session.get(url, headers={"Accept": "application/pdf"})
+        url, headers = _document_request(self.api_url, document_id)
+        response = self.session.get(url, headers=headers)
+        content_type = response.headers["content-type"]
+        return response.content, content_type
+
+    def download_documents(
+        self,
+        directory: str,
+        documents: List[Any] = None,
+        max_workers: int = 4,
+        chunk_size: int = 64 * 1024,
+        filename: Callable[[Any], str] = _document_filename,
+        progress: Callable[[DownloadReport, Any], None] = None,
+    ) -> DownloadReport:
+        """Downloads many documents to a directory.
+
+        Documents are streamed to disk in chunks by up to max_workers threads, so no document is held in memory
+        completely. A document is skipped if its file already exists with the size announced by the server in the
+        response to a HEAD request, which allows resuming an interrupted export without downloading finished files
+        again. The document list has no sizes, documents without a file are downloaded without a HEAD request.
+        Incomplete files are written with a ".part" suffix.
+
+        Args:
+            directory (str): Target directory, created if necessary.
+            documents (List[Any], optional): Documents as returned in the values of get_documents.
+                Defaults to all documents from get_documents, following paging.matches.
+            max_workers (int, optional): Maximum number of concurrent downloads. Defaults to 4.
+            chunk_size (int, optional): Size of the chunks written to disk in bytes. Defaults to 64 KiB.
+            filename (Callable[[Any], str], optional): Returns the file name for a document.
+                Defaults to the documentId with an extension matching the mimeType.
+            progress (Callable[[DownloadReport, Any], None], optional): Called after each finished document with
+                the report and the document. Defaults to None.
+
+        Returns:
+            DownloadReport: Downloaded, skipped and failed documents with throughput statistics
+        """
+        if documents is None:
+            documents = self.__all_documents()
+        os.makedirs(directory, exist_ok=True)
+
+        report = DownloadReport(len(documents))
+        lock = threading.Lock()
+
+        def download(document):
+            document_id = document["documentId"]
+            path = os.path.join(directory, filename(document))
+            try:
+                written = self.__download_document(document, path, chunk_size)
+            except Exception as e:
+                with lock:
+                    report.errors[document_id] = e
+            else:
+                with lock:
+                    if written is None:
+                        report.skipped.append(document_id)
+                    else:
+                        report.downloaded.append(document_id)
+                        report.bytes_written += written
+            if progress is not None:
+                progress(report, document)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for _ in executor.map(download, documents):
+                pass
+        report.finish()
+        return report
+
+    def __all_documents(self, count=1000):
+        documents = []
+        while True:
+            page = self.get_documents(first_index=len(documents), count=count)
+            values = page.get("values") or []
+            documents.extend(values)
+            matches = (page.get("paging") or {}).get("matches", 0)
+            if not values or len(documents) >= matches:
+                return documents
+
+    def __download_document(self, document, path, chunk_size):
+        url, headers = _document_request(
+            self.api_url,
+            document["documentId"],
+            document.get("mimeType", "application/pdf"),
+        )
+        if os.path.exists(path):
+            response = self.session.head(url, headers=headers)
+            content_length = response.headers.get("content-length")
+            if (
+                response.ok
+                and content_length is not None
+                and os.path.getsize(path) == int(content_length)
+            ):
+                return None
+
+        with self.session.get(url, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            written = 0
+            with open(path + ".part", "wb") as output:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    output.write(chunk)
+                    written += len(chunk)
+        os.replace(path + ".part", path)
+        return written
+
+
+class AsyncDocumentService:
+    async def get_documents(self, first_index: int = 0, count: int = 1000) -> Any:
+        """Awaitable version of DocumentService.get_documents."""
+        url, params = _documents_request(self.api_url, first_index, count)
+        response = await self.session.get(url, params=params)
+        return self.decoder(response.content)
+
+    async def get_document(self, document_id: str) -> Tuple[Any, str]:
+        """Awaitable version of DocumentService.get_document."""
+        url, headers = _document_request(self.api_url, document_id)
+        response = await self.session.get(url, headers=headers)
         content_type = response.headers["content-type"]
         return response.content, content_type
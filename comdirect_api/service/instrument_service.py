@@ -1,7 +1,128 @@
-from typing import Any
+from typing import Any, Dict, Hashable
+import threading
+
+from comdirect_api.cache import TTLCache
+
+
+def _instrument_request(
+    api_url,
+    instrument_id,
+    order_dimensions,
+    fund_distribution,
+    derivative_data,
+    static_data,
+):
+    url = "{0}/brokerage/v1/instruments/{1}".format(api_url, instrument_id)
+    params = {}
+
+    if order_dimensions:
+        params["with-attr"] = "orderDimensions"
+    if fund_distribution:
+        if "with-attr" in params.keys():
+            params["with-attr"] = params["with-attr"] + ",fundDistribution“"
+        else:
+            params["with-attr"] = "fundDistribution“"
+    if derivative_data:
+        if "with-attr" in params.keys():
+            params["with-attr"] = params["with-attr"] + ",derivativeData“"
+        else:
+            params["with-attr"] = "derivativeData“"
+    if static_data is False:
+        params["without-attr"] = "staticData"
+    return url, params
+
+
+class InstrumentCache:
+    """TTL and LRU bounded cache for get_instrument responses.
+
+    Entries are keyed by instrumentId and the requested attribute set. An alias index maps the instrumentId, WKN,
+    ISIN and mnemonic of every cached instrument to its instrumentId, so a lookup by WKN is also served from an
+    entry that was fetched by ISIN. The aliases of an instrument are removed with its last evicted or expired
+    response. Cached responses are shared and must not be modified.
+
+    Args:
+        maxsize (int, optional): Maximum number of cached responses. Defaults to 1024.
+        ttl (float, optional): Time to live of a cached response in seconds. Defaults to 3600.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0):
+        self.responses = TTLCache(maxsize, ttl, on_evict=self.__evicted)
+        self.aliases = {}
+        self._lock = threading.Lock()
+
+    def get(self, identifier: str, attributes: Hashable) -> Any:
+        instrument_id = self.aliases.get(identifier.upper())
+        return self.responses.get((instrument_id, attributes))
+
+    def put(self, identifier: str, attributes: Hashable, response: Any):
+        values = response.get("values") if isinstance(response, dict) else None
+        if not values or len(values) != 1 or "instrumentId" not in values[0]:
+            return
+        instrument = values[0]
+        instrument_id = instrument["instrumentId"]
+        with self._lock:
+            for alias in (
+                identifier,
+                instrument_id,
+                instrument.get("wkn"),
+                instrument.get("isin"),
+                instrument.get("mnemonic"),
+            ):
+                if alias:
+                    self.aliases[alias.upper()] = instrument_id
+        self.responses.set((instrument_id, attributes), response)
+
+    def invalidate(self, identifier: str = None):
+        """Removes all cached responses for the given WKN, ISIN, mnemonic or instrumentId, or everything."""
+        with self._lock:
+            if identifier is None:
+                self.aliases.clear()
+                self.responses.invalidate()
+                return
+            instrument_id = self.aliases.get(identifier.upper())
+            if instrument_id is None:
+                return
+            for alias in [a for a, i in self.aliases.items() if i == instrument_id]:
+                del self.aliases[alias]
+        for key in self.responses.keys():
+            if key[0] == instrument_id:
+                self.responses.invalidate(key)
+
+    def __evicted(self, key, response):
+        instrument_id = key[0]
+        if any(other[0] == instrument_id for other in self.responses.keys()):
+            return
+        with self._lock:
+            for alias in [a for a, i in self.aliases.items() if i == instrument_id]:
+                del self.aliases[alias]
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.responses.stats()
+        stats["aliases"] = len(self.aliases)
+        return stats
 
 
 class InstrumentService:
+    instrument_cache = None
+
+    def enable_instrument_cache(
+        self, maxsize: int = 1024, ttl: float = 3600.0
+    ) -> InstrumentCache:
+        """Caches the responses of get_instrument, see InstrumentCache.
+
+        Args:
+            maxsize (int, optional): Maximum number of cached responses. Defaults to 1024.
+            ttl (float, optional): Time to live of a cached response in seconds. Defaults to 3600.
+
+        Returns:
+            InstrumentCache: The cache, e.g. for statistics and invalidation
+        """
+        self.instrument_cache = InstrumentCache(maxsize, ttl)
+        return self.instrument_cache
+
+    def disable_instrument_cache(self):
+        self.instrument_cache = None
+
     def get_instrument(
         self,
         instrument_id: str,
@@ -24,23 +145,44 @@ class InstrumentService:
         Returns:
             Any: Reponse object
         """
-        url = "{0}/brokerage/v1/instruments/{1}".format(self.api_url, instrument_id)
-        params = {}
-
-        if order_dimensions:
-            params["with-attr"] = "orderDimensions"
-        if fund_distribution:
-            if "with-attr" in params.keys():
-                params["with-attr"] = params["with-attr"] + ",fundDistribution“"
-            else:
-                params["with-attr"] = "fundDistribution“"
-        if derivative_data:
-            if "with-attr" in params.keys():
-                params["with-attr"] = params["with-attr"] + ",derivativeData“"
-            else:
-                params["with-attr"] = "derivativeData“"
-        if static_data is False:
-            params["without-attr"] = "staticData"
-
-        response = self.session.get(url, params=params).json()
+        cache = self.instrument_cache
+        attributes = (order_dimensions, fund_distribution, derivative_data, static_data)
+        if cache is not None:
+            response = cache.get(instrument_id, attributes)
+            if response is not None:
+                return response
+
+        url, params = _instrument_request(
+            self.api_url,
+            instrument_id,
+            order_dimensions,
+            fund_distribution,
+            derivative_data,
+            static_data,
+        )
+        response = self.decoder(self.session.get(url, params=params).content)
+        if cache is not None:
+            cache.put(instrument_id, attributes, response)
         return response
+
+
+class AsyncInstrumentService:
+    async def get_instrument(
+        self,
+        instrument_id: str,
+        order_dimensions: bool = False,
+        fund_distribution: bool = False,
+        derivative_data: bool = False,
+        static_data: bool = True,
+    ) -> Any:
+        """Awaitable version of InstrumentService.get_instrument."""
+        url, params = _instrument_request(
+            self.api_url,
+            instrument_id,
+            order_dimensions,
+            fund_distribution,
+            derivative_data,
+            static_data,
+        )
+        response = await self.session.get(url, params=params)
+        return self.decoder(response.content)
@@ -1,8 +1,284 @@
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+from typing import Any, Callable, Dict
+import datetime
 import json
+import threading
+
+from comdirect_api import models
+from comdirect_api.cache import TTLCache
+from comdirect_api.service.batch_report import BatchReport
+
+_DIMENSION_INSTRUMENT_ARGS = ("instrument_id", "wkn", "isin", "mneomic")
+_DIMENSION_FILTER_ARGS = ("venue_id", "side", "order_type", "type")
+
+
+def _dimensions_request(api_url, kwargs):
+    kwargs_mapping = {
+        "instrument_id": "instrumentId",
+        "wkn": "WKN",
+        "isin": "ISIN",
+        "mneomic": "mneomic",
+        "venue_id": "venueId",
+        "side": "side",
+        "order_type": "orderType",
+        "type": "type",
+    }
+
+    url = "{0}/brokerage/v3/orders/dimensions".format(api_url)
+    params = {}
+
+    for arg, val in kwargs.items():
+        api_arg = kwargs_mapping.get(arg)
+        if api_arg is None:
+            raise ValueError("Keyword argument {} is invalid".format(arg))
+        else:
+            params[api_arg] = val
+    return url, params
+
+
+def _all_orders_request(api_url, depot_id, with_instrument, with_executions, kwargs):
+    kwargs_mapping = {
+        "order_status": "orderStatus",
+        "venue_id": "venueId",
+        "side": "side",
+        "order_type": "orderType",
+    }
+
+    url = "{0}/brokerage/depots/{1}/v3/orders".format(api_url, depot_id)
+    params = {}
+
+    if with_instrument:
+        params["with-attr"] = "instrument"
+    if not with_executions:
+        params["without-attr"] = "executions"
+
+    for arg, val in kwargs.items():
+        api_arg = kwargs_mapping.get(arg)
+        if api_arg is None:
+            raise ValueError("Keyword argument {} is invalid".format(arg))
+        else:
+            params[api_arg] = val
+    return url, params
+
+
+def _order_request(api_url, order_id):
+    url = "{0}/brokerage/v3/orders/{1}".format(api_url, order_id)
+    return url, {}
+
+
+def _change_validation_request(api_url, order_id):
+    return "{0}/brokerage/v3/orders/{1}/validation".format(api_url, order_id)
+
+
+def _change_request(api_url, order_id, challenge_id, tan):
+    url = "{0}/brokerage/v3/orders/{1}".format(api_url, order_id)
+    headers = {"x-once-authentication-info": json.dumps({"id": challenge_id})}
+    if tan is not None:
+        headers["x-once-authentication"] = str(tan)
+    return url, headers
+
+
+def _parse_change_validation(response, verbose=True):
+    if response.status_code == 201:
+        response_json = json.loads(response.headers["x-once-authentication-info"])
+        typ = response_json["typ"]
+        if verbose:
+            print("TAN-TYP: {}".format(typ))
+        if typ == "P_TAN" or typ == "M_TAN":
+            return response_json["id"], response_json["challenge"]
+        else:
+            return response_json["id"], None
+    else:
+        raise OrderException(response.headers["x-http-response-info"])
+
+
+def _parse_order_response(response, decoder):
+    if response.status_code == 200:
+        return decoder(response.content)
+    else:
+        raise OrderException(response.headers["x-http-response-info"])
+
+
+def _filter_dimensions(response, filters):
+    venue_id = filters.get("venue_id")
+    side = filters.get("side")
+    order_type = filters.get("order_type")
+    venue_type = filters.get("type")
+
+    values = []
+    for instrument in response.get("values") or []:
+        venues = []
+        for venue in instrument.get("venues") or []:
+            if venue_id is not None and venue.get("venueId") != venue_id:
+                continue
+            if venue_type is not None and venue.get("type") != venue_type:
+                continue
+            venue = dict(venue)
+            if side is not None:
+                if side not in (venue.get("sides") or []):
+                    continue
+                venue["sides"] = [side]
+            if order_type is not None:
+                order_types = venue.get("orderTypes") or {}
+                if order_type not in order_types:
+                    continue
+                venue["orderTypes"] = {order_type: order_types[order_type]}
+            venues.append(venue)
+        if venues:
+            instrument = dict(instrument)
+            instrument["venues"] = venues
+            values.append(instrument)
+
+    filtered = dict(response)
+    filtered["values"] = values
+    if isinstance(response.get("paging"), dict):
+        filtered["paging"] = dict(response["paging"], matches=len(values))
+    return filtered
+
+
+class DimensionCache:
+    """Cache for get_dimensions responses of single instruments.
+
+    Responses are keyed by the instrument and the venue_id, side, order_type and type filters. A query that is
+    narrower than a cached one, e.g. one venue and side of an instrument whose venues are all cached, is answered by
+    filtering the cached response locally. All entries are dropped after ttl seconds and additionally every day at
+    invalidate_at, e.g. before the trading day starts.
+
+    Args:
+        maxsize (int, optional): Maximum number of cached responses. Defaults to 1024.
+        ttl (float, optional): Time to live of a cached response in seconds. Defaults to 8 hours.
+        invalidate_at (datetime.time, optional): Local time of the daily invalidation. Defaults to 07:30.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 8 * 3600.0,
+        invalidate_at: datetime.time = datetime.time(7, 30),
+    ):
+        self.responses = TTLCache(maxsize, ttl)
+        self.invalidate_at = invalidate_at
+        self.hits = 0
+        self.local_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._next_invalidation = self.__next_invalidation()
+
+    def get(self, kwargs: Dict[str, Any]) -> Any:
+        self.__check_schedule()
+        instrument, filters = self.__split(kwargs)
+        if instrument is None:
+            return None
+        for size in range(len(filters), -1, -1):
+            for subset in combinations(sorted(filters.items()), size):
+                response = self.responses.get((instrument, subset))
+                if response is None:
+                    continue
+                with self._lock:
+                    if size == len(filters):
+                        self.hits += 1
+                    else:
+                        self.local_hits += 1
+                if size == len(filters):
+                    return response
+                return _filter_dimensions(response, filters)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, kwargs: Dict[str, Any], response: Any):
+        instrument, filters = self.__split(kwargs)
+        if (
+            instrument is not None
+            and isinstance(response, dict)
+            and "values" in response
+        ):
+            self.responses.set((instrument, tuple(sorted(filters.items()))), response)
+
+    def invalidate(self):
+        self.responses.invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self.responses),
+            "hits": self.hits,
+            "local_hits": self.local_hits,
+            "misses": self.misses,
+        }
+
+    def __check_schedule(self):
+        if (
+            self.invalidate_at is not None
+            and datetime.datetime.now() >= self._next_invalidation
+        ):
+            self.invalidate()
+            self._next_invalidation = self.__next_invalidation()
+
+    def __next_invalidation(self):
+        if self.invalidate_at is None:
+            return None
+        now = datetime.datetime.now()
+        next_invalidation = datetime.datetime.combine(now.date(), self.invalidate_at)
+        if next_invalidation <= now:
+            next_invalidation += datetime.timedelta(days=1)
+        return next_invalidation
+
+    @staticmethod
+    def __split(kwargs):
+        instrument = tuple(
+            (arg, kwargs[arg])
+            for arg in _DIMENSION_INSTRUMENT_ARGS
+            if kwargs.get(arg) is not None
+        )
+        filters = {
+            arg: kwargs[arg]
+            for arg in _DIMENSION_FILTER_ARGS
+            if kwargs.get(arg) is not None
+        }
+        return instrument or None, filters
+
+
+class OrderChangeReport(BatchReport):
+    """Progress and result of OrderService.set_changes."""
+
+    def __init__(self, total):
+        super().__init__(total)
+        self.results = {}
+
+    @property
+    def succeeded(self) -> int:
+        return len(self.results)
+
+    def _summary(self):
+        return ["{0} changed".format(len(self.results))] + super()._summary()
 
 
 class OrderService:
+    dimension_cache = None
+
+    def enable_dimension_cache(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 8 * 3600.0,
+        invalidate_at: datetime.time = datetime.time(7, 30),
+    ) -> DimensionCache:
+        """Caches the responses of get_dimensions for single instruments, see DimensionCache.
+
+        Args:
+            maxsize (int, optional): Maximum number of cached responses. Defaults to 1024.
+            ttl (float, optional): Time to live of a cached response in seconds. Defaults to 8 hours.
+            invalidate_at (datetime.time, optional): Local time of the daily invalidation. Defaults to 07:30.
+
+        Returns:
+            DimensionCache: The cache, e.g. for statistics and invalidation
+        """
+        self.dimension_cache = DimensionCache(maxsize, ttl, invalidate_at)
+        return self.dimension_cache
+
+    def disable_dimension_cache(self):
+        self.dimension_cache = None
+
     def get_dimensions(self, **kwargs) -> Any:
         """7.1.1. Request for the trading venue and order options for a particular instrument.
 
@@ -25,27 +301,16 @@ class OrderService:
         Returns:
             Any: Response object
         """
-        kwargs_mapping = {
-            "instrument_id": "instrumentId",
-            "wkn": "WKN",
-            "isin": "ISIN",
-            "mneomic": "mneomic",
-            "venue_id": "venueId",
-            "side": "side",
-            "order_type": "orderType",
-            "type": "type",
-        }
-
-        url = "{0}/brokerage/v3/orders/dimensions".format(self.api_url)
-        params = {}
-
-        for arg, val in kwargs.items():
-            api_arg = kwargs_mapping.get(arg)
-            if api_arg is None:
-                raise ValueError("Keyword argument {} is invalid".format(arg))
-            else:
-                params[api_arg] = val
-        response = self.session.get(url, json=params).json()
+        url, params = _dimensions_request(self.api_url, kwargs)
+        cache = self.dimension_cache
+        if cache is not None:
+            response = cache.get(kwargs)
+            if response is not None:
+                return response
+
+        response = self.decoder(self.session.get(url, json=params).content)
+        if cache is not None:
+            cache.put(kwargs, response)
         return response
 
     def get_all_orders(
@@ -53,6 +318,8 @@ class OrderService:
         depot_id: str,
         with_instrument: bool = False,
         with_executions: bool = True,
+        as_model: bool = False,
+        raw: bool = False,
         **kwargs
     ) -> Any:
         """7.1.2 Delivers a list fo all orders for the given depotId.
@@ -61,6 +328,9 @@ class OrderService:
             depot_id (str): Reference to securities account number (as UUID).
             with_instrument (bool, optional): Enables attribute: instrument. Defaults to False.
             with_executions (bool, optional): Enables attribute: executions. Defaults to True.
+            as_model (bool, optional): Return a Page of Order models. Defaults to False.
+            raw (bool, optional): Return the undecoded response body, takes precedence over as_model. Defaults to
+                False.
 
         Kwargs: Filter Parameter
             order_status: Status of the order. Available values:
@@ -76,53 +346,36 @@ class OrderService:
             ValueError: If a keyword argument is invalid.
 
         Returns:
-            Any: Response object
+            Any: Response object, or a Page of Order models if as_model, or bytes if raw
         """
-        kwargs_mapping = {
-            "order_status": "orderStatus",
-            "venue_id": "venueId",
-            "side": "side",
-            "order_type": "orderType",
-        }
-
-        url = "{0}/brokerage/depots/{1}/v3/orders".format(self.api_url, depot_id)
-        params = {}
+        url, params = _all_orders_request(
+            self.api_url, depot_id, with_instrument, with_executions, kwargs
+        )
 
-        if with_instrument:
-            params["with-attr"] = "instrument"
-        if not with_executions:
-            params["without-attr"] = "executions"
-
-        for arg, val in kwargs.items():
-            api_arg = kwargs_mapping.get(arg)
-            if api_arg is None:
-                raise ValueError("Keyword argument {} is invalid".format(arg))
-            else:
-                params[api_arg] = val
-
-        response = self.session.get(url, params=params).json()
-        return response
+        response = self.session.get(url, params=params)
+        if raw:
+            return response.content
+        response = self.decoder(response.content)
+        return models.page(models.Order, response) if as_model else response
 
-    def get_order(self, order_id: str) -> Any:
+    def get_order(self, order_id: str, as_model: bool = False) -> Any:
         """7.1.3. Delivers an order for the given orderId.
 
         Args:
             order_id (str): Unique orderId (UUID).
+            as_model (bool, optional): Return an Order model. Defaults to False.
 
         Raises:
             OrderException: If an error occurred.
 
         Returns:
-            Any: Reponse object
+            Any: Reponse object, or an Order model if as_model
         """
-        url = "{0}/brokerage/v3/orders/{1}".format(self.api_url, order_id)
-        params = {}
+        url, params = _order_request(self.api_url, order_id)
 
         response = self.session.get(url, params=params)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise OrderException(response.headers["x-http-response-info"])
+        response = _parse_order_response(response, self.decoder)
+        return models.Order.from_dict(response) if as_model else response
 
     def set_change_validation(self, order_id: str, changed_order: Any) -> Any:
         """7.1.5. Validation of an order modification or order cancellation and triggering of a TAN Challenge in a non-usage
@@ -138,18 +391,9 @@ class OrderService:
         Returns:
             Any: [challenge_id, challenge | None] (if challenge not neccessary: None)
         """
-        url = "{0}/brokerage/v3/orders/{1}/validation".format(self.api_url, order_id)
+        url = _change_validation_request(self.api_url, order_id)
         response = self.session.post(url, json=changed_order)
-        if response.status_code == 201:
-            response_json = json.loads(response.headers["x-once-authentication-info"])
-            typ = response_json["typ"]
-            print("TAN-TYP: {}".format(typ))
-            if typ == "P_TAN" or typ == "M_TAN":
-                return response_json["id"], response_json["challenge"]
-            else:
-                return response_json["id"], None
-        else:
-            raise OrderException(response.headers["x-http-response-info"])
+        return _parse_change_validation(response)
 
     def set_change(
         self, order_id: str, changed_order: Any, challenge_id: str, tan: int = None
@@ -168,19 +412,110 @@ class OrderService:
         Returns:
             Any: Response object
         """
-        url = "{0}/brokerage/v3/orders/{1}".format(self.api_url, order_id)
-        headers = {"x-once-authentication-info": json.dumps({"id": challenge_id})}
-        if tan is not None:
-            headers["x-once-authentication"] = str(tan)
+        url, headers = _change_request(self.api_url, order_id, challenge_id, tan)
 
         response = self.session.patch(url, headers=headers, json=changed_order)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise OrderException(response.headers["x-http-response-info"])
+        return _parse_order_response(response, self.decoder)
+
+    def set_changes(
+        self,
+        changes: Dict[str, Any],
+        max_workers: int = 4,
+        progress: Callable[[OrderChangeReport, str], None] = None,
+    ) -> OrderChangeReport:
+        """Validates and changes many orders concurrently under the active session TAN.
+
+        Every order is validated and then changed, orders are processed by up to max_workers threads and within
+        the rate limit of the client. A failing order does not stop the others, its exception is recorded in the
+        report. Orders whose validation asks for a TAN challenge are not changed.
+
+        Args:
+            changes (Dict[str, Any]): Altered orders from get_order by orderId
+            max_workers (int, optional): Maximum number of orders changed at the same time. Defaults to 4.
+            progress (Callable[[OrderChangeReport, str], None], optional): Called after each finished order with
+                the report and the orderId. Defaults to None.
+
+        Returns:
+            OrderChangeReport: Responses of set_change and exceptions by orderId
+        """
+        report = OrderChangeReport(len(changes))
+        lock = threading.Lock()
+
+        def change(item):
+            order_id, changed_order = item
+            try:
+                result = self.__change_order(order_id, changed_order)
+            except Exception as e:
+                with lock:
+                    report.errors[order_id] = e
+            else:
+                with lock:
+                    report.results[order_id] = result
+            if progress is not None:
+                progress(report, order_id)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for _ in executor.map(change, changes.items()):
+                pass
+        report.finish()
+        return report
+
+    def __change_order(self, order_id, changed_order):
+        url = _change_validation_request(self.api_url, order_id)
+        response = self.session.post(url, json=changed_order)
+        challenge_id, challenge = _parse_change_validation(response, verbose=False)
+        if challenge is not None:
+            raise OrderException(
+                "Change of order {0} requires a TAN for challenge {1}".format(
+                    order_id, challenge_id
+                )
+            )
+        return self.set_change(order_id, changed_order, challenge_id)
 
 
 class OrderException(Exception):
     def __init__(self, response_info):
         self.response_info = response_info
         super().__init__(self.response_info)
+
+
+class AsyncOrderService:
+    async def get_dimensions(self, **kwargs) -> Any:
+        """Awaitable version of OrderService.get_dimensions."""
+        url, params = _dimensions_request(self.api_url, kwargs)
+        response = await self.session.request("GET", url, json=params)
+        return self.decoder(response.content)
+
+    async def get_all_orders(
+        self,
+        depot_id: str,
+        with_instrument: bool = False,
+        with_executions: bool = True,
+        **kwargs
+    ) -> Any:
+        """Awaitable version of OrderService.get_all_orders."""
+        url, params = _all_orders_request(
+            self.api_url, depot_id, with_instrument, with_executions, kwargs
+        )
+        response = await self.session.get(url, params=params)
+        return self.decoder(response.content)
+
+    async def get_order(self, order_id: str) -> Any:
+        """Awaitable version of OrderService.get_order."""
+        url, params = _order_request(self.api_url, order_id)
+        response = await self.session.get(url, params=params)
+        return _parse_order_response(response, self.decoder)
+
+    async def set_change_validation(self, order_id: str, changed_order: Any) -> Any:
+        """Awaitable version of OrderService.set_change_validation."""
+        url = _change_validation_request(self.api_url, order_id)
+        response = await self.session.post(url, json=changed_order)
+        return _parse_change_validation(response)
+
+    async def set_change(
+        self, order_id: str, changed_order: Any, challenge_id: str, tan: int = None
+    ) -> Any:
+        """Awaitable version of OrderService.set_change."""
+        url, headers = _change_request(self.api_url, order_id, challenge_id, tan)
+        response = await self.session.patch(url, headers=headers, json=changed_order)
+        return _parse_order_response(response, self.decoder)
@@ -1,6 +1,16 @@
 from typing import Any, List, Union
 
 
+def _report_request(api_url, product_type):
+    url = "{0}/reports/participants/user/v1/allbalances".format(api_url)
+    params = {}
+    if product_type is not None:
+        params["productType"] = (
+            ",".join(product_type) if type(product_type) is list else product_type
+        )
+    return url, params
+
+
 class ReportService:
     def get_report(self, product_type: Union[str, List[str]] = None) -> Any:
         """10.1.1. List of all balances for a client's own and connected products.
@@ -13,11 +23,14 @@ class ReportService:
         Returns:
             Any: Response object
         """
-        url = "{0}/reports/participants/user/v1/allbalances".format(self.api_url)
-        params = {
-            "productType": ",".join(product_type)
-            if type(product_type) is list
-            else product_type
-        }
-        response = self.session.get(url, params=params).json()
+        url, params = _report_request(self.api_url, product_type)
+        response = self.decoder(self.session.get(url, params=params).content)
         return response
+
+
+class AsyncReportService:
+    async def get_report(self, product_type: Union[str, List[str]] = None) -> Any:
+        """Awaitable version of ReportService.get_report."""
+        url, params = _report_request(self.api_url, product_type)
+        response = await self.session.get(url, params=params)
+        return self.decoder(response.content)
@@ -0,0 +1,305 @@
+from typing import Any, Dict, List
+import datetime
+import hashlib
+import json
+import sqlite3
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    owner_type TEXT NOT NULL,
+    owner_id TEXT NOT NULL,
+    transaction_key TEXT NOT NULL,
+    booking_status TEXT NOT NULL,
+    booking_date TEXT,
+    fingerprint TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (owner_type, owner_id, transaction_key)
+);
+CREATE INDEX IF NOT EXISTS transactions_booking_date ON transactions (owner_type, owner_id, booking_date);
+CREATE TABLE IF NOT EXISTS watermarks (
+    owner_type TEXT NOT NULL,
+    owner_id TEXT NOT NULL,
+    booking_date TEXT,
+    reference TEXT,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (owner_type, owner_id)
+);
+"""
+
+ACCOUNT = "account"
+DEPOT = "depot"
+
+
+class TransactionSync:
+    """Keeps the account and depot transactions of a client in a local SQLite database.
+
+    Each sync of an account only requests the transactions booked since the stored watermark (the latest booking
+    date, minus overlap_days to catch late bookings), deduplicated by their reference. Not yet booked transactions
+    are replaced on every sync, and dropped once the corresponding booked transaction arrives. Depots are synced
+    from the watermark as well, with get_depot_transactions_range as their endpoint only filters by max-bookingDate,
+    deduplicated by transactionId, and a stored transaction is only rewritten when it changed.
+
+    Args:
+        client (ComdirectClient): Client with an active session.
+        database (str, optional): Path of the SQLite database. Defaults to "transactions.sqlite".
+        overlap_days (int, optional): Days before the watermark that are requested again. Defaults to 3.
+    """
+
+    def __init__(
+        self, client, database: str = "transactions.sqlite", overlap_days: int = 3
+    ):
+        self.client = client
+        self.overlap_days = overlap_days
+        self.connection = sqlite3.connect(database)
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def sync_account(
+        self, account_uuid: str, min_booking_date: str = None
+    ) -> Dict[str, int]:
+        """Fetches the new transactions of an account.
+
+        Args:
+            account_uuid (str): Account identifier
+            min_booking_date (str, optional): Start of the history for the first sync in format YYYY-MM-DD.
+                Defaults to None, which means the last 180 days due to an API limitation.
+
+        Returns:
+            Dict[str, int]: Number of new, promoted and currently not booked transactions
+        """
+        watermark = self.watermark(ACCOUNT, account_uuid)
+        if watermark is not None:
+            min_booking_date = self.__overlap(watermark["booking_date"])
+
+        with self.connection:
+            new = 0
+            booked_fingerprints = set()
+            for transaction in self.client.iter_account_transactions(
+                account_uuid, paging_count=500, min_booking_date=min_booking_date
+            ):
+                fingerprint = _account_fingerprint(transaction)
+                key = transaction.get("reference") or fingerprint
+                new += self.__insert(
+                    ACCOUNT,
+                    account_uuid,
+                    key,
+                    "BOOKED",
+                    transaction,
+                    fingerprint,
+                    replace=False,
+                )
+                booked_fingerprints.add(fingerprint)
+
+            promoted = self.__promote(account_uuid, booked_fingerprints)
+
+            not_booked = (
+                self.client.get_account_transactions(
+                    account_uuid, transaction_state="NOTBOOKED", paging_count=500
+                ).get("values")
+                or []
+            )
+            self.connection.execute(
+                "DELETE FROM transactions WHERE owner_type = ? AND owner_id = ? AND booking_status = 'NOTBOOKED'",
+                (ACCOUNT, account_uuid),
+            )
+            for transaction in not_booked:
+                fingerprint = _account_fingerprint(transaction)
+                self.__insert(
+                    ACCOUNT,
+                    account_uuid,
+                    "NOTBOOKED:" + fingerprint,
+                    "NOTBOOKED",
+                    transaction,
+                    fingerprint,
+                )
+
+            self.__update_watermark(ACCOUNT, account_uuid)
+        return {"new": new, "promoted": promoted, "not_booked": len(not_booked)}
+
+    def sync_depot(self, depot_id: str, min_booking_date: str = None) -> Dict[str, int]:
+        """Fetches the transactions of a depot booked since the last sync and stores the new and changed ones.
+
+        Once a watermark exists, the booking date range is fetched with get_depot_transactions_range.
+
+        Args:
+            depot_id (str): Reference to securities account number
+            min_booking_date (str, optional): Start of the history for the first sync in format YYYY-MM-DD.
+                Defaults to None, which requests the whole history at once.
+
+        Returns:
+            Dict[str, int]: Number of new, changed and currently not booked transactions
+        """
+        watermark = self.watermark(DEPOT, depot_id)
+        if watermark is not None:
+            min_booking_date = self.__overlap(watermark["booking_date"])
+        if min_booking_date is None:
+            response = self.client.get_depot_transactions(
+                depot_id, booking_status="BOTH"
+            )
+        else:
+            response = self.client.get_depot_transactions_range(
+                depot_id, min_booking_date, booking_status="BOTH"
+            )
+
+        counts = {"new": 0, "changed": 0, "not_booked": 0}
+        with self.connection:
+            for transaction in response.get("values") or []:
+                status = transaction.get("bookingStatus", "BOOKED")
+                counts["not_booked"] += status == "NOTBOOKED"
+                fingerprint = _fingerprint(transaction)
+                key = transaction.get("transactionId") or fingerprint
+                result = self.__upsert(
+                    DEPOT, depot_id, key, status, transaction, fingerprint
+                )
+                if result is not None:
+                    counts[result] += 1
+            self.__update_watermark(DEPOT, depot_id)
+        return counts
+
+    def account_transactions(
+        self,
+        account_uuid: str,
+        transaction_state: str = "BOTH",
+        min_booking_date: str = None,
+        max_booking_date: str = None,
+    ) -> List[Any]:
+        """Returns the stored transactions of an account, newest first.
+
+        Args:
+            account_uuid (str): Account identifier
+            transaction_state (str, optional): "BOTH", "BOOKED", or "NOTBOOKED". Defaults to "BOTH".
+            min_booking_date (str, optional): min booking date in format YYYY-MM-DD. Defaults to None.
+            max_booking_date (str, optional): max booking date in format YYYY-MM-DD. Defaults to None.
+
+        Returns:
+            List[Any]: Transaction objects
+        """
+        return self.__query(
+            ACCOUNT, account_uuid, transaction_state, min_booking_date, max_booking_date
+        )
+
+    def depot_transactions(
+        self,
+        depot_id: str,
+        booking_status: str = "BOTH",
+        min_booking_date: str = None,
+        max_booking_date: str = None,
+    ) -> List[Any]:
+        """Returns the stored transactions of a depot, newest first. See account_transactions."""
+        return self.__query(
+            DEPOT, depot_id, booking_status, min_booking_date, max_booking_date
+        )
+
+    def watermark(self, owner_type: str, owner_id: str) -> Dict[str, Any]:
+        """Returns booking_date, reference and synced_at of the latest sync, or None if never synced."""
+        row = self.connection.execute(
+            "SELECT booking_date, reference, synced_at FROM watermarks WHERE owner_type = ? AND owner_id = ?",
+            (owner_type, owner_id),
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return {"booking_date": row[0], "reference": row[1], "synced_at": row[2]}
+
+    def __insert(
+        self, owner_type, owner_id, key, status, transaction, fingerprint, replace=True
+    ):
+        cursor = self.connection.execute(
+            "INSERT OR {0} INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?)".format(
+                "REPLACE" if replace else "IGNORE"
+            ),
+            (
+                owner_type,
+                owner_id,
+                key,
+                status,
+                transaction.get("bookingDate"),
+                fingerprint,
+                json.dumps(transaction, separators=(",", ":")),
+            ),
+        )
+        return cursor.rowcount
+
+    def __upsert(self, owner_type, owner_id, key, status, transaction, fingerprint):
+        """Stores a transaction unless it is stored unchanged, returns "new", "changed" or None."""
+        row = self.connection.execute(
+            "SELECT fingerprint FROM transactions "
+            "WHERE owner_type = ? AND owner_id = ? AND transaction_key = ?",
+            (owner_type, owner_id, key),
+        ).fetchone()
+        if row is not None and row[0] == fingerprint:
+            return None
+        self.__insert(owner_type, owner_id, key, status, transaction, fingerprint)
+        return "new" if row is None else "changed"
+
+    def __promote(self, account_uuid, booked_fingerprints):
+        rows = self.connection.execute(
+            "SELECT fingerprint FROM transactions "
+            "WHERE owner_type = ? AND owner_id = ? AND booking_status = 'NOTBOOKED'",
+            (ACCOUNT, account_uuid),
+        ).fetchall()
+        return sum(1 for (fingerprint,) in rows if fingerprint in booked_fingerprints)
+
+    def __update_watermark(self, owner_type, owner_id):
+        row = self.connection.execute(
+            "SELECT booking_date, transaction_key FROM transactions "
+            "WHERE owner_type = ? AND owner_id = ? AND booking_status = 'BOOKED' "
+            "ORDER BY booking_date DESC LIMIT 1",
+            (owner_type, owner_id),
+        ).fetchone()
+        booking_date, reference = row if row is not None else (None, None)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?, ?)",
+            (owner_type, owner_id, booking_date, reference, time.time()),
+        )
+
+    def __query(self, owner_type, owner_id, status, min_booking_date, max_booking_date):
+        sql = "SELECT payload FROM transactions WHERE owner_type = ? AND owner_id = ?"
+        params = [owner_type, owner_id]
+        if status != "BOTH":
+            sql += " AND booking_status = ?"
+            params.append(status)
+        if min_booking_date is not None:
+            sql += " AND booking_date >= ?"
+            params.append(min_booking_date)
+        if max_booking_date is not None:
+            sql += " AND booking_date <= ?"
+            params.append(max_booking_date)
+        sql += " ORDER BY booking_date IS NOT NULL, booking_date DESC"
+        return [
+            json.loads(payload) for (payload,) in self.connection.execute(sql, params)
+        ]
+
+    def __overlap(self, booking_date):
+        start = datetime.datetime.strptime(booking_date, "%Y-%m-%d").date()
+        return (start - datetime.timedelta(days=self.overlap_days)).isoformat()
+
+
+def _account_fingerprint(transaction):
+    # fields that do not change when a transaction gets booked
+    amount = transaction.get("amount") or {}
+    transaction_type = transaction.get("transactionType") or {}
+    return _fingerprint(
+        {
+            "amount": amount.get("value"),
+            "unit": amount.get("unit"),
+            "remittanceInfo": transaction.get("remittanceInfo"),
+            "transactionType": transaction_type.get("key"),
+            "remitter": transaction.get("remitter"),
+            "creditor": transaction.get("creditor"),
+            "deptor": transaction.get("deptor"),
+        }
+    )
+
+
+def _fingerprint(values):
+    serialized = json.dumps(values, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(serialized.encode("utf-8")).hexdigest()
@@ -0,0 +1,240 @@
+from typing import Any, Dict, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+DEPOT = "depot"
+INSTRUMENT_TYPE = "instrument_type"
+CURRENCY = "currency"
+
+_FIELDS = (
+    "quantity",
+    "price",
+    "purchase_value",
+    "market_value",
+    "profit_loss_prev_day",
+)
+
+
+class _Codes:
+    """Maps the labels of a group to stable integer codes."""
+
+    def __init__(self):
+        self.labels = []
+        self._codes = {}
+
+    def code(self, label):
+        code = self._codes.get(label)
+        if code is None:
+            code = self._codes[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+
+class PortfolioValuation:
+    """Aggregates the securities positions of several depots in NumPy arrays.
+
+    Every position is one row of column arrays for quantity, price, purchase value, market value and the profit or
+    loss since the previous day, plus integer codes for depot, instrument type and currency. Updating a depot or a
+    single position only rewrites the affected rows, totals, weights and the groups are computed over the columns
+    with vectorized operations. Rows of removed positions are reused.
+
+    The instrument type is read from the instrument of the position, request the positions with
+    with_instrument=True to group by it. The currency is the one of the current price, market and purchase values
+    are taken from the API in the depot currency.
+
+    Args:
+        capacity (int, optional): Initial number of rows, grows as needed. Defaults to 64.
+    """
+
+    def __init__(self, capacity: int = 64):
+        if np is None:
+            raise ImportError(
+                "The valuation requires numpy, install it with 'pip install comdirect-api-simple[export]'"
+            )
+        self._rows = {}
+        self._free = []
+        self._size = 0
+        self._depot_keys = {}
+        self._codes = {DEPOT: _Codes(), INSTRUMENT_TYPE: _Codes(), CURRENCY: _Codes()}
+        self._active = np.zeros(capacity, dtype=bool)
+        self._columns = {name: np.zeros(capacity) for name in _FIELDS}
+        self._groups = {name: np.zeros(capacity, dtype=np.intp) for name in self._codes}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def update(self, response: Any, depot_id: str = None):
+        """Replaces the positions of a depot with a response of get_depot_positions.
+
+        Positions of the depot that are missing in the response are removed.
+
+        Args:
+            response (Any): Response object of get_depot_positions
+            depot_id (str, optional): Depot of the positions, if they do not contain the depotId. Defaults to None.
+        """
+        keys = set()
+        for position in response.get("values") or []:
+            keys.add(self.update_position(position, depot_id))
+        if depot_id is None:
+            depot = (response.get("aggregated") or {}).get("depot") or {}
+            depot_id = depot.get("depotId")
+        depots = {key[0] for key in keys}
+        if depot_id is not None:
+            depots.add(depot_id)
+        for depot in depots:
+            for key in self._depot_keys.get(depot, set()) - keys:
+                self.remove_position(*key)
+
+    def update_all(self, positions: Union[Dict[str, Any], Tuple[Dict[str, Any], Dict]]):
+        """Updates the depots with the positions by depot id returned by get_all_depot_positions.
+
+        Args:
+            positions (Union[Dict[str, Any], Tuple[Dict[str, Any], Dict]]): The (positions, errors) tuple of
+                get_all_depot_positions or only its positions. Failed depots keep their previous positions.
+        """
+        if isinstance(positions, tuple):
+            positions, _ = positions
+        for depot_id, response in positions.items():
+            self.update(response, depot_id)
+
+    def update_position(self, position: Any, depot_id: str = None):
+        """Adds or replaces one position, e.g. a response of get_position. Returns its (depotId, positionId)."""
+        key = (position.get("depotId") or depot_id, position["positionId"])
+        row = self._rows.get(key)
+        if row is None:
+            row = self.__allocate()
+            self._rows[key] = row
+            self._depot_keys.setdefault(key[0], set()).add(key)
+
+        price = position.get("currentPrice") or {}
+        values = (
+            _number(position.get("quantity")),
+            _number(price.get("price")),
+            _number(position.get("purchaseValue")),
+            _number(position.get("currentValue")),
+            _number(position.get("profitLossPrevDayAbs")),
+        )
+        for name, value in zip(_FIELDS, values):
+            self._columns[name][row] = value
+        labels = (key[0], _instrument_type(position), _unit(price.get("price")))
+        for (name, codes), label in zip(self._codes.items(), labels):
+            self._groups[name][row] = codes.code(label)
+        self._active[row] = True
+        return key
+
+    def remove_position(self, depot_id: str, position_id: str):
+        row = self._rows.pop((depot_id, position_id), None)
+        if row is None:
+            return
+        self._depot_keys[depot_id].discard((depot_id, position_id))
+        self._active[row] = False
+        for column in self._columns.values():
+            column[row] = 0.0
+        self._free.append(row)
+
+    def remove_depot(self, depot_id: str):
+        for key in list(self._depot_keys.get(depot_id, ())):
+            self.remove_position(*key)
+
+    @property
+    def market_value(self) -> float:
+        return float(self._columns["market_value"].sum())
+
+    @property
+    def purchase_value(self) -> float:
+        return float(self._columns["purchase_value"].sum())
+
+    @property
+    def profit_loss(self) -> float:
+        """Unrealized profit or loss of all positions against their purchase value."""
+        return self.market_value - self.purchase_value
+
+    @property
+    def profit_loss_prev_day(self) -> float:
+        return float(self._columns["profit_loss_prev_day"].sum())
+
+    def weights(self) -> Dict[tuple, float]:
+        """Returns the share of each position in the total market value by (depotId, positionId)."""
+        weights = self._columns["market_value"] / (self.market_value or 1.0)
+        return {key: float(weights[row]) for key, row in self._rows.items()}
+
+    def group(self, by: str = INSTRUMENT_TYPE) -> Dict[str, Dict[str, float]]:
+        """Returns market value, purchase value, profit or loss and weight per depot, instrument type or currency.
+
+        Args:
+            by (str, optional): DEPOT, INSTRUMENT_TYPE or CURRENCY. Defaults to INSTRUMENT_TYPE.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Values per group label, groups without positions are left out
+        """
+        codes = self._codes[by]
+        groups = self._groups[by][: self._size]
+        active = self._active[: self._size]
+        length = len(codes.labels)
+        count = np.bincount(groups, weights=active, minlength=length)
+        market_value = np.bincount(
+            groups,
+            weights=self._columns["market_value"][: self._size],
+            minlength=length,
+        )
+        purchase_value = np.bincount(
+            groups,
+            weights=self._columns["purchase_value"][: self._size],
+            minlength=length,
+        )
+        total = market_value.sum() or 1.0
+        return {
+            label: {
+                "positions": int(count[code]),
+                "market_value": float(market_value[code]),
+                "purchase_value": float(purchase_value[code]),
+                "profit_loss": float(market_value[code] - purchase_value[code]),
+                "weight": float(market_value[code] / total),
+            }
+            for code, label in enumerate(codes.labels)
+            if count[code]
+        }
+
+    def by_instrument_type(self) -> Dict[str, Dict[str, float]]:
+        return self.group(INSTRUMENT_TYPE)
+
+    def by_currency(self) -> Dict[str, Dict[str, float]]:
+        return self.group(CURRENCY)
+
+    def __allocate(self):
+        if self._free:
+            return self._free.pop()
+        if self._size == len(self._active):
+            capacity = max(2 * self._size, 1)
+            self._active = _grow(self._active, capacity)
+            self._columns = {
+                name: _grow(column, capacity) for name, column in self._columns.items()
+            }
+            self._groups = {
+                name: _grow(column, capacity) for name, column in self._groups.items()
+            }
+        self._size += 1
+        return self._size - 1
+
+
+def _grow(array, capacity):
+    grown = np.zeros(capacity, dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
+
+
+def _number(amount):
+    value = amount.get("value") if amount else None
+    return float(value) if value is not None else 0.0
+
+
+def _unit(amount):
+    return (amount.get("unit") if amount else None) or ""
+
+
+def _instrument_type(position):
+    static_data = (position.get("instrument") or {}).get("staticData") or {}
+    return static_data.get("instrumentType") or ""
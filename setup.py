@@ -16,6 +16,11 @@ setuptools.setup(
     install_requires=[
         'requests',
     ],
+    extras_require={
+        'async': ['httpx'],
+        'export': ['numpy'],
+        'http2': ['httpx[http2]>=0.26'],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -0,0 +1,51 @@
+import json
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from comdirect_api.comdirect_client import ComdirectClient
+
+
+class MockTransport:
+    """Replaces ComdirectAdapter.transmit to answer requests with a handler instead of the network.
+
+    The handler is called with (method, path, params) and returns a tuple (status_code, body[, headers]).
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+
+    def __call__(self, request, **kwargs):
+        self.requests.append(request)
+        split = urlsplit(request.url)
+        result = self.handler(request.method, split.path, dict(parse_qsl(split.query)))
+        status_code, body = result[0], result[1]
+        headers = result[2] if len(result) > 2 else {}
+
+        response = Response()
+        response.status_code = status_code
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = (
+            body if isinstance(body, bytes) else json.dumps(body).encode()
+        )
+        response._content_consumed = True
+        response.request = request
+        response.url = request.url
+        response.reason = "OK"
+        return response
+
+
+@pytest.fixture
+def mock_client():
+    """Returns a factory for a ComdirectClient whose requests are answered by the given handler."""
+
+    def create(handler):
+        client = ComdirectClient("dummy_id", "dummy_secret")
+        transport = MockTransport(handler)
+        client.adapter.transmit = transport
+        return client, transport
+
+    return create
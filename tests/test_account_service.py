@@ -0,0 +1,96 @@
+import threading
+import time
+
+
+def test_iter_account_transactions_follows_paging(mock_client):
+    transactions = [{"reference": str(i)} for i in range(25)]
+
+    def handler(method, path, params):
+        first = int(params["paging-first"])
+        count = int(params["paging-count"])
+        assert params["transactionState"] == "BOOKED"
+        return 200, {
+            "paging": {"index": first, "matches": len(transactions)},
+            "values": transactions[first : first + count],
+        }
+
+    client, adapter = mock_client(handler)
+
+    result = list(client.iter_account_transactions("account-id", paging_count=10))
+
+    assert result == transactions
+    assert len(adapter.requests) == 3
+
+
+def test_iter_account_transaction_pages_prefetches_one_page(mock_client):
+    transactions = [{"reference": str(i)} for i in range(6)]
+    lock = threading.Lock()
+    requested = []
+    in_flight = [0, 0]
+    page_one_yielded = threading.Event()
+
+    def handler(method, path, params):
+        first = int(params["paging-first"])
+        with lock:
+            requested.append(first)
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        if first == 2:
+            # page 2 is only answered once page 1 reached the caller
+            assert page_one_yielded.wait(5)
+        with lock:
+            in_flight[0] -= 1
+        return 200, {
+            "paging": {"index": first, "matches": len(transactions)},
+            "values": transactions[first : first + 2],
+        }
+
+    client, adapter = mock_client(handler)
+    pages = client.iter_account_transaction_pages("account-id", paging_count=2)
+
+    page = next(pages)
+    assert page["values"] == transactions[:2]
+    deadline = time.time() + 5
+    while requested != [0, 2] and time.time() < deadline:
+        time.sleep(0.01)
+    # page 2 is fetched in the background, page 3 not before page 2 is consumed
+    assert requested == [0, 2]
+    page_one_yielded.set()
+
+    assert [p["values"] for p in pages] == [transactions[2:4], transactions[4:]]
+    assert requested == [0, 2, 4]
+    assert in_flight == [0, 1]
+
+
+def test_get_account_transactions_range_merges_windows(mock_client):
+    transactions = [
+        {
+            "reference": "r{0}".format(i),
+            "bookingDate": "2020-{0:02d}-15".format(i % 12 + 1),
+        }
+        for i in range(24)
+    ]
+    windows = []
+
+    def handler(method, path, params):
+        windows.append((params["min-bookingDate"], params["max-bookingDate"]))
+        values = [
+            transaction
+            for transaction in transactions
+            if params["min-bookingDate"]
+            <= transaction["bookingDate"]
+            <= params["max-bookingDate"]
+        ]
+        return 200, {"paging": {"index": 0, "matches": len(values)}, "values": values}
+
+    client, transport = mock_client(handler)
+
+    response = client.get_account_transactions_range(
+        "a1", "2020-01-01", "2020-12-31", window_days=31, max_workers=2, paging_count=4
+    )
+
+    dates = [transaction["bookingDate"] for transaction in response["values"]]
+    assert dates == sorted(dates)
+    assert len(response["values"]) == 24
+    assert min(windows)[0] == "2020-01-01"
+    assert max(windows)[1] == "2020-12-31"
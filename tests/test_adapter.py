@@ -0,0 +1,128 @@
+import pickle
+import ssl
+
+import pytest
+import requests
+
+from comdirect_api import adapter as adapter_module
+from comdirect_api.adapter import ComdirectAdapter
+from comdirect_api.auth.comdirect_auth import ComdirectAuth
+from comdirect_api.service.order_service import OrderException
+from tests.conftest import MockTransport
+
+
+def test_adapter_retries_transient_errors(mock_client):
+    statuses = [503, 429, 200]
+
+    def handler(method, path, params):
+        status = statuses.pop(0)
+        return status, {"status": status}, {"Retry-After": "0"} if status == 429 else {}
+
+    client, transport = mock_client(handler)
+    retry = client.enable_retries(backoff_factor=0)
+
+    assert client.get_all_balances() == {"status": 200}
+    assert retry.stats() == {
+        "retries": 2,
+        "backoff_time": 0.0,
+        "token_refreshes": 0,
+        "exhausted": 0,
+    }
+
+
+def test_adapter_never_retries_writes(mock_client):
+    def handler(method, path, params):
+        return 503, {}, {"x-http-response-info": "unavailable"}
+
+    client, transport = mock_client(handler)
+    client.enable_retries(backoff_factor=0)
+
+    with pytest.raises(OrderException):
+        client.set_change_validation("order-id", {})
+    assert len(transport.requests) == 1
+
+
+def test_adapter_refreshes_token_on_unauthorized(mock_client):
+    responses = iter([(401, {})])
+
+    def handler(method, path, params):
+        if path == "/oauth/token":
+            return 200, {
+                "access_token": "new",
+                "refresh_token": "refresh",
+                "expires_in": 599,
+            }
+        return next(responses, (200, {}))
+
+    client, transport = mock_client(handler)
+    client.auth_service.auth = client.session.auth = ComdirectAuth(
+        "old", "refresh", 599
+    )
+
+    assert client.get_all_depots() == {}
+    assert [request.headers["Authorization"] for request in transport.requests] == [
+        "Bearer old",
+        "Bearer old",
+        "Bearer new",
+    ]
+    assert client.adapter.retry.token_refreshes == 1
+
+
+def test_adapter_applies_connection_settings():
+    adapter = ComdirectAdapter(pool_maxsize=32, timeout=5.0, keep_alive=False)
+    timeouts = []
+    transport = MockTransport(lambda method, path, params: (200, {}))
+    adapter.transmit = lambda request, **kwargs: (
+        timeouts.append(kwargs["timeout"]) or transport(request)
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+
+    session.get("https://api.comdirect.de/api/banking/v1/accounts")
+
+    assert timeouts == [5.0]
+    assert transport.requests[0].headers["Connection"] == "close"
+    restored = pickle.loads(pickle.dumps(adapter))
+    assert (restored.timeout, restored.keep_alive, restored._pool_maxsize) == (
+        5.0,
+        False,
+        32,
+    )
+
+
+def test_adapter_sends_http2_requests_with_httpx(monkeypatch):
+    httpx = pytest.importorskip("httpx")
+    http_client = httpx.Client
+    created = []
+
+    def handler(request):
+        assert request.headers["x-test"] == "1"
+        return httpx.Response(200, json={"path": request.url.path})
+
+    def client(proxy=None, http2=False, **kwargs):
+        created.append(dict(kwargs, proxy=proxy, http2=http2))
+        return http_client(transport=httpx.MockTransport(handler), **kwargs)
+
+    monkeypatch.setattr(adapter_module.httpx, "Client", client)
+    adapter = ComdirectAdapter(http2=True)
+    session = requests.Session()
+    session.trust_env = False
+    session.mount("https://", adapter)
+
+    url = "https://api.comdirect.de/api/banking/v1/accounts"
+    response = session.get(url, headers={"x-test": "1"})
+
+    assert response.status_code == 200
+    assert response.json() == {"path": "/api/banking/v1/accounts"}
+    assert b"".join(response.iter_content(4)) == response.content
+    assert created[0]["http2"] and created[0]["proxy"] is None
+    assert created[0]["verify"].verify_mode == ssl.CERT_REQUIRED
+
+    session.get(url, headers={"x-test": "1"})
+    session.verify = False
+    session.proxies = {"https": "http://proxy:3128"}
+    session.get(url, headers={"x-test": "1"})
+
+    assert len(created) == 2
+    assert created[1]["proxy"] == "http://proxy:3128"
+    assert created[1]["verify"].verify_mode == ssl.CERT_NONE
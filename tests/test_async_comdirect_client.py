@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from comdirect_api.async_comdirect_client import AsyncComdirectClient  # noqa: E402
+
+
+def handler(request):
+    path = request.url.path
+    if path == "/oauth/token":
+        return httpx.Response(
+            200, json={"access_token": "access", "refresh_token": "refresh"}
+        )
+    if path == "/api/session/clients/user/v1/sessions":
+        return httpx.Response(200, json=[{"identifier": "session-id"}])
+    if path.endswith("/validate"):
+        auth_info = json.dumps({"id": "challenge-id", "typ": "P_TAN_PUSH"})
+        return httpx.Response(201, headers={"x-once-authentication-info": auth_info})
+    if path == "/api/session/clients/user/v1/sessions/session-id":
+        return httpx.Response(200, json={})
+    return httpx.Response(200, json={"path": path, "params": dict(request.url.params)})
+
+
+def test_async_comdirect_client_requests():
+    async def run():
+        client = AsyncComdirectClient("dummy_id", "dummy_secret")
+        client.session._transport = httpx.MockTransport(handler)
+
+        assert await client.fetch_tan("user", "pin") is None
+        await client.activate_session()
+        balances, transactions = await asyncio.gather(
+            client.get_all_balances(),
+            client.get_account_transactions("account-id", paging_count=50),
+        )
+        await client.close()
+        return client, balances, transactions
+
+    loop = asyncio.new_event_loop()
+    try:
+        client, balances, transactions = loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+    assert client.auth_service.session_identifier == "session-id"
+    assert client.auth_service.auth.access_token == "access"
+    assert balances["path"] == "/api/banking/clients/user/v2/accounts/balances"
+    assert transactions["path"] == "/api/banking/v1/accounts/account-id/transactions"
+    assert transactions["params"] == {
+        "transactionState": "BOTH",
+        "paging-count": "50",
+        "paging-first": "0",
+    }
+
+
+def test_async_comdirect_client_refreshes_once():
+    refreshes = []
+    authorizations = []
+
+    async def refresh_handler(request):
+        if request.url.path == "/oauth/token":
+            if b"grant_type=refresh_token" in request.content:
+                refreshes.append(request.content)
+                # lets the other calls run while the refresh is in flight
+                await asyncio.sleep(0.01)
+            number = len(refreshes)
+            return httpx.Response(
+                200,
+                json={
+                    "access_token": "access-{0}".format(number),
+                    "refresh_token": "refresh-{0}".format(number),
+                    "expires_in": 599,
+                },
+            )
+        authorizations.append(request.headers.get("Authorization"))
+        return handler(request)
+
+    async def run():
+        client = AsyncComdirectClient("dummy_id", "dummy_secret")
+        client.session._transport = httpx.MockTransport(refresh_handler)
+        await client.fetch_tan("user", "pin")
+        await client.activate_session()
+
+        await asyncio.gather(*(client.refresh_token() for _ in range(5)))
+        assert len(refreshes) == 1
+
+        client.auth_service.auth.expires_at = 0
+        del authorizations[:]
+        await asyncio.gather(*(client.get_all_balances() for _ in range(5)))
+        await client.close()
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+    assert len(refreshes) == 2
+    assert authorizations == ["Bearer access-2"] * 5
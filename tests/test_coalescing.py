@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+
+def test_concurrent_identical_requests_share_one_request(mock_client):
+    release = threading.Event()
+
+    def handler(method, path, params):
+        release.wait(5)
+        return 200, {"values": [{"positionId": "P1"}]}
+
+    client, transport = mock_client(handler)
+    coalescer = client.enable_coalescing()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(client.get_depot_positions, "D1") for _ in range(8)]
+        for _ in range(500):
+            if coalescer.coalesced == 7:
+                break
+            time.sleep(0.01)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(transport.requests) == 1
+    assert all(result == {"values": [{"positionId": "P1"}]} for result in results)
+    assert coalescer.stats()["coalesced"] == 7
+
+    client.get_depot_positions("D1")
+    assert len(transport.requests) == 2
+
+
+def test_requests_with_different_bodies_are_not_coalesced(mock_client):
+    release = threading.Event()
+
+    def handler(method, path, params):
+        release.wait(5)
+        return 200, {"values": []}
+
+    client, transport = mock_client(handler)
+    coalescer = client.enable_coalescing()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(client.get_dimensions, instrument_id=instrument_id)
+            for instrument_id in ("I1", "I2")
+        ]
+        for _ in range(500):
+            if len(transport.requests) == 2:
+                break
+            time.sleep(0.01)
+        release.set()
+        [future.result() for future in futures]
+
+    assert sorted(request.body for request in transport.requests) == [
+        b'{"instrumentId": "I1"}',
+        b'{"instrumentId": "I2"}',
+    ]
+    assert coalescer.coalesced == 0
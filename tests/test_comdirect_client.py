@@ -1,6 +1,13 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 
+import pytest
+
+from comdirect_api.adapter import ComdirectAdapter
+from comdirect_api.auth.auth_service import AuthenticationException
+from comdirect_api.auth.comdirect_auth import ComdirectAuth
 from comdirect_api.comdirect_client import ComdirectClient
+from tests.conftest import MockTransport
 
 
 def test_comdirect_client_fresh_init():
@@ -37,3 +44,76 @@ def test_comdirect_client_import_session(tmp_path):
 
     assert new_client.auth_service.client_id == client_id
     assert new_client.auth_service.client_secret == client_secret
+
+
+def test_comdirect_client_refreshes_expiring_token_once(mock_client):
+    token_requests = []
+
+    def handler(method, path, params):
+        if path == "/oauth/token":
+            token_requests.append(path)
+            expires_in = 0 if len(token_requests) == 2 else 599
+            return 200, {"access_token": "access{}".format(len(token_requests)), "refresh_token": "refresh",
+                         "expires_in": expires_in}
+        if path == "/api/session/clients/user/v1/sessions":
+            return 200, [{"identifier": "session-id"}]
+        if path.endswith("/validate"):
+            return 201, {}, {"x-once-authentication-info": '{"id": "challenge-id", "typ": "P_TAN_PUSH"}'}
+        return 200, {"values": []}
+
+    client, adapter = mock_client(handler)
+    client.fetch_tan("user", "pin")
+    client.activate_session()
+    assert client.auth_service.auth.expires_soon()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: client.get_all_balances(), range(16)))
+
+    assert len(token_requests) == 3
+    assert not client.auth_service.auth.expires_soon()
+    assert adapter.requests[-1].headers["Authorization"] == "Bearer access3"
+
+
+def test_comdirect_client_import_json_session(tmp_path, monkeypatch):
+    filename = os.path.join(tmp_path, "session.json")
+    client = ComdirectClient("dummy_id", "dummy_secret")
+    client.auth_service.auth = ComdirectAuth("access", "refresh", expires_in=599)
+    client.auth_service.session_identifier = "session-identifier"
+    client.session_export(filename)
+
+    with open(filename) as input:
+        assert "dummy_secret" not in input.read()
+
+    new_client = ComdirectClient("dummy_id", "dummy_secret", import_session=filename)
+
+    auth = new_client.auth_service.auth
+    assert new_client.session.auth is auth
+    assert (auth.access_token, auth.session_id) == ("access", client.auth_service.auth.session_id)
+    assert new_client.auth_service.session_identifier == "session-identifier"
+
+    # an expired access token is refreshed on load
+    client.auth_service.auth.expires_at = 0
+    client.session_export(filename)
+    transport = MockTransport(lambda method, path, params: (
+        200, {"access_token": "access2", "refresh_token": "refresh2", "expires_in": 599}))
+    monkeypatch.setattr(ComdirectAdapter, "transmit", transport)
+
+    new_client = ComdirectClient("dummy_id", "dummy_secret", import_session=filename)
+
+    assert new_client.auth_service.auth.access_token == "access2"
+    assert not new_client.auth_service.auth.expires_soon()
+    assert transport.requests[0].body == (
+        "client_id=dummy_id&client_secret=dummy_secret&grant_type=refresh_token&refresh_token=refresh"
+    )
+
+
+def test_comdirect_client_json_session_errors(tmp_path):
+    filename = os.path.join(tmp_path, "session.json")
+    client = ComdirectClient("dummy_id", "dummy_secret")
+
+    with pytest.raises(AuthenticationException):
+        client.session_export(filename)
+    assert not os.path.exists(filename)
+
+    with pytest.raises(FileNotFoundError):
+        ComdirectClient("dummy_id", "dummy_secret", import_session=filename)
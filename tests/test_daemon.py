@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from comdirect_api import daemon as daemon_module
+from comdirect_api.auth.auth_service import AuthenticationException
+from comdirect_api.daemon import ComdirectDaemon, DaemonClient, service_methods
+from comdirect_api.service.date_range import DateRangeException
+from comdirect_api.service.order_service import OrderException
+
+
+def test_service_methods(mock_client):
+    client, _ = mock_client(lambda method, path, params: (200, {}))
+
+    methods = service_methods(client)
+
+    assert {"get", "get_all_balances", "get_depot_positions", "set_changes"} <= methods
+    assert not {"fetch_tan", "activate_session", "session_export", "close"} & methods
+
+
+def test_daemon_serves_client_methods(mock_client, tmp_path):
+    def handler(method, path, params):
+        if path.endswith("/balances"):
+            return 200, {
+                "paging": {"index": 0, "matches": 1},
+                "values": [{"accountId": "A1"}],
+            }
+        return 200, {"paging": {"index": 0, "matches": 0}, "values": []}
+
+    client, transport = mock_client(handler)
+    path = str(tmp_path / "comdirect.sock")
+
+    with ComdirectDaemon(client, path) as daemon, DaemonClient(path) as proxy:
+        assert proxy.get_all_balances()["values"] == [{"accountId": "A1"}]
+        assert proxy.get_all_balances(as_model=True)[0].account_id == "A1"
+        assert list(proxy.iter_account_transactions("A1")) == []
+        with pytest.raises(AttributeError):
+            proxy.session_export("stolen.pkl")
+        assert proxy.get(
+            "banking/clients/user/v2/accounts/balances", raw=True
+        ).startswith(b"{")
+
+    assert daemon.calls == 5
+    assert daemon.errors == 1
+    assert len(transport.requests) == 4
+    assert not (tmp_path / "comdirect.sock").exists()
+
+
+def test_client_refuses_daemon_of_other_user(mock_client, tmp_path, monkeypatch):
+    client, transport = mock_client(lambda method, path, params: (200, {}))
+    path = str(tmp_path / "comdirect.sock")
+
+    with ComdirectDaemon(client, path) as daemon:
+        uid = os.getuid()
+        monkeypatch.setattr(os, "getuid", lambda: uid + 1)
+        with pytest.raises(PermissionError):
+            DaemonClient(path).get_all_balances()
+        monkeypatch.undo()
+
+    assert daemon.calls == 0
+
+
+def test_default_directory_must_be_private(tmp_path, monkeypatch):
+    directory = tmp_path / "comdirect"
+    monkeypatch.setattr(daemon_module, "DEFAULT_DIRECTORY", str(directory))
+    path = str(directory / "comdirect.sock")
+
+    daemon_module._check_directory(path, create=True)
+    assert directory.stat().st_mode & 0o777 == 0o700
+
+    directory.chmod(0o755)
+    with pytest.raises(PermissionError):
+        DaemonClient(path).get_all_balances()
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        AuthenticationException({"messages": []}),
+        OrderException({"messages": []}),
+        DateRangeException("2021-01-04", 2),
+    ],
+)
+def test_daemon_raises_library_exceptions(mock_client, tmp_path, error):
+    client, _ = mock_client(lambda method, path, params: (200, {}))
+
+    def fail(*args, **kwargs):
+        raise error
+
+    client.get_all_balances = fail
+    path = str(tmp_path / "comdirect.sock")
+
+    with ComdirectDaemon(client, path), DaemonClient(path) as proxy:
+        with pytest.raises(type(error)) as info:
+            proxy.get_all_balances()
+
+    assert info.value.args == error.args
+    assert vars(info.value) == vars(error)
@@ -0,0 +1,28 @@
+import json
+
+import pytest
+
+from comdirect_api import decoding
+
+
+def test_get_decoder_falls_back_to_stdlib():
+    assert decoding.get_decoder(decoding.JSON) is json.loads
+    assert decoding.get_decoder("auto")(b'{"a": ["1.5"]}') == {"a": ["1.5"]}
+    with pytest.raises(ValueError):
+        decoding.get_decoder("yaml")
+
+
+def test_services_use_client_decoder_and_raw_mode(mock_client):
+    body = {"paging": {"index": 0, "matches": 1}, "values": [{"reference": "1"}]}
+    client, _ = mock_client(lambda method, path, params: (200, body))
+    decoded = []
+    client.decoder = lambda content: decoded.append(content) or json.loads(content)
+
+    assert client.get_account_transactions("account-id") == body
+    assert client.get("banking/v1/accounts/account-id/transactions") == body
+    assert len(decoded) == 2
+
+    raw = client.get_account_transactions("account-id", as_model=True, raw=True)
+    assert raw == json.dumps(body).encode()
+    assert client.get("some/endpoint", raw=True) == raw
+    assert len(decoded) == 2
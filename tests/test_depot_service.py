@@ -0,0 +1,82 @@
+import datetime
+
+import pytest
+
+from comdirect_api.service.date_range import DateRangeException
+
+
+def test_get_all_depot_positions_collects_errors(mock_client):
+    def handler(method, path, params):
+        if path.endswith("/depots"):
+            return 200, {
+                "values": [{"depotId": "d1"}, {"depotId": "d2"}, {"depotId": "broken"}]
+            }
+        depot_id = path.split("/")[-2]
+        if depot_id == "broken":
+            return 200, b"not json"
+        assert params["with_attr"] == "instrument"
+        return 200, {"depotId": depot_id, "values": []}
+
+    client, adapter = mock_client(handler)
+
+    positions, errors = client.get_all_depot_positions(
+        with_instrument=True, max_workers=2
+    )
+
+    assert set(positions) == {"d1", "d2"}
+    assert positions["d1"]["depotId"] == "d1"
+    assert set(errors) == {"broken"}
+
+
+def test_get_depot_transactions_range_walks_back_from_the_end(mock_client):
+    transactions = [
+        {
+            "transactionId": "t{0}".format(day),
+            "bookingDate": "2021-01-{0:02d}".format(day),
+        }
+        for day in range(31, 0, -1)
+    ]
+
+    def handler(method, path, params):
+        assert params["bookingStatus"] == "BOTH"
+        assert "min-bookingDate" not in params
+        values = [
+            transaction
+            for transaction in transactions
+            if transaction["bookingDate"] <= params["max-bookingDate"]
+        ]
+        # the API returns the newest 4 transactions, and a pending one in every response
+        pending = {"transactionId": "pending", "bookingDate": None}
+        return 200, {
+            "paging": {"index": 0, "matches": len(values) + 1},
+            "values": [pending] + values[:4],
+        }
+
+    client, transport = mock_client(handler)
+
+    response = client.get_depot_transactions_range(
+        "d1", "2021-01-10", datetime.date(2021, 1, 31), booking_status="BOTH"
+    )
+
+    assert [t["transactionId"] for t in response["values"]] == [
+        "t{0}".format(day) for day in range(10, 32)
+    ] + ["pending"]
+    assert response["paging"]["matches"] == 23
+    ends = [r.url.split("max-bookingDate=")[1][:10] for r in transport.requests]
+    assert ends[:3] == ["2021-01-31", "2021-01-28", "2021-01-25"]
+    assert len(ends) == 8
+
+
+def test_get_depot_transactions_range_raises_for_incomplete_day(mock_client):
+    def handler(method, path, params):
+        values = [
+            {"transactionId": str(i), "bookingDate": params["max-bookingDate"]}
+            for i in range(2)
+        ]
+        return 200, {"paging": {"index": 0, "matches": 3}, "values": values}
+
+    client, transport = mock_client(handler)
+
+    with pytest.raises(DateRangeException) as info:
+        client.get_depot_transactions_range("d1", "2021-01-01", "2021-01-04")
+    assert info.value.returned == 2
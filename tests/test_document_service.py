@@ -0,0 +1,75 @@
+import os
+
+
+def test_download_documents_skips_complete_files(mock_client, tmp_path):
+    contents = {"doc1": b"%PDF-1" * 100, "doc2": b"%PDF-2" * 300}
+
+    def handler(method, path, params):
+        content = contents[path.split("/")[-1]]
+        return (
+            200,
+            content,
+            {"content-type": "application/pdf", "content-length": str(len(content))},
+        )
+
+    client, adapter = mock_client(handler)
+    documents = [
+        {"documentId": "doc1", "mimeType": "application/pdf"},
+        {"documentId": "doc2"},
+    ]
+    with open(os.path.join(str(tmp_path), "doc1.pdf"), "wb") as f:
+        f.write(contents["doc1"])
+
+    finished = []
+    report = client.download_documents(
+        str(tmp_path),
+        documents,
+        chunk_size=128,
+        progress=lambda r, d: finished.append(d["documentId"]),
+    )
+
+    assert report.skipped == ["doc1"]
+    assert report.downloaded == ["doc2"]
+    assert report.bytes_written == len(contents["doc2"])
+    assert sorted(finished) == ["doc1", "doc2"]
+    with open(os.path.join(str(tmp_path), "doc2"), "rb") as f:
+        assert f.read() == contents["doc2"]
+
+
+def test_download_documents_resumes_without_get(mock_client, tmp_path):
+    content = b"%PDF" * 10
+
+    def handler(method, path, params):
+        return 200, content, {"content-length": str(len(content))}
+
+    client, transport = mock_client(handler)
+    with open(os.path.join(str(tmp_path), "doc1.pdf"), "wb") as f:
+        f.write(content)
+
+    report = client.download_documents(
+        str(tmp_path), [{"documentId": "doc1", "mimeType": "application/pdf"}]
+    )
+
+    assert report.skipped == ["doc1"]
+    assert [request.method for request in transport.requests] == ["HEAD"]
+
+
+def test_download_documents_pages_through_all_documents(mock_client, tmp_path):
+    matches = 2500
+
+    def handler(method, path, params):
+        if path.endswith("/user/v2/documents"):
+            first = int(params["paging-first"])
+            count = min(int(params["paging-count"]), matches - first)
+            values = [{"documentId": "doc{0}".format(first + i)} for i in range(count)]
+            return 200, {
+                "paging": {"index": first, "matches": matches},
+                "values": values,
+            }
+        return 200, b"%PDF", {"content-length": "4"}
+
+    client, transport = mock_client(handler)
+    report = client.download_documents(str(tmp_path), max_workers=8)
+
+    assert report.total == matches and len(report.downloaded) == matches
+    assert len(os.listdir(str(tmp_path))) == matches
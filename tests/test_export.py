@@ -0,0 +1,48 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from comdirect_api import export  # noqa: E402
+
+
+def test_account_transactions_array_from_pages():
+    pages = [
+        {
+            "values": [
+                {
+                    "reference": "R1",
+                    "bookingDate": "2021-03-01",
+                    "amount": {"value": "-12.34", "unit": "EUR"},
+                    "remitter": {"holderName": "Alice"},
+                },
+                {"reference": "R2", "bookingDate": None, "amount": None},
+            ]
+        },
+        {"values": []},
+        {
+            "values": [
+                {
+                    "reference": "R3",
+                    "bookingDate": "2021-02-27",
+                    "amount": {"value": "100", "unit": "USD"},
+                }
+            ]
+        },
+    ]
+
+    array = export.account_transactions_array(iter(pages))
+
+    assert list(array["reference"]) == ["R1", "R2", "R3"]
+    assert array["amount"][0] == -12.34
+    assert np.isnan(array["amount"][1])
+    assert list(array["currency"]) == ["EUR", "", "USD"]
+    assert array["booking_date"].dtype == np.dtype("datetime64[D]")
+    assert np.isnat(array["booking_date"][1])
+    assert list(array["remitter"]) == ["Alice", "", ""]
+
+
+def test_positions_array_without_values():
+    array = export.positions_array({"values": []})
+
+    assert len(array) == 0
+    assert "current_value" in array.dtype.names
@@ -0,0 +1,39 @@
+from comdirect_api.service.instrument_service import InstrumentCache
+
+
+def test_instrument_cache_serves_aliases(mock_client):
+    instrument = {
+        "instrumentId": "ID1",
+        "wkn": "A0X8ZS",
+        "isin": "DE000A0X8ZS4",
+        "mnemonic": "SYM",
+    }
+
+    def handler(method, path, params):
+        return 200, {"paging": {"index": 0, "matches": 1}, "values": [instrument]}
+
+    client, adapter = mock_client(handler)
+    cache = client.enable_instrument_cache(maxsize=10, ttl=60)
+
+    assert client.get_instrument("DE000A0X8ZS4")["values"][0] == instrument
+    assert client.get_instrument("a0x8zs")["values"][0] == instrument
+    assert client.get_instrument("ID1")["values"][0] == instrument
+    assert len(adapter.requests) == 1
+
+    client.get_instrument("A0X8ZS", order_dimensions=True)
+    assert len(adapter.requests) == 2
+
+    cache.invalidate("SYM")
+    client.get_instrument("A0X8ZS")
+    assert len(adapter.requests) == 3
+    assert cache.stats()["hits"] == 2
+
+
+def test_instrument_cache_drops_aliases_of_evicted_instruments():
+    cache = InstrumentCache(maxsize=2)
+    for i in range(5):
+        instrument = {"instrumentId": "I{0}".format(i), "wkn": "W{0}".format(i)}
+        cache.put("W{0}".format(i), "static", {"values": [instrument]})
+
+    assert sorted(cache.aliases) == ["I3", "I4", "W3", "W4"]
+    assert cache.get("w4", "static")["values"][0]["instrumentId"] == "I4"
@@ -0,0 +1,44 @@
+from comdirect_api.auth.comdirect_auth import ComdirectAuth
+from comdirect_api.metrics import endpoint_template
+
+
+def test_endpoint_template():
+    assert endpoint_template("/api/brokerage/v3/depots/D1/positions/P1") == (
+        "/brokerage/v3/depots/{depotId}/positions/{positionId}"
+    )
+    assert (
+        endpoint_template("/api/brokerage/v3/orders/dimensions")
+        == "/brokerage/v3/orders/dimensions"
+    )
+    assert endpoint_template("/oauth/token") == "/oauth/token"
+
+
+def test_metrics_record_requests_per_endpoint(mock_client):
+    statuses = [503, 200, 200]
+
+    def handler(method, path, params):
+        return statuses.pop(0), {"values": []}, {"Retry-After": "0"}
+
+    client, transport = mock_client(handler)
+    client.session.auth = ComdirectAuth("access", "refresh")
+    events = []
+    metrics = client.enable_metrics([events.append])
+
+    client.get_account_transactions("account-1")
+    client.get_account_transactions("account-2")
+
+    endpoint = "GET /banking/v1/accounts/{accountId}/transactions"
+    stats = metrics.stats()[endpoint]
+    assert stats["requests"] == 3
+    assert stats["errors"] == 1
+    assert stats["statuses"] == {503: 1, 200: 2}
+    assert stats["response_bytes"] == 3 * len(b'{"values": []}')
+    assert [event.status_code for event in events] == [503, 200, 200]
+    assert (
+        events[-1].request_id in transport.requests[-1].headers["x-http-request-info"]
+    )
+
+    text = metrics.prometheus()
+    labels = 'method="GET",endpoint="/banking/v1/accounts/{accountId}/transactions"'
+    assert 'comdirect_requests_total{%s,status="503"} 1' % labels in text
+    assert 'comdirect_request_duration_seconds_bucket{%s,le="+Inf"} 3' % labels in text
@@ -0,0 +1,36 @@
+import pytest
+
+from benchmarks.mock_server import MockComdirectServer
+from comdirect_api.comdirect_client import ComdirectClient
+
+
+@pytest.fixture
+def server():
+    with MockComdirectServer(
+        transactions=120,
+        depots=3,
+        positions=4,
+        documents=5,
+        document_size=1000,
+        max_page_size=50,
+        error_rate=0.3,
+    ) as server:
+        yield server
+
+
+def test_client_against_mock_server(server, tmp_path):
+    client = ComdirectClient(
+        "id", "secret", api_url=server.api_url, oauth_url=server.oauth_url
+    )
+    client.enable_retries(max_retries=10, backoff_factor=0)
+    client.fetch_tan("user", "pin")
+    client.activate_session()
+
+    transactions = list(client.iter_account_transactions("account-0", paging_count=100))
+    positions, errors = client.get_all_depot_positions()
+    report = client.download_documents(str(tmp_path))
+
+    assert len(transactions) == 120
+    assert not errors and sum(len(page["values"]) for page in positions.values()) == 12
+    assert len(report.downloaded) == 5 and report.bytes_written == 5000
+    assert server.error_count > 0
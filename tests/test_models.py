@@ -0,0 +1,28 @@
+from decimal import Decimal
+
+from comdirect_api import models
+
+
+def test_models_parse_amounts_lazily(mock_client):
+    transaction = {
+        "reference": "R1",
+        "bookingStatus": "BOOKED",
+        "amount": {"value": "-12.34", "unit": "EUR"},
+        "remitter": {"holderName": "Alice"},
+    }
+
+    def handler(method, path, params):
+        return 200, {"paging": {"index": 0, "matches": 40}, "values": [transaction]}
+
+    client, transport = mock_client(handler)
+    page = client.get_account_transactions("account-id", as_model=True)
+
+    assert page.matches == 40
+    model = page[0]
+    assert isinstance(model, models.AccountTransaction)
+    assert not hasattr(model, "__dict__")
+    assert model.remitter == "Alice"
+    assert model.creditor is None
+    assert model.amount._value == "-12.34"
+    assert model.amount.value == Decimal("-12.34")
+    assert model.amount == models.Amount("-12.34", "EUR")
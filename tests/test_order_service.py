@@ -0,0 +1,87 @@
+DIMENSIONS = {
+    "paging": {"index": 0, "matches": 1},
+    "values": [
+        {
+            "instrumentId": "ID1",
+            "isin": "DE0001",
+            "venues": [
+                {
+                    "venueId": "V1",
+                    "type": "EXCHANGE",
+                    "sides": ["BUY", "SELL"],
+                    "orderTypes": {"LIMIT": {}, "MARKET": {}},
+                },
+                {
+                    "venueId": "V2",
+                    "type": "OFF",
+                    "sides": ["BUY"],
+                    "orderTypes": {"QUOTE": {}},
+                },
+            ],
+        }
+    ],
+}
+
+
+def test_dimension_cache_answers_narrower_queries(mock_client):
+    client, adapter = mock_client(lambda method, path, params: (200, DIMENSIONS))
+    cache = client.enable_dimension_cache()
+
+    assert client.get_dimensions(isin="DE0001") == DIMENSIONS
+    assert client.get_dimensions(isin="DE0001") == DIMENSIONS
+    narrow = client.get_dimensions(isin="DE0001", venue_id="V1", side="SELL")
+    assert len(adapter.requests) == 1
+
+    venues = narrow["values"][0]["venues"]
+    assert [venue["venueId"] for venue in venues] == ["V1"]
+    assert venues[0]["sides"] == ["SELL"]
+    assert DIMENSIONS["values"][0]["venues"][0]["sides"] == ["BUY", "SELL"]
+    assert (
+        client.get_dimensions(isin="DE0001", side="SELL", order_type="QUOTE")["values"]
+        == []
+    )
+
+    client.get_dimensions(isin="DE0002")
+    assert len(adapter.requests) == 2
+    assert cache.stats() == {"size": 2, "hits": 1, "local_hits": 2, "misses": 2}
+
+
+def test_set_changes_reports_each_order(mock_client):
+    def handler(method, path, params):
+        order_id = path.split("/")[5]
+        if order_id == "bad":
+            return 422, {}, {"x-http-response-info": "invalid limit"}
+        if method == "POST":
+            return (
+                201,
+                {},
+                {
+                    "x-once-authentication-info": '{"id": "c-%s", "typ": "TAN_FREI"}'
+                    % order_id
+                },
+            )
+        return 200, {"orderId": order_id, "orderStatus": "OPEN"}
+
+    client, transport = mock_client(handler)
+    changes = {
+        order_id: {"limit": {"value": "1"}} for order_id in ("o1", "o2", "bad", "o3")
+    }
+
+    report = client.set_changes(changes, max_workers=3)
+
+    assert sorted(report.results) == ["o1", "o2", "o3"]
+    assert report.results["o2"] == {"orderId": "o2", "orderStatus": "OPEN"}
+    assert str(report.errors["bad"]) == "invalid limit"
+    assert (report.done, report.failed, report.ok) == (4, 1, False)
+    assert repr(report).startswith("OrderChangeReport(4/4 done, 3 changed, 1 failed")
+    for order_id in report.results:
+        requests = [
+            request
+            for request in transport.requests
+            if "/{0}".format(order_id) in request.url
+        ]
+        assert [request.method for request in requests] == ["POST", "PATCH"]
+        assert (
+            "c-{0}".format(order_id)
+            in requests[1].headers["x-once-authentication-info"]
+        )
@@ -0,0 +1,129 @@
+import threading
+
+from comdirect_api import order_watcher
+
+
+def order(order_id, status, executions=0, limit="10"):
+    return {
+        "orderId": order_id,
+        "orderStatus": status,
+        "executions": [{"executionId": str(i)} for i in range(executions)],
+        "limit": {"value": limit, "unit": "EUR"},
+    }
+
+
+def test_order_watcher_emits_changes_only(mock_client):
+    orders = {
+        "o1": order("o1", "OPEN"),
+        "o2": order("o2", "OPEN"),
+        "o3": order("o3", "EXECUTED", 1),
+    }
+
+    def handler(method, path, params):
+        if path.endswith("/v3/orders"):
+            status = params.get("orderStatus")
+            values = [o for o in orders.values() if status in (None, o["orderStatus"])]
+            return 200, {
+                "paging": {"index": 0, "matches": len(values)},
+                "values": values,
+            }
+        return 200, orders[path.rsplit("/", 1)[1]]
+
+    client, transport = mock_client(handler)
+    events = []
+    watcher = order_watcher.OrderWatcher(
+        client, "D1", events.append, fast_interval=1, slow_interval=8
+    )
+
+    assert watcher.poll() == []
+    assert watcher.poll() == []
+    assert watcher.interval == 1
+
+    orders["o1"] = order("o1", "OPEN", 1)
+    orders["o2"] = order("o2", "CANCELLED_USER")
+    orders["o4"] = order("o4", "PENDING")
+    watcher.poll()
+
+    assert {(event.kind, event.order_id) for event in events} == {
+        (order_watcher.EXECUTION, "o1"),
+        (order_watcher.CANCELLED, "o2"),
+        (order_watcher.NEW, "o4"),
+    }
+    assert "orderStatus=OPEN" in transport.requests[-3].url
+
+    orders["o1"] = order("o1", "EXECUTED", 2)
+    orders["o4"] = order("o4", "CANCELLED_SYSTEM")
+    watcher.poll()
+    assert (
+        events[-2].kind == order_watcher.EXECUTION and events[-2].status == "EXECUTED"
+    )
+
+    watcher.poll()
+    watcher.poll()
+    assert watcher.interval == 4
+    assert watcher.stats()["events"] == 5
+
+
+def test_order_watcher_keeps_running_after_errors(mock_client):
+    responses = [503, 200, 200]
+    polled = threading.Event()
+
+    def handler(method, path, params):
+        status = responses.pop(0) if responses else 200
+        if not responses:
+            polled.set()
+        if status != 200:
+            raise ConnectionError("network down")
+        return 200, {"values": [order("o1", None)]}
+
+    client, transport = mock_client(handler)
+    errors = []
+    watcher = order_watcher.OrderWatcher(
+        client,
+        "D1",
+        fast_interval=0.01,
+        slow_interval=0.02,
+        error_callback=errors.append,
+    )
+
+    watcher.start()
+    assert polled.wait(5)
+    watcher.stop()
+
+    assert len(errors) == 1 and isinstance(errors[0], ConnectionError)
+    assert watcher.stats()["errors"] == 1
+    assert watcher.orders["o1"]["orderStatus"] is None
+    status_lost = order_watcher._event(
+        ("OPEN", 0, None, "10", None), (None, 0, None, "10", None), order("o1", None)
+    )
+    assert status_lost.kind == order_watcher.STATUS
+
+
+def test_order_watcher_reports_orders_filled_between_polls(mock_client):
+    orders = {"o1": order("o1", "EXECUTED", 1)}
+
+    def handler(method, path, params):
+        status = params.get("orderStatus")
+        values = [o for o in orders.values() if status in (None, o["orderStatus"])]
+        return 200, {"paging": {"index": 0, "matches": len(values)}, "values": values}
+
+    client, transport = mock_client(handler)
+    watcher = order_watcher.OrderWatcher(
+        client, "D1", fast_interval=1, slow_interval=60, full_poll_every=3
+    )
+
+    assert watcher.poll() == []
+    orders["o2"] = order("o2", "EXECUTED", 1)
+    orders["o3"] = order("o3", "CANCELLED_USER")
+    assert watcher.poll() == []
+    assert watcher.poll() == []
+
+    events = watcher.poll()
+    assert "orderStatus" not in transport.requests[-1].url
+    assert [(event.kind, event.order_id) for event in events] == [
+        (order_watcher.NEW, "o2"),
+        (order_watcher.EXECUTION, "o2"),
+        (order_watcher.NEW, "o3"),
+        (order_watcher.CANCELLED, "o3"),
+    ]
+    assert watcher.poll() == []
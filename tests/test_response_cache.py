@@ -0,0 +1,59 @@
+import time
+
+from comdirect_api.response_cache import ResponseCache
+
+
+def test_response_cache_serves_stale_and_revalidates(mock_client):
+    now = [0.0]
+    body = {"values": [{"accountId": "1"}]}
+
+    def handler(method, path, params):
+        if transport.requests[-1].headers.get("If-None-Match") == '"v1"':
+            return 304, b"", {"ETag": '"v1"'}
+        return 200, body, {"ETag": '"v1"'}
+
+    client, transport = mock_client(handler)
+    cache = client.adapter.cache = ResponseCache(clock=lambda: now[0])
+
+    assert client.get_all_balances() == body
+    now[0] = 10
+    assert client.get_all_balances() == body
+    assert len(transport.requests) == 1
+
+    now[0] = 40
+    assert client.get_all_balances() == body
+    for _ in range(100):
+        if cache.revalidations:
+            break
+        time.sleep(0.01)
+    assert len(transport.requests) == 2
+    assert transport.requests[1].headers["If-None-Match"] == '"v1"'
+
+    now[0] = 200
+    assert client.get_all_balances() == body
+    assert cache.stats() == {
+        "size": 1,
+        "hits": 1,
+        "stale_hits": 1,
+        "misses": 2,
+        "revalidations": 2,
+        "evictions": 0,
+        "hit_ratio": 0.5,
+    }
+
+    # uncached endpoints are always requested
+    client.get_account_transactions("account-id")
+    assert len(transport.requests) == 4
+
+
+def test_only_non_auth_writes_invalidate(mock_client):
+    client, transport = mock_client(lambda method, path, params: (200, {}))
+    cache = client.enable_response_cache()
+
+    client.get_all_balances()
+    client.session.post(client.oauth_url + "/oauth/token")
+    client.session.patch(client.api_url + "/session/clients/user/v1/sessions/S1")
+    assert cache.stats()["size"] == 1
+
+    client.session.patch(client.api_url + "/brokerage/v3/orders/O1")
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,41 @@
+import threading
+import time
+
+from comdirect_api.scheduler import HIGH, LOW, NORMAL, RequestScheduler
+
+
+def test_scheduler_classifies_requests():
+    scheduler = RequestScheduler()
+
+    assert scheduler.classify("GET", "/api/brokerage/v3/orders/123") == HIGH
+    assert scheduler.classify("POST", "/api/brokerage/v3/orders/123/validation") == HIGH
+    assert scheduler.classify("GET", "/api/messages/clients/user/v2/documents") == LOW
+    assert scheduler.classify("GET", "/api/banking/v1/accounts/1/transactions") == LOW
+    assert (
+        scheduler.classify("GET", "/api/banking/clients/user/v2/accounts/balances")
+        == NORMAL
+    )
+
+
+def test_scheduler_releases_high_priority_first():
+    scheduler = RequestScheduler(rate=20, burst=1)
+    scheduler.acquire()
+    granted = []
+
+    def acquire(priority):
+        scheduler.acquire(priority)
+        granted.append(priority)
+
+    threads = []
+    for priority in (LOW, LOW, HIGH):
+        thread = threading.Thread(target=acquire, args=(priority,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+
+    assert granted == [HIGH, LOW, LOW]
+    stats = scheduler.stats()
+    assert stats["max_queue_depth"] == 3
+    assert stats["priorities"]["low"]["requests"] == 2
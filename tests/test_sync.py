@@ -0,0 +1,87 @@
+import os
+
+from comdirect_api.sync import TransactionSync
+
+
+def transaction(reference, booking_date, value, status="BOOKED"):
+    return {
+        "reference": reference,
+        "bookingStatus": status,
+        "bookingDate": booking_date,
+        "amount": {"value": value, "unit": "EUR"},
+        "remittanceInfo": "info " + value,
+    }
+
+
+def test_transaction_sync_fetches_delta_and_promotes(mock_client, tmp_path):
+    booked = [
+        transaction("R2", "2021-03-02", "-2.00"),
+        transaction("R1", "2021-03-01", "-1.00"),
+    ]
+    not_booked = [transaction("", None, "-3.00", "NOTBOOKED")]
+    requested = []
+
+    def handler(method, path, params):
+        values = booked if params["transactionState"] == "BOOKED" else not_booked
+        requested.append(params.get("min-bookingDate"))
+        return 200, {"paging": {"index": 0, "matches": len(values)}, "values": values}
+
+    client, transport = mock_client(handler)
+    with TransactionSync(client, os.path.join(str(tmp_path), "db.sqlite")) as sync:
+        assert sync.sync_account("acc", min_booking_date="2021-01-01") == {
+            "new": 2,
+            "promoted": 0,
+            "not_booked": 1,
+        }
+        assert [t["amount"]["value"] for t in sync.account_transactions("acc")] == [
+            "-3.00",
+            "-2.00",
+            "-1.00",
+        ]
+
+        booked.insert(0, transaction("R3", "2021-03-05", "-3.00"))
+        not_booked.clear()
+        assert sync.sync_account("acc") == {"new": 1, "promoted": 1, "not_booked": 0}
+        assert sync.watermark("account", "acc")["reference"] == "R3"
+        assert [
+            t["reference"]
+            for t in sync.account_transactions("acc", min_booking_date="2021-03-02")
+        ] == ["R3", "R2"]
+
+    assert requested == ["2021-01-01", None, "2021-02-27", None]
+
+
+def test_depot_sync_reports_only_new_and_changed(mock_client, tmp_path):
+    transactions = [
+        {"transactionId": "T1", "bookingStatus": "BOOKED", "bookingDate": "2021-03-01"},
+        {"transactionId": "T2", "bookingStatus": "NOTBOOKED", "bookingDate": None},
+    ]
+    requested = []
+
+    def handler(method, path, params):
+        requested.append(params.get("max-bookingDate"))
+        assert "min-bookingDate" not in params
+        values = [
+            t
+            for t in transactions
+            if t["bookingDate"] is None
+            or t["bookingDate"] <= params.get("max-bookingDate", "9999")
+        ]
+        return 200, {"paging": {"index": 0, "matches": len(values)}, "values": values}
+
+    client, transport = mock_client(handler)
+    with TransactionSync(client, os.path.join(str(tmp_path), "db.sqlite")) as sync:
+        assert sync.sync_depot("dep") == {"new": 2, "changed": 0, "not_booked": 1}
+        assert sync.sync_depot("dep") == {"new": 0, "changed": 0, "not_booked": 1}
+
+        transactions[1] = dict(
+            transactions[1], bookingStatus="BOOKED", bookingDate="2021-03-04"
+        )
+        assert sync.sync_depot("dep") == {"new": 0, "changed": 1, "not_booked": 0}
+        assert [t["transactionId"] for t in sync.depot_transactions("dep")] == [
+            "T2",
+            "T1",
+        ]
+
+    assert requested[0] is None
+    assert len(requested) == 3 and None not in requested[1:]
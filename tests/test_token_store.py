@@ -0,0 +1,39 @@
+import os
+
+from comdirect_api.auth.comdirect_auth import ComdirectAuth
+from comdirect_api.auth.token_store import FileTokenStore
+
+
+def test_token_store_shares_refreshed_tokens(mock_client, tmp_path):
+    filename = os.path.join(tmp_path, "tokens.json")
+    token_requests = []
+
+    def handler(method, path, params):
+        if path == "/oauth/token":
+            token_requests.append(path)
+            return 200, {
+                "access_token": "access2",
+                "refresh_token": "refresh2",
+                "expires_in": 599,
+            }
+        return 200, {"values": []}
+
+    primary, _ = mock_client(handler)
+    auth = ComdirectAuth("access1", "refresh1", expires_in=599)
+    auth.refresher = primary.auth_service.refresh_token
+    primary.auth_service.auth = primary.session.auth = auth
+    primary.set_token_store(FileTokenStore(filename))
+
+    worker, worker_transport = mock_client(handler)
+    worker.set_token_store(FileTokenStore(filename))
+    assert worker.auth_service.auth.access_token == "access1"
+
+    primary.auth_service.auth.expires_at = 0
+    primary.get_all_balances()
+    worker.auth_service.auth.expires_at = 0
+    worker.get_all_balances()
+
+    assert len(token_requests) == 1
+    assert worker.auth_service.auth.refresh_token == "refresh2"
+    assert not worker.auth_service.auth.expires_soon()
+    assert worker_transport.requests[-1].headers["Authorization"] == "Bearer access2"
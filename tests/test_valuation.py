@@ -0,0 +1,70 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from comdirect_api.valuation import PortfolioValuation  # noqa: E402
+
+
+def position(position_id, value, purchase, currency="EUR", instrument_type="SHARE"):
+    return {
+        "positionId": position_id,
+        "quantity": {"value": "10", "unit": "XXX"},
+        "currentPrice": {"price": {"value": "1.5", "unit": currency}},
+        "purchaseValue": {"value": purchase, "unit": "EUR"},
+        "currentValue": {"value": value, "unit": "EUR"},
+        "instrument": {"staticData": {"instrumentType": instrument_type}},
+    }
+
+
+def test_valuation_aggregates_and_updates_incrementally():
+    valuation = PortfolioValuation(capacity=1)
+    # the (positions, errors) tuple of get_all_depot_positions
+    valuation.update_all(
+        (
+            {
+                "D1": {
+                    "values": [
+                        position("P1", "300", "200"),
+                        position("P2", "100", "150", "USD", "FUND"),
+                    ]
+                },
+                "D2": {"values": [position("P3", "600", "500", "USD")]},
+            },
+            {"D3": ValueError("unavailable")},
+        )
+    )
+
+    assert len(valuation) == 3
+    assert valuation.market_value == 1000
+    assert valuation.profit_loss == 150
+    assert valuation.weights()[("D2", "P3")] == 0.6
+    assert valuation.by_currency()["USD"]["market_value"] == 700
+    assert valuation.by_instrument_type()["FUND"]["profit_loss"] == -50
+
+    valuation.update({"values": [position("P1", "400", "200")]}, "D1")
+    valuation.update_position(position("P3", "500", "500", "USD"), "D2")
+
+    assert len(valuation) == 2
+    assert valuation.market_value == 900
+    assert valuation.group("depot") == {
+        "D1": {
+            "positions": 1,
+            "market_value": 400.0,
+            "purchase_value": 200.0,
+            "profit_loss": 200.0,
+            "weight": 400 / 900,
+        },
+        "D2": {
+            "positions": 1,
+            "market_value": 500.0,
+            "purchase_value": 500.0,
+            "profit_loss": 0.0,
+            "weight": 500 / 900,
+        },
+    }
+    assert set(valuation.by_instrument_type()) == {"SHARE"}
+
+    valuation.update({"values": [position("P4", "100", "100")]}, "D1")
+    assert set(valuation.weights()) == {("D1", "P4"), ("D2", "P3")}
+    valuation.remove_depot("D2")
+    assert valuation.market_value == 100